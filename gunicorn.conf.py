@@ -0,0 +1,22 @@
+import glob
+import os
+import tempfile
+
+# Workers write their metrics to files in a shared directory so /metrics
+# reports totals for the whole server, whichever worker answers the scrape
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'shoptrack-metrics'))
+
+
+def on_starting(server):
+    """Start without the previous run's metrics. Only the *.db files
+    prometheus_client writes are removed: the directory may be shared"""
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, '*.db')):
+        os.remove(path)
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that went away"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,25 +1,42 @@
 from flask import Flask
 from flask_cors import CORS
 from .database import init_app as init_database
+from .compression import init_app as init_compression
+from .observability import init_app as init_observability
 from .config import config
-from .cli import init_db, reset_db
+from .cli import init_db, reset_db, rebuild_rollups, db, statements, bench, loadtest, contention, seed_db, replay
+from .utils.json_provider import OrjsonProvider
 
 def create_app(config_name=None):
     """Create and configure the Flask application"""
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     
     config_name = config_name or 'default'
     app.config.from_object(config[config_name])
     
     init_database(app)
+    init_observability(app)
     CORS(app, origins=app.config['CORS_ORIGINS'])
+    init_compression(app)
     
-    from .api.routes import auth_bp, product_bp, history_bp
+    from .api.base import BaseController
+    from .api.routes import auth_bp, product_bp, history_bp, admin_bp
+    app.teardown_request(BaseController.clear_request_state)
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(product_bp, url_prefix='/api/products')
     app.register_blueprint(history_bp, url_prefix='/api/history')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
     
     app.cli.add_command(init_db)
     app.cli.add_command(reset_db)
+    app.cli.add_command(rebuild_rollups)
+    app.cli.add_command(db)
+    app.cli.add_command(statements)
+    app.cli.add_command(bench)
+    app.cli.add_command(loadtest)
+    app.cli.add_command(contention)
+    app.cli.add_command(seed_db)
+    app.cli.add_command(replay)
     
     return app
\ No newline at end of file
@@ -0,0 +1,82 @@
+from .base import BaseController, admin_required
+from flask import current_app, request
+from ..observability.memory import snapshots, statistic_to_dict, top_allocations
+from ..observability.statements import registry
+
+MEMORY_GROUPINGS = ('lineno', 'filename', 'traceback')
+LIMIT_ERROR = "limit must be a positive integer"
+
+def _limit_arg(default):
+    """The limit query argument, default when absent, None when invalid"""
+    value = request.args.get('limit')
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        return None
+    return limit if limit > 0 else None
+
+class AdminController(BaseController):
+    def __init__(self):
+        super().__init__()
+
+    @admin_required
+    def get_statements(self):
+        """Get this worker's statement statistics, heaviest first"""
+        sort = request.args.get('sort', 'total')
+        if sort not in registry.SORT_KEYS:
+            return self.error_response(message=f"sort must be one of: {', '.join(registry.SORT_KEYS)}")
+        limit = _limit_arg(20)
+        if limit is None:
+            return self.error_response(message=LIMIT_ERROR)
+        return self.success_response(data=registry.dump(sort, limit))
+
+    @admin_required
+    def reset_statements(self):
+        """Clear this worker's statement statistics"""
+        registry.reset()
+        return self.success_response(message="Statement statistics reset")
+
+    @admin_required
+    def take_memory_snapshot(self):
+        """Take a tracemalloc snapshot (starting tracemalloc if needed)"""
+        limit = _limit_arg(10)
+        if limit is None:
+            return self.error_response(message=LIMIT_ERROR)
+        snapshot_id, snapshot = snapshots.take(current_app.config['MEMORY_TRACE_FRAMES'])
+        return self.success_response(data={
+            'id': snapshot_id,
+            'traced_kb': round(sum(stat.size for stat in snapshot.statistics('filename')) / 1024, 1),
+            'top': [statistic_to_dict(stat) for stat in top_allocations(snapshot, limit=limit)],
+        }, message="Snapshot taken")
+
+    @admin_required
+    def list_memory_snapshots(self):
+        """List the ids of the snapshots kept"""
+        return self.success_response(data={'ids': snapshots.ids()})
+
+    @admin_required
+    def diff_memory_snapshots(self, first_id, second_id):
+        """Show where memory grew between two snapshots"""
+        first, second = snapshots.get(first_id), snapshots.get(second_id)
+        if first is None or second is None:
+            return self.error_response(message="Snapshot not found", status_code=404)
+        group_by = request.args.get('group_by', 'lineno')
+        if group_by not in MEMORY_GROUPINGS:
+            return self.error_response(message=f"group_by must be one of: {', '.join(MEMORY_GROUPINGS)}")
+        limit = _limit_arg(20)
+        if limit is None:
+            return self.error_response(message=LIMIT_ERROR)
+        growth = top_allocations(second, first, group_by, limit)
+        return self.success_response(data={
+            'from': first_id,
+            'to': second_id,
+            'growth': [statistic_to_dict(stat) for stat in growth],
+        })
+
+    @admin_required
+    def clear_memory_snapshots(self):
+        """Drop the snapshots kept"""
+        snapshots.clear()
+        return self.success_response(message="Snapshots cleared")
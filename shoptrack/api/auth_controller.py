@@ -1,5 +1,5 @@
 from .base import BaseController
-from flask import request
+from flask import g, request
 from ..utils.transactions import with_transaction
 from ..utils.validation_utils import validate_username_password
 
@@ -36,14 +36,14 @@ class AuthController(BaseController):
             self.get_session().flush()
 
             if not user or not user.id:
-                self.logger.error(f"User creation failed or user has no ID: {user}")
+                self.logger.error("User creation failed or user has no ID: %s", user)
                 return self.error_response(message="User creation failed")
 
             session = services['session'].create_session(user.id)
             self.get_session().flush()
 
             if not session:
-                self.logger.error(f"Session creation failed: {session}")
+                self.logger.error("Session creation failed: %s", session)
                 return self.error_response(message="Session creation failed")
 
             return self.success_response(
@@ -52,7 +52,7 @@ class AuthController(BaseController):
             )
             
         except Exception as e:
-            self.logger.error(f"Registration error: {e}")
+            self.logger.error("Registration error: %s", e)
             return self.error_response(message="Registration failed")
 
     @with_transaction
@@ -75,6 +75,8 @@ class AuthController(BaseController):
             )
             if not user:
                 return self.error_response(message="Invalid username or password")
+            # The rest of the request acts as this user (access log, traces, capture)
+            g.current_user_id = user.id
             
             session = services['session'].create_session(user.id)
             self.get_session().flush()
@@ -85,7 +87,7 @@ class AuthController(BaseController):
             )
             
         except Exception as e:
-            self.logger.error(f"Login error: {e}")
+            self.logger.error("Login error: %s", e)
             return self.error_response(message="Login failed")
 
     @with_transaction
@@ -113,7 +115,7 @@ class AuthController(BaseController):
             return self.success_response(message="Logout successful")
             
         except Exception as e:
-            self.logger.error(f"Logout error: {e}")
+            self.logger.error("Logout error: %s", e)
             return self.error_response(message="Logout failed")
     
     def validate(self):
@@ -142,5 +144,5 @@ class AuthController(BaseController):
             return self.success_response(message="Validation successful", data={'user': user_data})
             
         except Exception as e:
-            self.logger.error(f"Validation error: {e}")
+            self.logger.error("Validation error: %s", e)
             return self.error_response(message="Session validation failed")
\ No newline at end of file
@@ -1,12 +1,39 @@
 from flask import g, jsonify, request
 from functools import wraps
-from ..services import AuthService, SessionService, UserService, ProductService, HistoryService
+from datetime import timezone
+from werkzeug.http import http_date
+from ..services import ServiceContainer
+from ..observability.admin import is_admin_request
+from ..observability.tracing import traceable
 import logging
 
+def _as_utc(value):
+    """Treat naive datetimes (as returned by SQLite) as UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+def admin_required(func):
+    """Decorator restricting a controller method to requests with the admin token"""
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if not is_admin_request():
+            return self.error_response(message="Admin token required", status_code=403)
+        return func(self, *args, **kwargs)
+    return wrapper
+
 class BaseController:
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        traceable(cls, 'controller')
+
+    @staticmethod
+    def clear_request_state(exception=None):
+        """Drop the per-request service container and user id cached on g"""
+        g.pop('services', None)
+        g.pop('current_user_id', None)
+
     def get_session(self):
         """Get the session from the request"""
         session = g.get('db')
@@ -15,15 +42,13 @@ class BaseController:
         return session
 
     def get_services(self):
-        """Get the services"""
+        """Get the request's service container, creating it on first use"""
         session = self.get_session()
-        return {
-            'auth': AuthService(session),
-            'session': SessionService(session),
-            'user': UserService(session),
-            'product': ProductService(session),
-            'history': HistoryService(session)
-        }
+        services = g.get('services')
+        if services is None or services.session is not session:
+            services = ServiceContainer(session)
+            g.services = services
+        return services
 
     def login_required(self, func):
         """Decorator to require authentication"""
@@ -49,14 +74,43 @@ class BaseController:
                 
                 return func(*args, **kwargs)
             except Exception as e:
-                self.logger.error(f"Authentication error: {e}")
+                self.logger.error("Authentication error: %s", e)
                 return self.error_response("Authentication failed", 401)
         return wrapper
 
-    def success_response(self, data=None, message='Success'):
+    def success_response(self, data=None, message='Success', headers=None):
         """Success response"""
+        if headers:
+            return jsonify({'success': True, 'data': data, 'message': message}), 200, headers
         return jsonify({'success': True, 'data': data, 'message': message}), 200
 
+    def version_headers(self, user_id, data_version):
+        """ETag/Last-Modified headers for a user's data version"""
+        version, updated_at = data_version
+        headers = {
+            'ETag': f'W/"{user_id}-{version}"',
+            'Cache-Control': 'private, no-cache'
+        }
+        if updated_at:
+            headers['Last-Modified'] = http_date(_as_utc(updated_at))
+        return headers
+
+    def not_modified_response(self, user_id, data_version):
+        """Return a 304 response if the client's copy is current, otherwise None"""
+        version, updated_at = data_version
+        if request.if_none_match:
+            current = request.if_none_match.contains_weak(f"{user_id}-{version}")
+        elif request.if_modified_since and updated_at:
+            # Last-Modified has whole seconds and can't tell apart two writes
+            # in the same second; clients that need that send the ETag
+            current = _as_utc(updated_at).replace(microsecond=0) <= request.if_modified_since
+        else:
+            current = False
+
+        if not current:
+            return None
+        return '', 304, self.version_headers(user_id, data_version)
+
     def error_response(self, message='Error', status_code=400):
         """Error response"""
         return jsonify({'success': False, 'message': message}), status_code
@@ -73,12 +127,18 @@ class BaseController:
             except Exception as e:
                 # Rollback on error
                 self.get_session().rollback()
-                self.logger.error(f"Transaction error: {e}")
+                self.logger.error("Transaction error: %s", e)
                 return self.error_response(str(e), 500)
         return wrapper
 
     def get_current_user_id(self):
-        """Get the current user id from the session token"""
+        """Get the current user id from the session token, once per request"""
+        if 'current_user_id' not in g:
+            g.current_user_id = self._lookup_current_user_id()
+        return g.current_user_id
+
+    def _lookup_current_user_id(self):
+        """Resolve the session token in the Authorization header to a user id"""
         try:
             auth_header = request.headers.get('Authorization')
             if not auth_header or not auth_header.startswith('Bearer '):
@@ -98,5 +158,5 @@ class BaseController:
             session = services['session'].get_session_by_id(session_id)
             return session.user_id if session else None
         except Exception as e:
-            self.logger.error(f"Error getting current user id: {e}")
+            self.logger.error("Error getting current user id: %s", e)
             return None
\ No newline at end of file
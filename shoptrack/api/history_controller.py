@@ -1,5 +1,8 @@
 from .base import BaseController
+from ..models import History
+from datetime import date
 from flask import request
+from ..services.history_service import MAX_TIMESERIES_DAYS, TIMESERIES_BUCKETS, timeseries_range
 from ..utils.transactions import with_transaction
 from ..utils.validation_utils import validate_transaction
 
@@ -22,10 +25,17 @@ class HistoryController(BaseController):
                     return self.error_response(message="Transaction not found")
                 return self.success_response(data=history.to_dict())
             else:
+                data_version = services['history'].get_data_version(user_id)
+                not_modified = self.not_modified_response(user_id, data_version)
+                if not_modified:
+                    return not_modified
                 history = services['history'].get_transactions_by_user(user_id)
-                return self.success_response(data=[h.to_dict() for h in history])
+                return self.success_response(
+                    data=History.to_dict_list(history),
+                    headers=self.version_headers(user_id, data_version)
+                )
         except Exception as e:
-            self.logger.error(f"Error getting history: {e}")
+            self.logger.error("Error getting history: %s", e)
             return self.error_response(message="Failed to retrieve history")
     
     @with_transaction
@@ -54,7 +64,7 @@ class HistoryController(BaseController):
             )
             return self.success_response(data=history.to_dict())
         except Exception as e:
-            self.logger.error(f"Error creating transaction: {e}")
+            self.logger.error("Error creating transaction: %s", e)
             return self.error_response(message="Transaction creation failed")
         
     @with_transaction
@@ -80,7 +90,7 @@ class HistoryController(BaseController):
                 return self.error_response(message="Transaction not found")
             return self.success_response(data=history.to_dict())
         except Exception as e:
-            self.logger.error(f"Error updating transaction: {e}")
+            self.logger.error("Error updating transaction: %s", e)
             return self.error_response(message="Transaction update failed")
 
     @with_transaction
@@ -97,7 +107,7 @@ class HistoryController(BaseController):
                 return self.error_response(message="Transaction not found")
             return self.success_response(message="Transaction deleted successfully")
         except Exception as e:
-            self.logger.error(f"Error deleting transaction: {e}")
+            self.logger.error("Error deleting transaction: %s", e)
             return self.error_response(message="Transaction deletion failed")
 
     def get_by_action(self, action):
@@ -112,9 +122,9 @@ class HistoryController(BaseController):
 
             services = self.get_services()
             history = services['history'].get_user_transactions_by_action(user_id, action)
-            return self.success_response(data=[h.to_dict() for h in history])
+            return self.success_response(data=History.to_dict_list(history))
         except Exception as e:
-            self.logger.error(f"Error getting transactions by action: {e}")
+            self.logger.error("Error getting transactions by action: %s", e)
             return self.error_response(message="Failed to get transactions by action")
     
     def get_by_product_id(self, product_id):
@@ -128,7 +138,40 @@ class HistoryController(BaseController):
             # Get all transactions for the product, then filter by user
             all_transactions = services['history'].get_transactions_by_product(product_id)
             user_transactions = [t for t in all_transactions if t.user_id == user_id]
-            return self.success_response(data=[t.to_dict() for t in user_transactions])
+            return self.success_response(data=History.to_dict_list(user_transactions))
         except Exception as e:
-            self.logger.error(f"Error getting transactions by product id: {e}")
-            return self.error_response(message="Failed to get transactions by product id")
\ No newline at end of file
+            self.logger.error("Error getting transactions by product id: %s", e)
+            return self.error_response(message="Failed to get transactions by product id")
+
+    def get_timeseries(self, bucket='day', start=None, end=None, product_id=None):
+        """Get buy and sell totals per day, week or month"""
+        try:
+            if bucket not in TIMESERIES_BUCKETS:
+                return self.error_response(message="Bucket must be 'day', 'week' or 'month'")
+
+            user_id = self.get_current_user_id()
+            if not user_id:
+                return self.error_response(message="User not found")
+
+            try:
+                start = date.fromisoformat(start) if start else None
+                end = date.fromisoformat(end) if end else None
+            except ValueError:
+                return self.error_response(message="Dates must be YYYY-MM-DD")
+            start, end = timeseries_range(start, end)
+            if start > end:
+                return self.error_response(message="Start date cannot be after end date")
+            if (end - start).days >= MAX_TIMESERIES_DAYS:
+                return self.error_response(message=f"Date range cannot exceed {MAX_TIMESERIES_DAYS} days")
+
+            services = self.get_services()
+            if product_id is not None and not services['product'].validate_product_ownership(product_id, user_id):
+                return self.error_response(message="Product not found")
+
+            series = services['history'].get_transaction_timeseries(
+                user_id=user_id, product_id=product_id, bucket=bucket, start=start, end=end
+            )
+            return self.success_response(data=series)
+        except Exception as e:
+            self.logger.error("Error getting transaction timeseries: %s", e)
+            return self.error_response(message="Failed to get transaction timeseries")
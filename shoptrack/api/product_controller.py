@@ -1,4 +1,5 @@
 from .base import BaseController
+from ..models import Product
 from flask import request
 from ..utils.transactions import with_transaction
 from ..utils.validation_utils import validate_product_creation
@@ -44,13 +45,13 @@ class ProductController(BaseController):
                         action='buy'
                     )
                 except Exception as e:
-                    self.logger.error(f"Failed to create initial buy transaction: {e}")
+                    self.logger.error("Failed to create initial buy transaction: %s", e)
                     # Don't fail product creation if history creation fails
             
             return self.success_response(data=product.to_dict())
             
         except Exception as e:
-            self.logger.error(f"Error creating product: {e}")
+            self.logger.error("Error creating product: %s", e)
             return self.error_response(message="Product creation failed")
     
     @with_transaction
@@ -64,8 +65,15 @@ class ProductController(BaseController):
             services = self.get_services()
 
             if not product_id:
+                data_version = services['product'].get_data_version(user_id)
+                not_modified = self.not_modified_response(user_id, data_version)
+                if not_modified:
+                    return not_modified
                 products = services['product'].get_products_by_owner(user_id)
-                return self.success_response(data=[p.to_dict() for p in products])
+                return self.success_response(
+                    data=Product.to_dict_list(products),
+                    headers=self.version_headers(user_id, data_version)
+                )
             else:
                 product = services['product'].get_product_by_id(product_id)
                 if not product:
@@ -76,7 +84,7 @@ class ProductController(BaseController):
                 return self.success_response(data=product.to_dict())
 
         except Exception as e:
-            self.logger.error(f"Error getting product: {e}")
+            self.logger.error("Error getting product: %s", e)
             return self.error_response(message="Failed to retrieve product")
     
     @with_transaction
@@ -104,7 +112,7 @@ class ProductController(BaseController):
             
             return self.success_response(data=product.to_dict())
         except Exception as e:
-            self.logger.error(f"Error updating product: {e}")
+            self.logger.error("Error updating product: %s", e)
             return self.error_response(message="Product update failed")
 
     @with_transaction
@@ -122,7 +130,7 @@ class ProductController(BaseController):
             
             return self.success_response(message="Product deleted successfully")
         except Exception as e:
-            self.logger.error(f"Error deleting product: {e}")
+            self.logger.error("Error deleting product: %s", e)
             return self.error_response(message="Product deletion failed")
 
     @with_transaction
@@ -140,7 +148,7 @@ class ProductController(BaseController):
             
             return self.success_response(data=product.to_dict())
         except Exception as e:
-            self.logger.error(f"Error adding stock: {e}")
+            self.logger.error("Error adding stock: %s", e)
             return self.error_response(message="Failed to add stock")
     
     @with_transaction
@@ -158,7 +166,7 @@ class ProductController(BaseController):
             
             return self.success_response(data=product.to_dict())
         except Exception as e:
-            self.logger.error(f"Error removing stock: {e}")
+            self.logger.error("Error removing stock: %s", e)
             return self.error_response(message="Failed to remove stock")
     
     @with_transaction
@@ -176,7 +184,7 @@ class ProductController(BaseController):
             
             return self.success_response(data=product.to_dict())
         except Exception as e:
-            self.logger.error(f"Error setting stock: {e}")
+            self.logger.error("Error setting stock: %s", e)
             return self.error_response(message="Failed to set stock")
     
     @with_transaction
@@ -189,9 +197,9 @@ class ProductController(BaseController):
 
             services = self.get_services()
             products = services['product'].search_products(query, user_id)
-            return self.success_response(data=[p.to_dict() for p in products])
+            return self.success_response(data=Product.to_dict_list(products))
         except Exception as e:
-            self.logger.error(f"Error searching for product: {e}")
+            self.logger.error("Error searching for product: %s", e)
             return self.error_response(message="Failed to search for product")
         
     @with_transaction
@@ -209,7 +217,7 @@ class ProductController(BaseController):
             
             return self.success_response(data=product.to_dict())
         except Exception as e:
-            self.logger.error(f"Error updating price for product: {e}")
+            self.logger.error("Error updating price for product: %s", e)
             return self.error_response(message="Failed to update price for product")
     
     def get_low_stock_products(self, threshold=10):
@@ -223,7 +231,7 @@ class ProductController(BaseController):
             products = services['product'].get_low_stock_products(threshold)
             # Filter by user's products
             user_products = [p for p in products if p.owner_id == user_id]
-            return self.success_response(data=[p.to_dict() for p in user_products])
+            return self.success_response(data=Product.to_dict_list(user_products))
         except Exception as e:
-            self.logger.error(f"Error getting low stock products: {e}")
+            self.logger.error("Error getting low stock products: %s", e)
             return self.error_response(message="Failed to get low stock products")
\ No newline at end of file
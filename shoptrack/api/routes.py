@@ -2,16 +2,19 @@ from flask import Blueprint, request
 from .auth_controller import AuthController
 from .product_controller import ProductController
 from .history_controller import HistoryController
+from .admin_controller import AdminController
 
 # Create blueprints
 auth_bp = Blueprint('auth', __name__)
 product_bp = Blueprint('product', __name__)
 history_bp = Blueprint('history', __name__)
+admin_bp = Blueprint('admin', __name__)
 
 # Initialize controllers
 auth_controller = AuthController()
 product_controller = ProductController()
 history_controller = HistoryController()
+admin_controller = AdminController()
 
 # =============================================================================
 # AUTH ROUTES
@@ -91,6 +94,15 @@ def get_history():
     history_id = request.args.get('history_id', type=int)
     return history_controller.get_history(history_id)
 
+@history_bp.route('/timeseries', methods=['GET'])
+def get_timeseries():
+    return history_controller.get_timeseries(
+        bucket=request.args.get('bucket', 'day'),
+        start=request.args.get('from'),
+        end=request.args.get('to'),
+        product_id=request.args.get('product_id', type=int)
+    )
+
 @history_bp.route('/<int:history_id>', methods=['GET'])
 def get_transaction(history_id):
     return history_controller.get_history(history_id)
@@ -113,4 +125,32 @@ def get_by_action(action):
 
 @history_bp.route('/product/<int:product_id>', methods=['GET'])
 def get_by_product_id(product_id):
-    return history_controller.get_by_product_id(product_id)
\ No newline at end of file
+    return history_controller.get_by_product_id(product_id)
+
+# =============================================================================
+# ADMIN ROUTES
+# =============================================================================
+
+@admin_bp.route('/statements', methods=['GET'])
+def get_statements():
+    return admin_controller.get_statements()
+
+@admin_bp.route('/statements', methods=['DELETE'])
+def reset_statements():
+    return admin_controller.reset_statements()
+
+@admin_bp.route('/memory/snapshots', methods=['POST'])
+def take_memory_snapshot():
+    return admin_controller.take_memory_snapshot()
+
+@admin_bp.route('/memory/snapshots', methods=['GET'])
+def list_memory_snapshots():
+    return admin_controller.list_memory_snapshots()
+
+@admin_bp.route('/memory/snapshots/<int:first_id>/diff/<int:second_id>', methods=['GET'])
+def diff_memory_snapshots(first_id, second_id):
+    return admin_controller.diff_memory_snapshots(first_id, second_id)
+
+@admin_bp.route('/memory/snapshots', methods=['DELETE'])
+def clear_memory_snapshots():
+    return admin_controller.clear_memory_snapshots()
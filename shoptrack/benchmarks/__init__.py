@@ -0,0 +1 @@
+"""Performance benchmarks run through the flask CLI (flask bench)"""
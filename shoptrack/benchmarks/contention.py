@@ -0,0 +1,153 @@
+import logging
+import multiprocessing
+import random
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from sqlalchemy import case, create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from ..database import Base
+from ..models import History, Product, User
+from ..services.product_service import ProductService
+
+OPERATIONS = ('add', 'remove', 'set')
+# Operation -> relative weight
+DEFAULT_MIX = {'add': 45, 'remove': 45, 'set': 10}
+INITIAL_STOCK = 1_000_000
+# Spawned processes need a moment to import the app before the clock starts
+PROCESS_STARTUP = 3.0
+
+
+def setup_products(bind, count, initial_stock=INITIAL_STOCK):
+    """Create an owner and count hot products on a database (tables are
+    created if missing, nothing is dropped); returns product id -> stock"""
+    Base.metadata.create_all(bind=bind)
+    Session = sessionmaker(bind=bind)
+    with Session() as session:
+        owner = User(username=f"contention-{uuid.uuid4().hex[:12]}", email=None, password='!')
+        session.add(owner)
+        session.flush()
+        products = [
+            Product(name=f"Hot product {i}", price=1, stock=initial_stock, owner_id=owner.id)
+            for i in range(count)
+        ]
+        session.add_all(products)
+        session.commit()
+        return {product.id: initial_stock for product in products}
+
+
+def _apply(service, operation, product_id, rng, initial_stock):
+    if operation == 'add':
+        return service.add_stock(product_id, rng.randint(1, 5))
+    if operation == 'remove':
+        return service.remove_stock(product_id, rng.randint(1, 5))
+    # Around the starting level, so removes keep succeeding
+    return service.set_stock(product_id, initial_stock + rng.randint(-50, 50))
+
+
+def _worker(url, product_ids, mix, start_at, duration, seed, initial_stock):
+    """Run random stock operations from start_at for duration seconds;
+    returns per-operation counts of commits, rejections and errors"""
+    logging.getLogger(ProductService.__name__).setLevel(logging.CRITICAL)
+    bind = create_engine(url)
+    Session = sessionmaker(bind=bind)
+    rng = random.Random(seed)
+    operations, weights = list(mix), list(mix.values())
+    counts = {operation: {'committed': 0, 'rejected': 0, 'errors': 0} for operation in operations}
+    try:
+        time.sleep(max(0.0, start_at - time.time()))
+        while time.time() < start_at + duration:
+            operation = rng.choices(operations, weights)[0]
+            product_id = rng.choice(product_ids)
+            with Session() as session:
+                try:
+                    _apply(ProductService(session), operation, product_id, rng, initial_stock)
+                    session.commit()
+                    counts[operation]['committed'] += 1
+                except ValueError:
+                    counts[operation]['rejected'] += 1
+                except Exception:
+                    # Lock timeouts, deadlocks and serialization failures
+                    session.rollback()
+                    counts[operation]['errors'] += 1
+    finally:
+        bind.dispose()
+    return counts
+
+
+def check_stock(bind, initial):
+    """Compare each product's stock with its starting level plus the history
+    written since: any drift is an update lost between the two"""
+    buys = func.coalesce(func.sum(case((History.action == 'buy', History.quantity), else_=0)), 0)
+    sells = func.coalesce(func.sum(case((History.action == 'sell', History.quantity), else_=0)), 0)
+    stmt = (
+        select(Product.id, Product.stock, buys, sells)
+        .outerjoin(History, History.product_id == Product.id)
+        .where(Product.id.in_(list(initial)))
+        .group_by(Product.id, Product.stock)
+        .order_by(Product.id)
+    )
+    with bind.connect() as connection:
+        rows = connection.execute(stmt).all()
+    return [
+        {
+            'product_id': product_id,
+            'initial': initial[product_id],
+            'expected': initial[product_id] + bought - sold,
+            'stock': stock,
+            'drift': stock - (initial[product_id] + bought - sold),
+        }
+        for product_id, stock, bought, sold in rows
+    ]
+
+
+def run_contention(url, products=4, workers=8, processes=False, duration=10.0, mix=None, seed=0,
+                   initial_stock=INITIAL_STOCK):
+    """Hammer a few products from workers threads (or processes) and report
+    committed operations per second and the stock invariant"""
+    mix = mix or DEFAULT_MIX
+    bind = create_engine(url)
+    try:
+        initial = setup_products(bind, products, initial_stock)
+    finally:
+        bind.dispose()
+
+    product_ids = list(initial)
+    if processes:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        start_at = time.time() + PROCESS_STARTUP
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='contention')
+        start_at = time.time() + 0.1
+    with pool:
+        futures = [
+            pool.submit(_worker, url, product_ids, mix, start_at, duration, seed + i, initial_stock)
+            for i in range(workers)
+        ]
+        per_worker = [future.result() for future in futures]
+
+    operations = {}
+    for counts in per_worker:
+        for operation, numbers in counts.items():
+            total = operations.setdefault(operation, {'committed': 0, 'rejected': 0, 'errors': 0})
+            for key, value in numbers.items():
+                total[key] += value
+    committed = sum(numbers['committed'] for numbers in operations.values())
+
+    bind = create_engine(url)
+    try:
+        stock = check_stock(bind, initial)
+    finally:
+        bind.dispose()
+    return {
+        'dialect': bind.dialect.name,
+        'workers': workers,
+        'mode': 'processes' if processes else 'threads',
+        'duration_s': duration,
+        'committed': committed,
+        'ops_per_s': round(committed / duration, 1),
+        'operations': operations,
+        'products': stock,
+        'drifted_products': sum(1 for product in stock if product['drift']),
+        'total_drift': sum(abs(product['drift']) for product in stock),
+    }
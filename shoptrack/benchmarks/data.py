@@ -0,0 +1,232 @@
+import os
+import random
+from datetime import date, datetime, timezone
+from sqlalchemy import create_engine, event
+from werkzeug.security import generate_password_hash
+from ..database import Base
+from ..models import History, Product, ProductDailyTx, ProductTxRollup, User, UserDailyTx, UserTxRollup
+from ..repositories.history_repository import TOTAL_COLUMNS
+
+# Bump when the generated data changes so cached databases are rebuilt
+SEED_VERSION = 5
+BENCH_USERS = 10
+BENCH_PASSWORD = 'bench-password'
+BATCH_SIZE = 10000
+YEAR = 365 * 86400
+
+PRODUCT_WORDS = ('Widget', 'Gadget', 'Sprocket', 'Gizmo', 'Bolt', 'Cable', 'Lamp', 'Filter', 'Valve', 'Panel')
+PRODUCT_COLORS = ('Red', 'Blue', 'Green', 'Black', 'Silver', 'Amber')
+
+
+def zipf_weights(count, exponent=1.1):
+    """Relative weights 1/rank^exponent: the first few items get most of the picks"""
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+
+def sqlite_engine(path, bulk_load=False):
+    """Engine for a benchmark database file; bulk_load trades durability for
+    loading speed, which is fine for a file that is rebuilt when lost"""
+    bind = create_engine(f"sqlite:///{path}")
+    if bulk_load:
+        @event.listens_for(bind, 'connect')
+        def _pragmas(connection, record):
+            cursor = connection.cursor()
+            cursor.execute("PRAGMA journal_mode=MEMORY")
+            cursor.execute("PRAGMA synchronous=OFF")
+            cursor.close()
+    return bind
+
+
+def _timestamp_writer(dialect):
+    """Function turning epoch seconds into a created_at value for dialect"""
+    if dialect != 'sqlite':
+        return lambda epoch: datetime.fromtimestamp(epoch, timezone.utc)
+
+    # The rows skip SQLAlchemy, so write the text its DateTime type reads
+    # back; strftime per row would be most of the generation time
+    days = {}
+    times = [f"{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}.000000" for second in range(86400)]
+
+    def timestamp(epoch):
+        day, second = divmod(epoch, 86400)
+        text = days.get(day)
+        if text is None:
+            text = days[day] = datetime.fromtimestamp(day * 86400, timezone.utc).strftime('%Y-%m-%d ')
+        return text + times[second]
+    return timestamp
+
+
+def _day_writer(dialect):
+    """Function turning an epoch day number into a Date value for dialect"""
+    epoch = date(1970, 1, 1).toordinal()
+    if dialect != 'sqlite':
+        return lambda day: date.fromordinal(epoch + day)
+    return lambda day: date.fromordinal(epoch + day).isoformat()
+
+
+def allocate(total, weights):
+    """Split total into integer shares proportional to weights (largest remainder)"""
+    scale = total / sum(weights)
+    shares = [int(weight * scale) for weight in weights]
+    remainders = sorted(range(len(weights)), key=lambda i: weights[i] * scale - shares[i], reverse=True)
+    for i in remainders[:total - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+
+def _bulk_insert(connection, table, columns, rows):
+    """executemany straight on the driver cursor: no per-row SQLAlchemy work"""
+    style = connection.dialect.paramstyle
+    placeholder = '?' if style == 'qmark' else '%s'
+    sql = f"INSERT INTO {connection.dialect.identifier_preparer.format_table(table)} ({', '.join(columns)}) " \
+          f"VALUES ({', '.join([placeholder] * len(columns))})"
+    for start in range(0, len(rows), BATCH_SIZE):
+        connection.exec_driver_sql(sql, rows[start:start + BATCH_SIZE])
+
+
+def seed_database(bind, users, products_per_user, history_per_product, seed=0, skew=1.1, report=None):
+    """Bulk-load users, products and history with Zipf-skewed distributions.
+
+    users * products_per_user products are spread over users by a Zipf curve
+    (user 1 owns the most), and products * history_per_product transactions
+    over products the same way, hot products scattered among the owners.
+    The same arguments and seed always produce the same rows. Each
+    product's stock equals its bought minus sold quantities, and the
+    rollups and daily buckets are totalled as the history is generated.
+    """
+    rng = random.Random(seed)
+    report = report or (lambda message: None)
+    timestamp = _timestamp_writer(bind.dialect.name)
+    day_value = _day_writer(bind.dialect.name)
+    start = int(datetime.now(timezone.utc).timestamp())
+    now = timestamp(start)
+    password = generate_password_hash(BENCH_PASSWORD)
+
+    user_rows = [
+        (i, f'user{i}', f'user{i}@example.com', password, now, now)
+        for i in range(1, users + 1)
+    ]
+
+    owners = []
+    for owner_id, count in zip(range(1, users + 1), allocate(users * products_per_user, zipf_weights(users, skew))):
+        owners.extend([owner_id] * count)
+    product_count = len(owners)
+    # Hot products land on random owners rather than all on user 1
+    product_history = allocate(product_count * history_per_product, zipf_weights(product_count, skew))
+    rng.shuffle(product_history)
+
+    product_rows, history_rows = [], []
+    # Totals rows: buys, sells, bought and sold quantities, spent, earned and
+    # the sum of unit prices, money in cents as the rollup tables keep it
+    product_rollup_rows, product_daily_rows, user_days = [], [], {}
+    choice, uniform, random_float = rng.choice, rng.uniform, rng.random
+    for product_id, owner_id in enumerate(owners, 1):
+        name = f"{choice(PRODUCT_COLORS)} {choice(PRODUCT_WORDS)} {product_id}"
+        price = round(uniform(1, 500), 2)
+        transactions = [
+            [1 + int(random_float() * 20), 'buy' if random_float() < 0.6 else 'sell',
+             start - int(random_float() * YEAR)]
+            for _ in range(product_history[product_id - 1])
+        ]
+        bought = sum(quantity for quantity, action, _ in transactions if action == 'buy')
+        sold = sum(quantity for quantity, action, _ in transactions if action == 'sell')
+        if sold > bought:
+            # Never sell more than was bought: swap the sides
+            for transaction in transactions:
+                transaction[1] = 'sell' if transaction[1] == 'buy' else 'buy'
+            bought, sold = sold, bought
+        product_rows.append((
+            product_id, name, price, bought - sold,
+            f"{choice(PRODUCT_WORDS).lower()} for the {choice(PRODUCT_COLORS).lower()} line",
+            owner_id, now, now,
+        ))
+        cents = round(price * 100)
+        days = {}
+        for quantity, action, epoch in transactions:
+            created = timestamp(epoch)
+            history_rows.append((product_id, name, owner_id, price, quantity, action, created, created))
+            totals = days.get(epoch // 86400)
+            if totals is None:
+                totals = days[epoch // 86400] = [0] * 7
+            if action == 'buy':
+                totals[0] += 1
+                totals[2] += quantity
+                totals[4] += cents * quantity
+            else:
+                totals[1] += 1
+                totals[3] += quantity
+                totals[5] += cents * quantity
+            totals[6] += cents
+        if days:
+            product_rollup_rows.append((product_id, *map(sum, zip(*days.values()))))
+        owner_days = user_days.setdefault(owner_id, {})
+        for day, totals in days.items():
+            product_daily_rows.append((product_id, day_value(day), *totals))
+            owner_totals = owner_days.get(day)
+            if owner_totals is None:
+                owner_days[day] = list(totals)
+            else:
+                owner_days[day] = [a + b for a, b in zip(owner_totals, totals)]
+    user_rollup_rows, user_daily_rows = [], []
+    for user_id, days in user_days.items():
+        if days:
+            user_rollup_rows.append((user_id, *map(sum, zip(*days.values()))))
+        user_daily_rows.extend((user_id, day_value(day), *totals) for day, totals in days.items())
+    report(f"Generated {users} users, {product_count} products and {len(history_rows)} transactions.")
+
+    Base.metadata.create_all(bind)
+    indexes = [index for table in (Product.__table__, History.__table__) for index in table.indexes]
+    with bind.begin() as connection:
+        # Building the indexes once at the end beats updating them row by row
+        for index in indexes:
+            index.drop(connection)
+        _bulk_insert(connection, User.__table__,
+                     ('id', 'username', 'email', 'password', 'created_at', 'updated_at'), user_rows)
+        _bulk_insert(connection, Product.__table__,
+                     ('id', 'name', 'price', 'stock', 'description', 'owner_id', 'created_at', 'updated_at'),
+                     product_rows)
+        _bulk_insert(connection, History.__table__,
+                     ('product_id', 'product_name', 'user_id', 'price', 'quantity', 'action', 'created_at',
+                      'updated_at'),
+                     history_rows)
+        # The rows skip the ORM, which keeps the rollups current otherwise
+        _bulk_insert(connection, UserTxRollup.__table__, ('user_id', *TOTAL_COLUMNS), user_rollup_rows)
+        _bulk_insert(connection, ProductTxRollup.__table__, ('product_id', *TOTAL_COLUMNS), product_rollup_rows)
+        _bulk_insert(connection, UserDailyTx.__table__, ('user_id', 'day', *TOTAL_COLUMNS), user_daily_rows)
+        _bulk_insert(connection, ProductDailyTx.__table__, ('product_id', 'day', *TOTAL_COLUMNS), product_daily_rows)
+        for index in indexes:
+            index.create(connection)
+        if connection.dialect.name == 'postgresql':
+            # Ids were given explicitly; move the sequences past them
+            for table in (User.__table__, Product.__table__):
+                name = connection.dialect.identifier_preparer.format_table(table)
+                connection.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), (SELECT MAX(id) FROM {name}))"
+                )
+    return {'users': users, 'products': product_count, 'history': len(history_rows)}
+
+
+def bench_layout(rows, users=BENCH_USERS):
+    """seed_database arguments giving users users and about rows transactions"""
+    products_per_user = max(1, rows // 500)
+    return users, products_per_user, max(1, rows // (users * products_per_user))
+
+
+def history_database(directory, rows, seed=0, users=BENCH_USERS):
+    """Path to a seeded benchmark database with rows history records,
+    building it on first use and reusing it afterwards"""
+    os.makedirs(directory, exist_ok=True)
+    layout = '' if users == BENCH_USERS else f"-users{users}"
+    path = os.path.join(directory, f"history-{rows}{layout}-seed{seed}-v{SEED_VERSION}.db")
+    if not os.path.exists(path):
+        # Seed under a temporary name so an interrupted run isn't reused
+        partial = path + '.partial'
+        if os.path.exists(partial):
+            os.remove(partial)
+        bind = sqlite_engine(partial, bulk_load=True)
+        try:
+            seed_database(bind, *bench_layout(rows, users), seed=seed)
+        finally:
+            bind.dispose()
+        os.replace(partial, path)
+    return path
@@ -0,0 +1,339 @@
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from .data import PRODUCT_COLORS, PRODUCT_WORDS, zipf_weights
+
+# Relative weights of each operation in the generated traffic
+DEFAULT_MIX = {
+    'login': 5,
+    'list_products': 35,
+    'add_stock': 15,
+    'remove_stock': 10,
+    'create_history': 15,
+    'search': 20,
+}
+LOAD_PASSWORD = 'load-password'
+# Requests the HTTP client may resend after a dropped keep-alive connection
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def parse_mix(value, operations=None):
+    """Parse 'login=5,search=20' into a mix, rejecting unknown operations"""
+    operations = OPERATIONS if operations is None else operations
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in operations:
+            raise ValueError(f"Unknown operation {name!r}; operations are {', '.join(operations)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class WSGIClient:
+    """Drive the app in-process; one test client per thread"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HTTPClient:
+    """Drive a running server over keep-alive HTTP connections, one per thread"""
+
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2):
+            connection = getattr(self._local, 'connection', None)
+            reused = connection is not None
+            if connection is None:
+                connection = self._local.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            sent = False
+            try:
+                connection.request(method, self.prefix + path, body=payload, headers=headers)
+                sent = True
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                connection.close()
+                self._local.connection = None
+                # Likely an idle keep-alive connection the server closed: retry
+                # once on a new one, but never a write that may have reached the
+                # server, which would apply it twice
+                if attempt or not reused or (sent and method not in SAFE_METHODS):
+                    raise
+        try:
+            return response.status, json.loads(data) if data else None
+        except ValueError:
+            return response.status, None
+
+
+class VirtualUser:
+    """A registered user with a token and products to act on"""
+
+    def __init__(self, username, user_id, token, products):
+        self.username = username
+        self.user_id = user_id
+        self.token = token
+        self.products = products
+        self.product_weights = zipf_weights(len(products))
+
+    @property
+    def headers(self):
+        return {'Authorization': f'Bearer {self.token}'}
+
+    def pick_product(self, rng):
+        return rng.choices(self.products, self.product_weights)[0]
+
+
+def _login(client, username):
+    status, body = client.request('POST', '/api/auth/login', {'username': username, 'password': LOAD_PASSWORD})
+    if status != 200:
+        raise RuntimeError(f"Login as {username} failed with {status}: {body}")
+    return body['data']['session_id'], body['data']['user_id']
+
+
+def create_users(client, count, max_products=20, seed=0):
+    """Register count users through the API. Product counts follow a Zipf
+    curve: a few users own many products, most own one or two"""
+    rng = random.Random(seed)
+    run_id = f"{os.getpid()}{int(time.time())}"
+    weights = zipf_weights(count)
+    users = []
+    for rank in range(count):
+        username = f"load{run_id}u{rank}"
+        status, body = client.request('POST', '/api/auth/register', {
+            'username': username, 'password': LOAD_PASSWORD, 'email': f"{username}@example.com",
+        })
+        if status not in (200, 201):
+            raise RuntimeError(f"Registering {username} failed with {status}: {body}")
+        token, user_id = _login(client, username)
+
+        products = []
+        for _ in range(max(1, round(max_products * weights[rank] / weights[0]))):
+            name = f"{rng.choice(PRODUCT_COLORS)} {rng.choice(PRODUCT_WORDS)} {rng.randint(1, 9999)}"
+            status, body = client.request('POST', '/api/products/', {
+                'name': name, 'price': round(rng.uniform(1, 200), 2), 'stock': 1000,
+                'description': f"{rng.choice(PRODUCT_WORDS).lower()} for load testing",
+            }, {'Authorization': f'Bearer {token}'})
+            if status not in (200, 201):
+                raise RuntimeError(f"Creating a product for {username} failed with {status}: {body}")
+            products.append(body['data'])
+        users.append(VirtualUser(username, user_id, token, products))
+    return users
+
+
+def _login_operation(client, user, rng):
+    status, body = client.request('POST', '/api/auth/login', {'username': user.username, 'password': LOAD_PASSWORD})
+    if status == 200:
+        user.token = body['data']['session_id']
+    return status
+
+
+def _list_products(client, user, rng):
+    return client.request('GET', '/api/products/', headers=user.headers)[0]
+
+
+def _add_stock(client, user, rng):
+    product = user.pick_product(rng)
+    return client.request('POST', f"/api/products/{product['id']}/stock/add/{rng.randint(1, 5)}",
+                          headers=user.headers)[0]
+
+
+def _remove_stock(client, user, rng):
+    product = user.pick_product(rng)
+    return client.request('POST', f"/api/products/{product['id']}/stock/remove/{rng.randint(1, 3)}",
+                          headers=user.headers)[0]
+
+
+def _create_history(client, user, rng):
+    product = user.pick_product(rng)
+    return client.request('POST', '/api/history/', {
+        'product_id': product['id'], 'product_name': product['name'], 'price': product['price'],
+        'quantity': rng.randint(1, 10), 'action': 'buy' if rng.random() < 0.6 else 'sell',
+    }, user.headers)[0]
+
+
+def _search(client, user, rng):
+    word = rng.choice(PRODUCT_WORDS + PRODUCT_COLORS).lower()
+    return client.request('GET', f"/api/products/search/{word}", headers=user.headers)[0]
+
+
+OPERATIONS = {
+    'login': _login_operation,
+    'list_products': _list_products,
+    'add_stock': _add_stock,
+    'remove_stock': _remove_stock,
+    'create_history': _create_history,
+    'search': _search,
+}
+
+
+class LoadResult:
+    """Latencies and statuses per operation"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+        self.failures = {}
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, name, latency, status):
+        with self._lock:
+            self.latencies.setdefault(name, []).append(latency)
+            counts = self.statuses.setdefault(name, {})
+            counts[status] = counts.get(status, 0) + 1
+
+    def record_failure(self, name, error):
+        with self._lock:
+            self.failures.setdefault(name, []).append(repr(error))
+
+    def summary(self):
+        """Throughput and latency percentiles per operation and overall"""
+        def describe(latencies, statuses, failures):
+            ordered = sorted(latencies)
+            return {
+                'requests': len(ordered),
+                'throughput_rps': round(len(ordered) / self.elapsed, 2) if self.elapsed else 0.0,
+                'errors': sum(count for status, count in statuses.items() if status >= 500) + failures,
+                'client_errors': sum(count for status, count in statuses.items() if 400 <= status < 500),
+                'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+                'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+                'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+                'max_ms': round(ordered[-1] * 1000, 3) if ordered else 0.0,
+            }
+
+        routes = {
+            name: describe(latencies, self.statuses[name], len(self.failures.get(name, ())))
+            for name, latencies in sorted(self.latencies.items())
+        }
+        overall_statuses = {}
+        for counts in self.statuses.values():
+            for status, count in counts.items():
+                overall_statuses[status] = overall_statuses.get(status, 0) + count
+        everything = [latency for latencies in self.latencies.values() for latency in latencies]
+        failures = sum(len(errors) for errors in self.failures.values())
+        return {
+            'elapsed_s': round(self.elapsed, 3),
+            'routes': routes,
+            'total': describe(everything, overall_statuses, failures),
+        }
+
+
+def run_load(client, users, mix=None, threads=8, duration=30.0, max_requests=None, warmup=0.0, seed=0):
+    """Closed-loop load: each thread picks a user (Zipf-weighted, so a few
+    users are much busier) and an operation from the mix, issues it and
+    goes again until duration runs out"""
+    mix = mix or DEFAULT_MIX
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    user_weights = zipf_weights(len(users))
+    result = LoadResult()
+    issued = iter(range(max_requests)) if max_requests else None
+    issued_lock = threading.Lock()
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                return
+            if issued is not None and now >= measure_from:
+                with issued_lock:
+                    if next(issued, None) is None:
+                        return
+            user = rng.choices(users, user_weights)[0]
+            name = rng.choices(names, weights)[0]
+            began = time.perf_counter()
+            try:
+                status = OPERATIONS[name](client, user, rng)
+            except Exception as e:
+                if began >= measure_from:
+                    result.record_failure(name, e)
+                continue
+            if began >= measure_from:
+                result.record(name, time.perf_counter() - began, status)
+
+    pool = [threading.Thread(target=worker, args=(i,), name=f'load-{i}', daemon=True) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    result.elapsed = time.perf_counter() - max(measure_from, started)
+    return result
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def gunicorn_server(workers, threads, port=None, timeout=30.0):
+    """Run the app under a local gunicorn for the duration of the block,
+    yielding its base URL"""
+    port = port or _free_port()
+    command = [
+        sys.executable, '-m', 'gunicorn', 'app:app', '-c', 'gunicorn.conf.py',
+        '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--threads', str(threads),
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with {process.returncode} before accepting connections")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"gunicorn didn't start listening on port {port} in {timeout:.0f}s")
+                time.sleep(0.1)
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
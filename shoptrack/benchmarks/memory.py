@@ -0,0 +1,200 @@
+"""Peak memory of the list, search and statistics paths as rows grow.
+
+Every (case, rows) pair runs in a fresh interpreter so that what one case
+leaves behind (allocator arenas, caches) doesn't skew the next. Run as a
+module, this file is that child: it measures one case against DATABASE_URL
+and prints JSON.
+"""
+import gc
+import json
+import math
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from .data import history_database
+from .suite import BENCH_USER_ID, SEARCH_QUERY, environment
+
+# One user owns every row, so rows is also rows per user
+MEMORY_USERS = 1
+CHILD_TIMEOUT = 900
+
+# name -> run(client, headers, session) doing one request or call
+CASES = {}
+
+
+def case(name):
+    """Register a memory case under name"""
+    def register(run):
+        CASES[name] = run
+        return run
+    return register
+
+
+def _get(client, path, headers):
+    response = client.get(path, headers=headers)
+    response.get_data()
+    response.close()
+    if response.status_code != 200:
+        raise RuntimeError(f"GET {path} answered {response.status_code}")
+
+
+@case('GET /api/products/')
+def list_products(client, headers, session):
+    _get(client, '/api/products/', headers)
+
+
+@case('GET /api/history/')
+def list_history(client, headers, session):
+    _get(client, '/api/history/', headers)
+
+
+@case('GET /api/products/search/<query>')
+def search_products(client, headers, session):
+    _get(client, f'/api/products/search/{SEARCH_QUERY}', headers)
+
+
+@case('GET /api/history/action/<action>')
+def history_by_action(client, headers, session):
+    # The full, unpaginated dump of one action: what an export would send
+    _get(client, '/api/history/action/buy', headers)
+
+
+@case('HistoryService.get_transaction_statistics')
+def statistics(client, headers, session):
+    from ..services.history_service import HistoryService
+    HistoryService(session).get_transaction_statistics(user_id=BENCH_USER_ID)
+
+
+def _status_kb(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return None
+
+
+def _reset_peak_rss():
+    """Start the peak RSS over from the current RSS (Linux 4.0+); where
+    that isn't possible the peak includes start-up"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _peak_rss_kb():
+    peak = _status_kb('VmHWM')
+    if peak is None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+        peak = peak // 1024 if sys.platform == 'darwin' else peak
+    return peak
+
+
+def measure_here(name):
+    """Measure one case in this process: peak RSS on a first run, then the
+    tracemalloc peak on a second (tracing would inflate the RSS)"""
+    from .. import create_app
+    from ..database import ScopedSession
+    from ..services.session_service import SessionService
+
+    app = create_app('production')
+    run = CASES[name]
+    with app.app_context():
+        session = ScopedSession()
+        token = SessionService(session).create_session(BENCH_USER_ID).id
+        session.commit()
+        headers = {'Authorization': f'Bearer {token}'}
+        client = app.test_client()
+        # Imports, first connection and compiled statements stay out of the numbers
+        _get(client, '/api/auth/validate', headers)
+
+        gc.collect()
+        _reset_peak_rss()
+        rss_before = _status_kb('VmRSS') or 0
+        started = time.perf_counter()
+        run(client, headers, session)
+        duration = time.perf_counter() - started
+        peak_rss = _peak_rss_kb()
+
+        gc.collect()
+        tracemalloc.start()
+        run(client, headers, session)
+        traced_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        ScopedSession.remove()
+    return {
+        'peak_rss_kb': peak_rss,
+        'rss_growth_kb': max(0, peak_rss - rss_before),
+        'traced_peak_kb': round(traced_peak / 1024, 1),
+        'duration_s': round(duration, 4),
+    }
+
+
+def measure_in_child(path, name, timeout=CHILD_TIMEOUT):
+    """measure_here in a fresh interpreter against the database at path; a
+    crash or timeout (e.g. the OOM killer) is reported as an error"""
+    env = dict(
+        os.environ, DATABASE_URL=f"sqlite:///{os.path.abspath(path)}", SCHEMA_CHECK='off',
+        LOG_LEVEL='WARNING', ACCESS_LOG_ENABLED='false', LOG_QUEUE_ENABLED='false',
+        BACKGROUND_PROFILER_ENABLED='false', CAPTURE_ENABLED='false', TRACING_ENABLED='false',
+    )
+    try:
+        child = subprocess.run([sys.executable, '-m', __name__, name], env=env, capture_output=True, text=True,
+                               timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {'error': f"timed out after {timeout}s"}
+    if child.returncode != 0:
+        lines = child.stderr.strip().splitlines()
+        return {'error': lines[-1] if lines else f"exited with status {child.returncode}"}
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+
+def growth_exponent(points):
+    """Slope of log(memory) against log(rows) between the smallest and the
+    largest size: about 1 when memory grows with the rows, about 0 when it
+    is bounded"""
+    points = [(rows, kb) for rows, kb in points if kb]
+    if len(points) < 2 or points[0][0] == points[-1][0]:
+        return None
+    (first_rows, first_kb), (last_rows, last_kb) = points[0], points[-1]
+    return round(math.log(last_kb / first_kb) / math.log(last_rows / first_rows), 2)
+
+
+def run_memory(row_counts, data_dir, names=None, seed=0, report=print):
+    """Measure the chosen cases against a database of each size, smallest
+    first; returns the results and a memory-vs-rows curve per case"""
+    names = list(names or CASES)
+    results = []
+    for rows in sorted(row_counts):
+        report(f"Preparing {rows} history rows...")
+        path = history_database(data_dir, rows, seed, users=MEMORY_USERS)
+        for name in names:
+            result = {'name': name, 'rows': rows, **measure_in_child(path, name)}
+            results.append(result)
+            if 'error' in result:
+                report(f"  {name:<45} failed: {result['error']}")
+                continue
+            report(
+                f"  {name:<45} rss peak {result['peak_rss_kb'] / 1024:>8.1f} MB  "
+                f"growth {result['rss_growth_kb'] / 1024:>8.1f} MB  traced {result['traced_peak_kb'] / 1024:>8.1f} MB"
+            )
+
+    curves = {}
+    for name in names:
+        points = [result for result in results if result['name'] == name]
+        curves[name] = {
+            'rows': [point['rows'] for point in points],
+            'traced_peak_kb': [point.get('traced_peak_kb') for point in points],
+            'rss_growth_kb': [point.get('rss_growth_kb') for point in points],
+            'exponent': growth_exponent([(point['rows'], point.get('traced_peak_kb')) for point in points]),
+        }
+    return {'environment': environment(), 'results': results, 'curves': curves}
+
+
+if __name__ == '__main__':
+    print(json.dumps(measure_here(sys.argv[1])))
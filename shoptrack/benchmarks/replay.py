@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ..observability.capture import SCRUBBED
+from .data import BENCH_PASSWORD
+from .load import percentile
+
+# seed-db names its users user1, user2, ...
+DEFAULT_USERNAME_TEMPLATE = 'user{user_id}'
+
+
+def load_trace(path):
+    """Captured requests from an NDJSON file, oldest first"""
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    records.sort(key=lambda record: record['ts'])
+    return records
+
+
+def route_of(record):
+    return record.get('endpoint') or f"{record['method']} {record['path']}"
+
+
+def login_users(client, trace, username_template=DEFAULT_USERNAME_TEMPLATE, password=BENCH_PASSWORD):
+    """Log in once as the target-instance user standing in for each recorded
+    user; returns user id -> bearer token (None when the login failed)"""
+    tokens = {}
+    for record in trace:
+        user_id = (record.get('auth') or {}).get('user_id')
+        if user_id is None or user_id in tokens:
+            continue
+        status, body = client.request('POST', '/api/auth/login', {
+            'username': username_template.format(user_id=user_id), 'password': password,
+        })
+        tokens[user_id] = body['data']['session_id'] if status == 200 else None
+    return tokens
+
+
+def prepare_request(record, tokens, username_template=DEFAULT_USERNAME_TEMPLATE, password=BENCH_PASSWORD):
+    """(method, path, body, headers) to re-issue a captured request"""
+    path = record['path'] + (f"?{record['query']}" if record.get('query') else '')
+    auth = record.get('auth') or {}
+    user_id = auth.get('user_id')
+    body = record.get('body')
+    if isinstance(body, dict):
+        body = {key: password if value == SCRUBBED else value for key, value in body.items()}
+        if 'username' in body and user_id is not None:
+            body['username'] = username_template.format(user_id=user_id)
+
+    headers = {}
+    if auth:
+        token = tokens.get(user_id)
+        # A request that had a token which didn't resolve stays unauthenticated
+        headers['Authorization'] = f"Bearer {token if token is not None else 0}"
+    return record['method'], path, body, headers
+
+
+def replay(client, trace, tokens, speed=1.0, threads=16, username_template=DEFAULT_USERNAME_TEMPLATE,
+           password=BENCH_PASSWORD):
+    """Re-issue the trace, open loop: each request is sent at its recorded
+    offset divided by speed (speed 0 sends them as fast as the threads
+    allow). Returns (route, latency seconds, status) per request."""
+    results = []
+    lock = threading.Lock()
+
+    def send(record):
+        method, path, body, headers = prepare_request(record, tokens, username_template, password)
+        started = time.perf_counter()
+        try:
+            status = client.request(method, path, body, headers)[0]
+        except Exception:
+            status = None
+        latency = time.perf_counter() - started
+        with lock:
+            results.append((route_of(record), latency, status))
+
+    if not trace:
+        return results
+    first = trace[0]['ts']
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='replay') as pool:
+        for record in trace:
+            if speed > 0:
+                delay = (record['ts'] - first) / speed - (time.perf_counter() - began)
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(send, record)
+    return results
+
+
+def ks_statistic(first, second):
+    """Two-sample Kolmogorov-Smirnov distance between two sorted samples:
+    0 for identical distributions, 1 for ones that don't overlap"""
+    i = j = 0
+    distance = 0.0
+    while i < len(first) and j < len(second):
+        value = min(first[i], second[j])
+        while i < len(first) and first[i] == value:
+            i += 1
+        while j < len(second) and second[j] == value:
+            j += 1
+        distance = max(distance, abs(i / len(first) - j / len(second)))
+    return distance
+
+
+def compare_latencies(trace, results):
+    """Recorded vs replayed latency percentiles per route"""
+    recorded, replayed, statuses = {}, {}, {}
+    for record in trace:
+        recorded.setdefault(route_of(record), []).append(record['duration_ms'] / 1000)
+    for route, latency, status in results:
+        replayed.setdefault(route, []).append(latency)
+        counts = statuses.setdefault(route, {'errors': 0})
+        if status is None or status >= 500:
+            counts['errors'] += 1
+
+    comparison = {}
+    for route in sorted(recorded):
+        before = sorted(recorded[route])
+        after = sorted(replayed.get(route, ()))
+        entry = {'recorded': len(before), 'replayed': len(after), 'errors': statuses.get(route, {}).get('errors', 0)}
+        for name, fraction in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99)):
+            entry[f'recorded_{name}_ms'] = round(percentile(before, fraction) * 1000, 3)
+            entry[f'replayed_{name}_ms'] = round(percentile(after, fraction) * 1000, 3)
+        entry['ks'] = round(ks_statistic(before, after), 3) if after else None
+        comparison[route] = entry
+    return comparison
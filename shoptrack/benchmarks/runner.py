@@ -0,0 +1,103 @@
+import gc
+import math
+import statistics
+import time
+
+# Noise floor: changes smaller than this share of the baseline are ignored
+DEFAULT_THRESHOLD = 0.10
+
+
+class Timing:
+    """Per-call timings of one benchmark case, one value per round"""
+
+    def __init__(self, name, rows, loops, rounds):
+        self.name = name
+        self.rows = rows
+        self.loops = loops
+        self.rounds = rounds
+
+    @property
+    def median(self):
+        return statistics.median(self.rounds)
+
+    @property
+    def iqr(self):
+        if len(self.rounds) < 2:
+            return 0.0
+        q1, _, q3 = statistics.quantiles(self.rounds, n=4)
+        return q3 - q1
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'rows': self.rows,
+            'loops': self.loops,
+            'rounds': len(self.rounds),
+            'min_s': min(self.rounds),
+            'median_s': self.median,
+            'mean_s': statistics.fmean(self.rounds),
+            'stdev_s': statistics.stdev(self.rounds) if len(self.rounds) > 1 else 0.0,
+            'iqr_s': self.iqr,
+        }
+
+
+def _timed_round(func, loops):
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        return (time.perf_counter() - started) / loops
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def measure(func, name, rows=None, repeat=7, min_round_time=0.2, max_time=60.0):
+    """Time func the way timeit does: one warm-up call, enough loops per
+    round to last min_round_time, then repeat rounds (at least three, fewer
+    than repeat when the case would run past max_time)"""
+    started = time.perf_counter()
+    func()
+    first = time.perf_counter() - started
+    loops = max(1, math.ceil(min_round_time / first)) if first > 0 else 1000
+
+    rounds = []
+    deadline = time.perf_counter() + max_time
+    while len(rounds) < repeat and (len(rounds) < 3 or time.perf_counter() < deadline):
+        rounds.append(_timed_round(func, loops))
+    return Timing(name, rows, loops, rounds)
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Match results against a baseline run by case and row count.
+
+    A case regresses when its median grows by more than threshold and by
+    more than the spread (IQR) of the two runs, so noisy cases need a
+    bigger change before they are flagged.
+    """
+    previous = {(entry['name'], entry['rows']): entry for entry in baseline}
+    comparisons = []
+    for entry in results:
+        before = previous.get((entry['name'], entry['rows']))
+        if before is None:
+            comparisons.append({'name': entry['name'], 'rows': entry['rows'], 'status': 'new'})
+            continue
+        change = entry['median_s'] / before['median_s'] - 1
+        noise = entry['iqr_s'] + before['iqr_s']
+        significant = abs(change) > threshold and abs(entry['median_s'] - before['median_s']) > noise
+        if significant:
+            status = 'regression' if change > 0 else 'improvement'
+        else:
+            status = 'same'
+        comparisons.append({
+            'name': entry['name'],
+            'rows': entry['rows'],
+            'status': status,
+            'baseline_s': before['median_s'],
+            'median_s': entry['median_s'],
+            'change': change,
+        })
+    return comparisons
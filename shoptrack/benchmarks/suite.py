@@ -0,0 +1,107 @@
+import platform
+import sqlalchemy
+from datetime import datetime, timezone
+from sqlalchemy.orm import sessionmaker
+from ..models import History
+from ..repositories.history_repository import HistoryRepository
+from ..services.auth_service import AuthService
+from ..services.history_service import HistoryService
+from ..services.product_service import ProductService
+from .data import BENCH_PASSWORD, history_database, sqlite_engine
+from .runner import measure
+
+# The busiest seeded user
+BENCH_USER_ID = 1
+SEARCH_QUERY = 'widget'
+
+# name -> setup(session, Session) returning the callable to time
+CASES = {}
+
+
+def case(name):
+    """Register a benchmark case under name"""
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+@case('HistoryRepository.find_by_user')
+def find_by_user(session, Session):
+    def run():
+        with Session() as fresh:
+            HistoryRepository(fresh).find_by_user(BENCH_USER_ID)
+    return run
+
+
+@case('HistoryRepository.get_user_transaction_summary')
+def repository_summary(session, Session):
+    def run():
+        with Session() as fresh:
+            HistoryRepository(fresh).get_user_transaction_summary(BENCH_USER_ID)
+    return run
+
+
+@case('HistoryService.get_transaction_statistics')
+def service_statistics(session, Session):
+    def run():
+        with Session() as fresh:
+            HistoryService(fresh).get_transaction_statistics(user_id=BENCH_USER_ID)
+    return run
+
+
+@case('ProductService.search_products')
+def search_products(session, Session):
+    def run():
+        with Session() as fresh:
+            ProductService(fresh).search_products(SEARCH_QUERY, owner_id=BENCH_USER_ID)
+    return run
+
+
+@case('History.to_dict_list')
+def to_dict_list(session, Session):
+    # Serialization only: the rows are loaded once, outside the timing
+    rows = HistoryRepository(session).find_by_user(BENCH_USER_ID)
+    return lambda: History.to_dict_list(rows, coerce=True)
+
+
+@case('AuthService.authenticate_user')
+def login(session, Session):
+    def run():
+        with Session() as fresh:
+            AuthService(fresh).authenticate_user(f'user{BENCH_USER_ID}', BENCH_PASSWORD)
+    return run
+
+
+def environment():
+    """What the numbers were measured on, stored next to them"""
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'sqlalchemy': sqlalchemy.__version__,
+    }
+
+
+def run_suite(row_counts, data_dir, names=None, repeat=7, max_time=60.0, seed=0, report=print):
+    """Run the chosen cases against a database of each size, smallest first"""
+    results = []
+    for rows in sorted(row_counts):
+        report(f"Preparing {rows} history rows...")
+        bind = sqlite_engine(history_database(data_dir, rows, seed))
+        Session = sessionmaker(bind=bind)
+        try:
+            for name in names or CASES:
+                with Session() as session:
+                    timing = measure(CASES[name](session, Session), name, rows, repeat=repeat, max_time=max_time)
+                result = timing.to_dict()
+                results.append(result)
+                report(
+                    f"  {name:<50} median {result['median_s'] * 1000:>10.3f} ms  "
+                    f"iqr {result['iqr_s'] * 1000:>8.3f} ms  ({result['rounds']} x {result['loops']})"
+                )
+        finally:
+            bind.dispose()
+    return {'environment': environment(), 'results': results}
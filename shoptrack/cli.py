@@ -1,12 +1,28 @@
+import json
+import re
 import click
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+from flask import current_app
 from flask.cli import with_appcontext
-from .database import engine, Base
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from .database import engine, Base, SessionLocal, get_alembic_config, get_current_revision, get_head_revision
+
+def _stamp_head(connection=None):
+    """Mark the database (the app's, or the one connection is on) as being at the newest migration"""
+    from alembic import command
+    alembic_config = get_alembic_config()
+    if connection is not None:
+        alembic_config.attributes['connection'] = connection
+    command.stamp(alembic_config, 'head', purge=True)
 
 @click.command()
 @with_appcontext
 def init_db():
-    """Clear the existing data and create new tables."""
+    """Create the tables and stamp them with the newest migration."""
     Base.metadata.create_all(bind=engine)
+    _stamp_head()
     click.echo('Initialized the database.')
 
 @click.command()
@@ -14,5 +30,432 @@ def init_db():
 def reset_db():
     """Drop all tables and create new ones."""
     Base.metadata.drop_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
     Base.metadata.create_all(bind=engine)
-    click.echo('Reset the database.')
\ No newline at end of file
+    _stamp_head()
+    click.echo('Reset the database.')
+
+@click.command('rebuild-rollups')
+@with_appcontext
+def rebuild_rollups():
+    """Recompute the per-user and per-product transaction rollups and daily buckets from history."""
+    from .repositories.history_repository import HistoryRepository
+
+    with SessionLocal() as session:
+        counts = HistoryRepository(session).rebuild_rollups()
+        session.commit()
+    click.echo(
+        f"Rebuilt {counts['user_tx_rollup']} user and {counts['product_tx_rollup']} product rollups, "
+        f"{counts['user_daily_tx']} user and {counts['product_daily_tx']} product daily buckets."
+    )
+
+@click.group()
+def db():
+    """Database migration commands."""
+
+# Postgres duration: a number, optionally followed by a unit
+LOCK_TIMEOUT_PATTERN = re.compile(r'\d+(\.\d+)?\s*(us|ms|s|min|h|d)?')
+
+def _pending_steps(script, upper, lower):
+    """Count the migration steps between two revisions, None if unknown"""
+    try:
+        return len(list(script.iterate_revisions(upper, lower or 'base')))
+    except Exception:
+        return None
+
+def _run_migrations(direction, revision, lock_timeout):
+    """Run upgrade/downgrade on one connection, reporting progress and lock waits"""
+    from alembic import command
+    from alembic.script import ScriptDirectory
+    from .utils.migration_utils import LockMonitor, MigrationProgress
+
+    if not LOCK_TIMEOUT_PATTERN.fullmatch(str(lock_timeout)):
+        raise click.ClickException(f"Invalid lock timeout {lock_timeout!r}, expected a number with a unit such as '5s'.")
+    alembic_config = get_alembic_config()
+    script = ScriptDirectory.from_config(alembic_config)
+    current = get_current_revision()
+    if direction == 'upgrade':
+        total = _pending_steps(script, revision, current)
+    else:
+        total = _pending_steps(script, current, revision) if current else 0
+    if total == 0:
+        click.echo(f"Nothing to do, database is at {current}.")
+        return
+
+    click.echo(f"{direction.capitalize()} from {current} to {revision}: {total or 'unknown number of'} step(s).")
+    alembic_config.attributes['on_version_apply'] = (MigrationProgress(total, click.echo),)
+
+    monitor = None
+    with engine.connect() as connection:
+        if connection.dialect.name == 'postgresql':
+            connection.execute(text("SELECT set_config('lock_timeout', :value, false)"), {'value': lock_timeout})
+            backend_pid = connection.exec_driver_sql("SELECT pg_backend_pid()").scalar()
+            monitor = LockMonitor(engine, backend_pid, report=lambda message: click.echo(f"  {message}")).start()
+        connection.commit()
+
+        alembic_config.attributes['connection'] = connection
+        try:
+            getattr(command, direction)(alembic_config, revision)
+            connection.commit()
+        except SQLAlchemyError as e:
+            if 'lock timeout' in str(e):
+                raise click.ClickException(
+                    f"Gave up waiting for a lock after {lock_timeout}; "
+                    f"applied steps were kept, re-run to continue."
+                )
+            raise click.ClickException(f"Migration failed: {e}")
+        finally:
+            if monitor:
+                monitor.stop()
+                click.echo(f"Lock waits observed: {monitor.lock_waits}")
+
+    click.echo(f"Database is at {get_current_revision()}.")
+
+@db.command()
+@click.argument('revision', default='head')
+@click.option('--lock-timeout', default=None, help="Postgres lock_timeout for each statement, e.g. '5s'.")
+@click.option('--sql', is_flag=True, help="Print the SQL instead of running it.")
+@with_appcontext
+def upgrade(revision, lock_timeout, sql):
+    """Apply migrations up to REVISION."""
+    if sql:
+        from alembic import command
+        command.upgrade(get_alembic_config(), revision, sql=True)
+        return
+    _run_migrations('upgrade', revision, lock_timeout or current_app.config['MIGRATION_LOCK_TIMEOUT'])
+
+@db.command()
+@click.argument('revision', default='-1')
+@click.option('--lock-timeout', default=None, help="Postgres lock_timeout for each statement, e.g. '5s'.")
+@with_appcontext
+def downgrade(revision, lock_timeout):
+    """Revert migrations down to REVISION."""
+    _run_migrations('downgrade', revision, lock_timeout or current_app.config['MIGRATION_LOCK_TIMEOUT'])
+
+@db.command()
+@with_appcontext
+def current():
+    """Show the current and newest migration revisions."""
+    click.echo(f"Current: {get_current_revision()}")
+    click.echo(f"Head: {get_head_revision()}")
+
+@click.command()
+@click.option('--url', default='http://localhost:5000', help="Base URL of the running server.")
+@click.option('--sort', type=click.Choice(['total', 'mean', 'p95', 'calls', 'rows']), default='total')
+@click.option('--limit', default=20, help="Number of statements to show.")
+@with_appcontext
+def statements(url, sort, limit):
+    """Show a running server's statement statistics, heaviest first."""
+    token = current_app.config['ADMIN_TOKEN']
+    if not token:
+        raise click.ClickException("ADMIN_TOKEN must be set to read statement statistics.")
+
+    request = Request(
+        f"{url.rstrip('/')}/api/admin/statements?sort={sort}&limit={limit}",
+        headers={'X-Admin-Token': token}
+    )
+    try:
+        with urlopen(request, timeout=10) as response:
+            payload = json.load(response)
+    except (URLError, ValueError) as e:
+        raise click.ClickException(f"Could not fetch statement statistics: {e}")
+
+    data = payload['data']
+    click.echo(f"Worker {data['pid']}, sorted by {sort}:")
+    click.echo(f"{'calls':>8} {'total ms':>10} {'mean ms':>9} {'p95 ms':>9} {'rows':>8}  repository method / statement")
+    for entry in data['statements']:
+        click.echo(
+            f"{entry['calls']:>8} {entry['total_ms']:>10.1f} {entry['mean_ms']:>9.2f} "
+            f"{entry['p95_ms']:>9.2f} {entry['rows']:>8}  {entry['repository_method']}"
+        )
+        click.echo(f"{'':>48}{entry['fingerprint'][:120]}")
+
+def _bench_memory(row_counts, names, seed, data_dir, output):
+    from .benchmarks.memory import CASES, run_memory
+
+    selected = [name for name in CASES if not names or any(part in name for part in names)]
+    if not selected:
+        raise click.ClickException(f"No case matches {', '.join(names)}; cases are: {', '.join(CASES)}")
+
+    document = run_memory(row_counts, data_dir, selected, seed=seed, report=click.echo)
+    with open(output, 'w') as f:
+        json.dump(document, f, indent=2)
+
+    click.echo("Traced peak (MB) by history rows; exponent ~1 grows with the rows, ~0 is bounded:")
+    sizes = sorted(row_counts)
+    click.echo(f"  {'case':<45}" + ''.join(f"{rows:>10}" for rows in sizes) + f"{'exponent':>10}")
+    for name, curve in document['curves'].items():
+        cells = ''.join('failed'.rjust(10) if kb is None else f"{kb / 1024:>10.1f}" for kb in curve['traced_peak_kb'])
+        exponent = '' if curve['exponent'] is None else f"{curve['exponent']:.2f}"
+        click.echo(f"  {name:<45}{cells}{exponent:>10}")
+    click.echo(f"Wrote {len(document['results'])} results to {output}.")
+
+@click.command()
+@click.option('--rows', 'row_counts', multiple=True, type=int,
+              help="History rows in the benchmark database; repeat for several sizes "
+                   "[default: 10000, 100000 and 1000000; with --memory also 1000].")
+@click.option('--case', 'names', multiple=True, help="Only run cases whose name contains this; repeatable.")
+@click.option('--memory', is_flag=True,
+              help="Measure peak RSS and tracemalloc peak of the list, search and statistics paths instead of time.")
+@click.option('--repeat', default=7, show_default=True, help="Timed rounds per case.")
+@click.option('--max-time', default=60.0, show_default=True, help="Seconds after which a case stops at three rounds.")
+@click.option('--seed', default=0, show_default=True, help="Random seed for the generated data.")
+@click.option('--data-dir', default='bench-data', show_default=True, help="Where seeded databases are cached.")
+@click.option('--output', default=None,
+              help="Where to write the results [default: bench-results.json, or bench-memory.json with --memory].")
+@click.option('--compare', 'baseline_path', type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Results file of an earlier run to diff against; regressions fail the command.")
+@click.option('--threshold', default=0.10, show_default=True, help="Relative slowdown treated as a regression.")
+@with_appcontext
+def bench(row_counts, names, memory, repeat, max_time, seed, data_dir, output, baseline_path, threshold):
+    """Time repository, service and serialization hot paths on seeded databases."""
+    from .benchmarks.runner import compare
+    from .benchmarks.suite import CASES, run_suite
+
+    if memory:
+        if baseline_path:
+            raise click.UsageError("--compare only applies to timings, not to --memory.")
+        return _bench_memory(row_counts or (1000, 10000, 100000, 1000000), names, seed, data_dir,
+                             output or 'bench-memory.json')
+    row_counts = row_counts or (10000, 100000, 1000000)
+    output = output or 'bench-results.json'
+
+    selected = [name for name in CASES if not names or any(part in name for part in names)]
+    if not selected:
+        raise click.ClickException(f"No case matches {', '.join(names)}; cases are: {', '.join(CASES)}")
+
+    document = run_suite(row_counts, data_dir, selected, repeat=repeat, max_time=max_time, seed=seed,
+                         report=click.echo)
+    with open(output, 'w') as f:
+        json.dump(document, f, indent=2)
+    click.echo(f"Wrote {len(document['results'])} results to {output}.")
+
+    if baseline_path is None:
+        return
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+    comparisons = compare(document['results'], baseline, threshold)
+    click.echo(f"Compared with {baseline_path} (threshold {threshold:.0%}):")
+    for entry in comparisons:
+        if entry['status'] == 'new':
+            click.echo(f"  {'new':<12} {entry['name']} @ {entry['rows']}")
+            continue
+        click.echo(
+            f"  {entry['status']:<12} {entry['name']} @ {entry['rows']}: "
+            f"{entry['baseline_s'] * 1000:.3f} -> {entry['median_s'] * 1000:.3f} ms ({entry['change']:+.1%})"
+        )
+    regressions = [entry for entry in comparisons if entry['status'] == 'regression']
+    if regressions:
+        raise click.ClickException(f"{len(regressions)} case(s) regressed.")
+
+@click.command()
+@click.option('--url', default=None, help="Base URL of a running server; omit to drive the app in-process.")
+@click.option('--gunicorn', 'gunicorn_workers', type=int, default=None,
+              help="Start a local gunicorn with this many workers and drive it.")
+@click.option('--gunicorn-threads', default=1, show_default=True, help="Threads per gunicorn worker.")
+@click.option('--users', default=20, show_default=True, help="Virtual users to register before the run.")
+@click.option('--threads', default=8, show_default=True, help="Concurrent client threads.")
+@click.option('--duration', default=30.0, show_default=True, help="Seconds of measured load.")
+@click.option('--requests', 'max_requests', type=int, default=None, help="Stop after this many measured requests.")
+@click.option('--warmup', default=2.0, show_default=True, help="Seconds of unmeasured load first.")
+@click.option('--mix', default=None, help="Operation weights, e.g. 'list_products=40,search=20,add_stock=10'.")
+@click.option('--seed', default=0, show_default=True, help="Random seed for users, products and traffic.")
+@click.option('--output', default=None, help="Also write the report as JSON to this file.")
+@with_appcontext
+def loadtest(url, gunicorn_workers, gunicorn_threads, users, threads, duration, max_requests, warmup, mix, seed,
+             output):
+    """Generate a realistic traffic mix and report throughput and latency per route."""
+    from contextlib import nullcontext
+    from .benchmarks.load import DEFAULT_MIX, HTTPClient, WSGIClient, create_users, gunicorn_server, parse_mix, run_load
+
+    try:
+        mix = parse_mix(mix) if mix else DEFAULT_MIX
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--mix')
+    if url and gunicorn_workers:
+        raise click.UsageError("Use either --url or --gunicorn, not both.")
+
+    server = gunicorn_server(gunicorn_workers, gunicorn_threads) if gunicorn_workers else nullcontext(url)
+    with server as base_url:
+        client = HTTPClient(base_url) if base_url else WSGIClient(current_app._get_current_object())
+        target = base_url or 'the app in-process'
+        click.echo(f"Registering {users} users against {target}...")
+        try:
+            virtual_users = create_users(client, users, seed=seed)
+        except (RuntimeError, OSError) as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Running {threads} threads for {duration:.0f}s after {warmup:.0f}s of warm-up...")
+        result = run_load(client, virtual_users, mix, threads=threads, duration=duration,
+                          max_requests=max_requests, warmup=warmup, seed=seed)
+    report = result.summary()
+
+    for name, errors in sorted(result.failures.items()):
+        click.echo(f"{name}: {len(errors)} request(s) raised, first: {errors[0]}")
+
+    click.echo(f"{'route':<16} {'requests':>9} {'req/s':>9} {'errors':>7} {'4xx':>6} "
+               f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, stats in list(report['routes'].items()) + [('TOTAL', report['total'])]:
+        click.echo(
+            f"{name:<16} {stats['requests']:>9} {stats['throughput_rps']:>9.1f} {stats['errors']:>7} "
+            f"{stats['client_errors']:>6} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+            f"{stats['p99_ms']:>9.2f} {stats['max_ms']:>9.2f}"
+        )
+    if output:
+        with open(output, 'w') as f:
+            json.dump({'threads': threads, 'users': users, 'mix': mix, **report}, f, indent=2)
+        click.echo(f"Wrote the report to {output}.")
+
+@click.command()
+@click.option('--database', default=None,
+              help="Database URL to run against, e.g. postgresql://localhost/shoptrack_bench "
+                   "(default: a fresh SQLite file in bench-data/).")
+@click.option('--products', default=4, show_default=True, help="Hot products the workers share.")
+@click.option('--workers', default=8, show_default=True, help="Concurrent workers.")
+@click.option('--processes', is_flag=True, help="Run the workers as processes instead of threads.")
+@click.option('--duration', default=10.0, show_default=True, help="Seconds of load.")
+@click.option('--mix', default=None, help="Operation weights, e.g. 'add=45,remove=45,set=10'.")
+@click.option('--seed', default=0, show_default=True, help="Random seed for the operations.")
+@click.option('--output', default=None, help="Also write the report as JSON to this file.")
+@with_appcontext
+def contention(database, products, workers, processes, duration, mix, seed, output):
+    """Hammer a few products' stock concurrently and check no update was lost."""
+    import os
+    from .benchmarks.contention import DEFAULT_MIX, OPERATIONS, run_contention
+    from .benchmarks.load import parse_mix
+
+    try:
+        mix = parse_mix(mix, OPERATIONS) if mix else DEFAULT_MIX
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--mix')
+    if database is None:
+        os.makedirs('bench-data', exist_ok=True)
+        path = os.path.join('bench-data', 'contention.db')
+        if os.path.exists(path):
+            os.remove(path)
+        database = f"sqlite:///{path}"
+
+    mode = 'processes' if processes else 'threads'
+    click.echo(f"Running {workers} {mode} on {products} products for {duration:.0f}s...")
+    report = run_contention(database, products=products, workers=workers, processes=processes,
+                            duration=duration, mix=mix, seed=seed)
+
+    click.echo(f"{'operation':<10} {'committed':>10} {'ops/s':>9} {'rejected':>9} {'errors':>7}")
+    for name, counts in report['operations'].items():
+        click.echo(f"{name:<10} {counts['committed']:>10} {counts['committed'] / duration:>9.1f} "
+                   f"{counts['rejected']:>9} {counts['errors']:>7}")
+    click.echo(f"{'TOTAL':<10} {report['committed']:>10} {report['ops_per_s']:>9.1f}")
+    click.echo(f"{'product':>8} {'expected':>12} {'stock':>12} {'drift':>8}")
+    for product in report['products']:
+        click.echo(f"{product['product_id']:>8} {product['expected']:>12} {product['stock']:>12} "
+                   f"{product['drift']:>+8}")
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        click.echo(f"Wrote the report to {output}.")
+    if report['drifted_products']:
+        raise click.ClickException(
+            f"Lost updates: stock drifted from its history on {report['drifted_products']} product(s), "
+            f"{report['total_drift']} units in total."
+        )
+
+@click.command('seed-db')
+@click.option('--users', default=100, show_default=True, help="Users to create.")
+@click.option('--products-per-user', default=20, show_default=True, help="Average products per user.")
+@click.option('--history-per-product', default=50, show_default=True, help="Average transactions per product.")
+@click.option('--skew', default=1.1, show_default=True, help="Zipf exponent; 0 spreads rows evenly.")
+@click.option('--seed', default=0, show_default=True, help="Random seed; the same seed gives the same rows.")
+@click.option('--snapshot', default=None, type=click.Path(dir_okay=False),
+              help="Write a new SQLite file here instead of filling the app database.")
+@click.option('--reset', is_flag=True, help="Drop and recreate the app database's tables first.")
+@with_appcontext
+def seed_db(users, products_per_user, history_per_product, skew, seed, snapshot, reset):
+    """Bulk-load users, products and history with skewed, repeatable data."""
+    import os
+    import time
+    from sqlalchemy import inspect, select, func
+    from .benchmarks.data import seed_database, sqlite_engine
+    from .models import User
+
+    started = time.perf_counter()
+    if snapshot:
+        # Built under a temporary name so a failed run leaves no half-filled snapshot
+        partial = f"{snapshot}.partial"
+        if os.path.exists(partial):
+            os.remove(partial)
+        target = sqlite_engine(partial, bulk_load=True)
+    else:
+        target = engine
+        if reset:
+            Base.metadata.drop_all(bind=engine)
+            with engine.begin() as connection:
+                connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+        elif inspect(engine).has_table(User.__tablename__):
+            with engine.connect() as connection:
+                if connection.execute(select(func.count()).select_from(User.__table__)).scalar():
+                    raise click.ClickException("The database already has users; pass --reset to replace them.")
+
+    try:
+        counts = seed_database(target, users, products_per_user, history_per_product, seed=seed, skew=skew,
+                               report=click.echo)
+        with target.begin() as connection:
+            _stamp_head(connection)
+    finally:
+        if snapshot:
+            target.dispose()
+    if snapshot:
+        os.replace(partial, snapshot)
+
+    where = snapshot or 'the database'
+    click.echo(
+        f"Loaded {counts['users']} users, {counts['products']} products and {counts['history']} "
+        f"transactions into {where} in {time.perf_counter() - started:.1f}s."
+    )
+
+@click.command()
+@click.argument('trace', type=click.Path(exists=True, dir_okay=False))
+@click.option('--url', default=None, help="Base URL of the instance to replay against; omit to use the app in-process.")
+@click.option('--speed', default=1.0, show_default=True,
+              help="Pace relative to the recording: 2 replays twice as fast, 0 as fast as possible.")
+@click.option('--threads', default=16, show_default=True, help="Requests allowed in flight at once.")
+@click.option('--username-template', default='user{user_id}', show_default=True,
+              help="Target-instance username standing in for each recorded user id.")
+@click.option('--password', default=None, help="Password of those users (default: the seed-db password).")
+@click.option('--output', default=None, help="Also write the comparison as JSON to this file.")
+@with_appcontext
+def replay(trace, url, speed, threads, username_template, password, output):
+    """Re-issue a captured request trace and compare latencies with the recording."""
+    from .benchmarks.data import BENCH_PASSWORD
+    from .benchmarks.load import HTTPClient, WSGIClient
+    from .benchmarks.replay import compare_latencies, load_trace, login_users, replay as replay_trace
+
+    records = load_trace(trace)
+    if not records:
+        raise click.ClickException(f"{trace} holds no requests.")
+    password = password or BENCH_PASSWORD
+    client = HTTPClient(url) if url else WSGIClient(current_app._get_current_object())
+
+    tokens = login_users(client, records, username_template, password)
+    missing = [user_id for user_id, token in tokens.items() if token is None]
+    if missing:
+        click.echo(f"Could not log in as {len(missing)} of {len(tokens)} recorded users; "
+                   f"their requests will be unauthenticated.")
+    span = records[-1]['ts'] - records[0]['ts']
+    pace = f"{span / speed:.0f}s at {speed}x" if speed > 0 else "as fast as possible"
+    click.echo(f"Replaying {len(records)} requests recorded over {span:.0f}s, {pace}...")
+    results = replay_trace(client, records, tokens, speed, threads, username_template, password)
+
+    comparison = compare_latencies(records, results)
+    click.echo(f"{'route':<32} {'count':>6} {'errors':>6} {'p50 ms (rec/replay)':>22} "
+               f"{'p95 ms (rec/replay)':>22} {'p99 ms (rec/replay)':>22} {'KS':>5}")
+    for route, entry in comparison.items():
+        columns = ' '.join(
+            f"{entry[f'recorded_{name}_ms']:>10.2f}/{entry[f'replayed_{name}_ms']:<11.2f}"
+            for name in ('p50', 'p95', 'p99')
+        )
+        ks = '-' if entry['ks'] is None else f"{entry['ks']:.2f}"
+        click.echo(f"{route:<32} {entry['replayed']:>6} {entry['errors']:>6} {columns} {ks:>5}")
+    if output:
+        with open(output, 'w') as f:
+            json.dump({'trace': trace, 'speed': speed, 'routes': comparison}, f, indent=2)
+        click.echo(f"Wrote the comparison to {output}.")
@@ -0,0 +1,111 @@
+import zlib
+from flask import request
+from werkzeug.wsgi import ClosingIterator
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Each factory returns (compress, flush, finish): flush emits everything
+# compressed so far without ending the stream
+
+def _gzip_compressor(level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+def _brotli_compressor(level):
+    compressor = brotli.Compressor(quality=level)
+    return compressor.process, compressor.flush, compressor.finish
+
+
+def _zstd_compressor(level):
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    return (compressor.compress, lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            compressor.flush)
+
+
+def available_encodings():
+    """Encodings this process can produce, in server preference order"""
+    encodings = []
+    if zstandard is not None:
+        encodings.append('zstd')
+    if brotli is not None:
+        encodings.append('br')
+    encodings.append('gzip')
+    return encodings
+
+
+_COMPRESSORS = {
+    'gzip': _gzip_compressor,
+    'br': _brotli_compressor,
+    'zstd': _zstd_compressor,
+}
+
+
+def compress(data, encoding, level):
+    """Compress a whole body in one go"""
+    compress_chunk, _, finish = _COMPRESSORS[encoding](level)
+    return compress_chunk(data) + finish()
+
+
+def compress_stream(chunks, encoding, level):
+    """Compress a streamed body chunk by chunk, flushing after each one so
+    the client gets every chunk as soon as the app yields it"""
+    compress_chunk, flush, finish = _COMPRESSORS[encoding](level)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        compressed = compress_chunk(chunk) + flush()
+        if compressed:
+            yield compressed
+    yield finish()
+
+
+def init_app(app):
+    if not app.config['COMPRESS_ENABLED']:
+        return
+
+    encodings = available_encodings()
+    mimetypes = frozenset(app.config['COMPRESS_MIMETYPES'])
+    min_size = app.config['COMPRESS_MIN_SIZE']
+    levels = app.config['COMPRESS_LEVELS']
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.mimetype not in mimetypes
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.direct_passthrough
+        ):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(encodings)
+        if not encoding:
+            return response
+
+        if response.is_streamed:
+            # Keep the body's close(): a streamed export may hold a cursor or
+            # session that must be released when the client goes away
+            body = response.response
+            response.response = ClosingIterator(compress_stream(body, encoding, levels[encoding]),
+                                                getattr(body, 'close', None))
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(compress(data, encoding, levels[encoding]))
+
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -10,20 +10,120 @@ class Config:
 
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*')
 
+    # Boot-time schema check against the newest migration: 'warn', 'error' or 'off'
+    SCHEMA_CHECK = os.getenv('SCHEMA_CHECK', 'warn')
+    # How long a migration statement may wait for a lock on Postgres before giving up
+    MIGRATION_LOCK_TIMEOUT = os.getenv('MIGRATION_LOCK_TIMEOUT', '5s')
+
+    # Response compression, negotiated through Accept-Encoding
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_MIMETYPES = ['application/json', 'application/x-ndjson', 'text/csv', 'text/plain']
+    # Levels picked for dynamic responses: most of the ratio for little CPU
+    COMPRESS_LEVELS = {'gzip': 5, 'br': 4, 'zstd': 3}
+
+    # Log records are queued by request threads and written out by a listener
+    # thread, so a slow sink doesn't add to request latency. Files default to stderr
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+    LOG_FILE = os.getenv('LOG_FILE')
+    LOG_QUEUE_ENABLED = os.getenv('LOG_QUEUE_ENABLED', 'true').lower() == 'true'
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    # One JSON line per request with its timings, on the shoptrack.access logger
+    ACCESS_LOG_ENABLED = os.getenv('ACCESS_LOG_ENABLED', 'true').lower() == 'true'
+    ACCESS_LOG_FILE = os.getenv('ACCESS_LOG_FILE')
+
+    # Per-request query counting and timing (Server-Timing header, access log db_ms/queries)
+    QUERY_TRACKING = os.getenv('QUERY_TRACKING', 'true').lower() == 'true'
+    # Server-Timing for every client; admin-token requests always get it
+    SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'true').lower() == 'true'
+    # Warn about statements repeated N_PLUS_ONE_THRESHOLD+ times in one request
+    QUERY_DEBUG = os.getenv('QUERY_DEBUG', 'false').lower() == 'true'
+    N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', 5))
+
+    # Prometheus metrics; set PROMETHEUS_MULTIPROC_DIR to merge gunicorn workers
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_PATH = os.getenv('METRICS_PATH', '/metrics')
+    # Scrapers must send X-Admin-Token or come from one of these addresses / CIDR ranges
+    METRICS_ALLOWED_IPS = os.getenv('METRICS_ALLOWED_IPS', '')
+
+    # Per-fingerprint statement statistics (GET /api/admin/statements, flask statements)
+    STATEMENT_STATS_ENABLED = os.getenv('STATEMENT_STATS_ENABLED', 'true').lower() == 'true'
+    # Log statements slower than this with their bind parameter types; 0 disables
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 100))
+
+    # Spans for controller actions, service methods and repository calls, written
+    # as OTLP/JSON to TRACE_FILE or posted to an OTLP/HTTP collector
+    TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'false').lower() == 'true'
+    TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 0.1))
+    # Follow the sampled flag of an incoming traceparent instead of TRACE_SAMPLE_RATE;
+    # only safe when a proxy in front sets or strips the header
+    TRACE_TRUST_UPSTREAM = os.getenv('TRACE_TRUST_UPSTREAM', 'false').lower() == 'true'
+    TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'file')
+    TRACE_FILE = os.getenv('TRACE_FILE', 'traces/spans.ndjson')
+    TRACE_OTLP_ENDPOINT = os.getenv('TRACE_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+    TRACE_SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'shoptrack')
+
+    # Per-request tracemalloc accounting (costly: snapshots every request, and
+    # requests are measured one at a time since the peak is process-wide), plus
+    # the admin snapshot/diff endpoints under /api/admin/memory
+    MEMORY_PROFILING_ENABLED = os.getenv('MEMORY_PROFILING_ENABLED', 'false').lower() == 'true'
+    MEMORY_REPORT_THRESHOLD_KB = int(os.getenv('MEMORY_REPORT_THRESHOLD_KB', 10240))
+    MEMORY_TOP_SITES = int(os.getenv('MEMORY_TOP_SITES', 10))
+    MEMORY_TRACE_FRAMES = int(os.getenv('MEMORY_TRACE_FRAMES', 1))
+    MEMORY_MAX_SNAPSHOTS = int(os.getenv('MEMORY_MAX_SNAPSHOTS', 5))
+
+    # Record a sample of requests to NDJSON for flask replay; secret fields are
+    # scrubbed and bearer tokens replaced by an HMAC alias (CAPTURE_SECRET or SECRET_KEY)
+    CAPTURE_ENABLED = os.getenv('CAPTURE_ENABLED', 'false').lower() == 'true'
+    CAPTURE_FILE = os.getenv('CAPTURE_FILE', 'captures/requests.ndjson')
+    CAPTURE_SAMPLE_RATE = float(os.getenv('CAPTURE_SAMPLE_RATE', 0.01))
+    CAPTURE_SECRET = os.getenv('CAPTURE_SECRET')
+    CAPTURE_MAX_BODY = int(os.getenv('CAPTURE_MAX_BODY', 65536))
+
+    # Token for operator-only features (X-Admin-Token header); unset disables them
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+    # On-demand profiling of single requests (X-Profile: cprofile|sample plus the admin token)
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'true').lower() == 'true'
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+    PROFILE_DEFAULT_MODE = os.getenv('PROFILE_DEFAULT_MODE', 'cprofile')
+    PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', 0.001))
+    # At most PROFILE_RATE_LIMIT profiled requests per PROFILE_RATE_WINDOW seconds, per worker
+    PROFILE_RATE_LIMIT = int(os.getenv('PROFILE_RATE_LIMIT', 10))
+    PROFILE_RATE_WINDOW = float(os.getenv('PROFILE_RATE_WINDOW', 60))
+
+    # Always-on sampling of request threads, written as folded stacks to PROFILE_DIR/folded
+    BACKGROUND_PROFILER_ENABLED = os.getenv('BACKGROUND_PROFILER_ENABLED', 'false').lower() == 'true'
+    BACKGROUND_PROFILER_HZ = float(os.getenv('BACKGROUND_PROFILER_HZ', 100))
+    BACKGROUND_PROFILER_FLUSH_INTERVAL = float(os.getenv('BACKGROUND_PROFILER_FLUSH_INTERVAL', 60))
+    # Newest folded files kept across all workers, older ones are deleted on flush
+    BACKGROUND_PROFILER_MAX_FILES = int(os.getenv('BACKGROUND_PROFILER_MAX_FILES', 500))
+
 class DevelopmentConfig(Config):
     """Development config class"""
     DEBUG = True
     DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///shoptrack.db')
+    QUERY_DEBUG = os.getenv('QUERY_DEBUG', 'true').lower() == 'true'
 
 class ProductionConfig(Config):
     """Production config class"""
     DEBUG = False
+    SCHEMA_CHECK = os.getenv('SCHEMA_CHECK', 'error')
+    # Query counts and database time would tell anyone about the backend
+    SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'false').lower() == 'true'
+    BACKGROUND_PROFILER_ENABLED = os.getenv('BACKGROUND_PROFILER_ENABLED', 'true').lower() == 'true'
 
 class TestingConfig(Config):
     """Testing config class"""
     DEBUG = True
     DATABASE_URL = 'sqlite:///:memory:'
     TESTING = True
+    SCHEMA_CHECK = 'off'
+    QUERY_DEBUG = True
+    ADMIN_TOKEN = 'test-admin-token'
+    # Leave the root logger to pytest's log capture
+    LOG_QUEUE_ENABLED = False
 
 config = {
     'development': DevelopmentConfig,
@@ -1,22 +1,66 @@
 import os
 import logging
+import threading
+import time
 from flask import g
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase, scoped_session
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.orm import sessionmaker, DeclarativeBase, scoped_session, configure_mappers
 from sqlalchemy.exc import SQLAlchemyError
 
 logger = logging.getLogger(__name__)
 
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), 'migrations')
+
 class Base(DeclarativeBase):
     pass
 
+_checkout_observers = []
+# Seconds the current thread's checkout spent opening new connections
+_opening = threading.local()
+
+def add_checkout_observer(observer):
+    """Call observer(seconds) with the time each pool checkout waited for a connection"""
+    if observer not in _checkout_observers:
+        _checkout_observers.append(observer)
+
+class CheckoutTimingPool:
+    """Mixin for the engine's pool class timing how long checkouts wait for
+    a free connection; time spent opening a new one isn't waiting.
+    Pool.recreate() keeps the class, so engine.dispose() keeps the timing.
+    """
+
+    def connect(self):
+        if not _checkout_observers:
+            return super().connect()
+        _opening.seconds = 0.0
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            waited = max(time.perf_counter() - started - _opening.seconds, 0.0)
+            for observer in _checkout_observers:
+                observer(waited)
+
+    def _create_connection(self):
+        started = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            _opening.seconds = getattr(_opening, 'seconds', 0.0) + time.perf_counter() - started
+
+def checkout_timing_pool_class(url):
+    """The pool class the dialect would pick for url, with checkout timing"""
+    url = make_url(url)
+    pool_class = url.get_dialect().get_pool_class(url)
+    return type(f'CheckoutTiming{pool_class.__name__}', (CheckoutTimingPool, pool_class), {})
+
 # Engine creation
 database_url = os.getenv("DATABASE_URL", "sqlite:///shoptrack.db")
 safe_url = database_url.split('@')[-1] if "@" in database_url else database_url
-logger.info(f"Connecting to database: {safe_url}")
+logger.info("Connecting to database: %s", safe_url)
 
 try:
-    engine = create_engine(database_url, echo=False, future=True)
+    engine = create_engine(database_url, echo=False, future=True, poolclass=checkout_timing_pool_class(database_url))
     logger.info("Database engine created successfully")
 except Exception as e:
     logger.exception("Failed to create database engine")
@@ -25,13 +69,54 @@ except Exception as e:
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 ScopedSession = scoped_session(SessionLocal)
 
-def init_app(app):
+# Newest migration, so boot doesn't import Alembic to scan the scripts;
+# test_database checks it against the migrations directory
+HEAD_REVISION = '0005'
+
+def get_alembic_config():
+    """Build an Alembic config pointing at the bundled migrations"""
+    from alembic.config import Config as AlembicConfig
+
+    alembic_config = AlembicConfig()
+    alembic_config.set_main_option('script_location', MIGRATIONS_DIR)
+    return alembic_config
+
+def get_head_revision():
+    """Get the newest migration revision"""
+    return HEAD_REVISION
+
+def get_current_revision(bind=None):
+    """Get the revision the database is stamped with, or None if it isn't"""
+    bind = bind or engine
     try:
-        Base.metadata.create_all(bind=engine)
-        logger.info("Database tables checked/created")
+        with bind.connect() as connection:
+            return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
     except SQLAlchemyError:
-        logger.exception("Error while creating tables")
-        raise
+        return None
+
+def check_schema_version(bind=None):
+    """Check that the database schema matches the newest migration"""
+    current = get_current_revision(bind)
+    head = get_head_revision()
+    return current == head, current, head
+
+def init_app(app):
+    # Import every model so relationships resolve, then configure the
+    # mappers now instead of on the first query of the first request.
+    from . import models  # noqa: F401
+    configure_mappers()
+
+    mode = app.config.get('SCHEMA_CHECK', 'warn')
+    if mode != 'off':
+        matches, current, head = check_schema_version()
+        if not matches:
+            message = (
+                f"Database schema is at revision {current}, expected {head}. "
+                f"Run 'flask init-db' on a new database or apply the migrations."
+            )
+            if mode == 'error':
+                raise RuntimeError(message)
+            logger.warning(message)
 
     @app.before_request
     def create_session():
@@ -42,7 +127,7 @@ def init_app(app):
         db = g.pop('db', None)
         if db is not None:
             if exception:
-                logger.warning(f"Session rolled back due to exception: {exception}")
+                logger.warning("Session rolled back due to exception: %s", exception)
                 db.rollback()
             db.close()
             ScopedSession.remove()
@@ -0,0 +1,37 @@
+"""add lookup indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from shoptrack.utils.migration_utils import create_index_online, drop_index_online
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ('ix_history_user_id_created_at', 'history', ['user_id', 'created_at']),
+    ('ix_history_created_at', 'history', ['created_at']),
+    ('ix_product_owner_id', 'product', ['owner_id']),
+    ('ix_product_stock', 'product', ['stock']),
+    ('ix_session_user_id_expires', 'session', ['user_id', 'expires']),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for index_name, table_name, columns in INDEXES:
+        create_index_online(index_name, table_name, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for index_name, table_name, _ in reversed(INDEXES):
+        drop_index_online(index_name, table_name)
@@ -0,0 +1,65 @@
+"""add transaction rollups
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROLLUPS = (('user_tx_rollup', 'user_id', 'user'), ('product_tx_rollup', 'product_id', 'product'))
+
+# Money totals are whole cents, so incremental sums stay exact
+BACKFILL = """
+INSERT INTO {table} ({key}, buy_count, sell_count, bought_quantity, sold_quantity, spent, earned, price_total)
+SELECT {key},
+       SUM(CASE WHEN action = 'buy' THEN 1 ELSE 0 END),
+       SUM(CASE WHEN action = 'buy' THEN 0 ELSE 1 END),
+       SUM(CASE WHEN action = 'buy' THEN quantity ELSE 0 END),
+       SUM(CASE WHEN action = 'buy' THEN 0 ELSE quantity END),
+       SUM(CASE WHEN action = 'buy' THEN CAST(ROUND(price * 100) AS BIGINT) * quantity ELSE 0 END),
+       SUM(CASE WHEN action = 'buy' THEN 0 ELSE CAST(ROUND(price * 100) AS BIGINT) * quantity END),
+       SUM(CAST(ROUND(price * 100) AS BIGINT))
+FROM history
+WHERE {key} IS NOT NULL
+GROUP BY {key}
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table_name, key, parent in ROLLUPS:
+        op.create_table(table_name,
+        sa.Column(key, sa.Integer(), nullable=False),
+        sa.Column('buy_count', sa.Integer(), nullable=False),
+        sa.Column('sell_count', sa.Integer(), nullable=False),
+        sa.Column('bought_quantity', sa.Integer(), nullable=False),
+        sa.Column('sold_quantity', sa.Integer(), nullable=False),
+        sa.Column('spent', sa.BigInteger(), nullable=False),
+        sa.Column('earned', sa.BigInteger(), nullable=False),
+        sa.Column('price_total', sa.BigInteger(), nullable=False),
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint([key], [f'{parent}.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(key)
+        )
+        # Existing history; from here on every flush keeps the totals current
+        op.execute(BACKFILL.format(table=table_name, key=key))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name, _, _ in reversed(ROLLUPS):
+        op.drop_table(table_name)
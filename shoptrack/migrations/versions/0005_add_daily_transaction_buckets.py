@@ -0,0 +1,73 @@
+"""add daily transaction buckets
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BUCKETS = (('user_daily_tx', 'user_id', 'user'), ('product_daily_tx', 'product_id', 'product'))
+
+# UTC day of a history row per dialect
+DAY = {
+    'sqlite': "date(created_at)",
+    'postgresql': "CAST(created_at AT TIME ZONE 'UTC' AS DATE)",
+}
+
+BACKFILL = """
+INSERT INTO {table} ({key}, day, buy_count, sell_count, bought_quantity, sold_quantity, spent, earned,
+                     price_total)
+SELECT {key}, {day},
+       SUM(CASE WHEN action = 'buy' THEN 1 ELSE 0 END),
+       SUM(CASE WHEN action = 'buy' THEN 0 ELSE 1 END),
+       SUM(CASE WHEN action = 'buy' THEN quantity ELSE 0 END),
+       SUM(CASE WHEN action = 'buy' THEN 0 ELSE quantity END),
+       SUM(CASE WHEN action = 'buy' THEN CAST(ROUND(price * 100) AS BIGINT) * quantity ELSE 0 END),
+       SUM(CASE WHEN action = 'buy' THEN 0 ELSE CAST(ROUND(price * 100) AS BIGINT) * quantity END),
+       SUM(CAST(ROUND(price * 100) AS BIGINT))
+FROM history
+WHERE {key} IS NOT NULL
+GROUP BY {key}, {day}
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    day = DAY.get(op.get_context().dialect.name, "CAST(created_at AS DATE)")
+    for table_name, key, parent in BUCKETS:
+        op.create_table(table_name,
+        sa.Column(key, sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('buy_count', sa.Integer(), nullable=False),
+        sa.Column('sell_count', sa.Integer(), nullable=False),
+        sa.Column('bought_quantity', sa.Integer(), nullable=False),
+        sa.Column('sold_quantity', sa.Integer(), nullable=False),
+        sa.Column('spent', sa.BigInteger(), nullable=False),
+        sa.Column('earned', sa.BigInteger(), nullable=False),
+        sa.Column('price_total', sa.BigInteger(), nullable=False),
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint([key], [f'{parent}.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(key, 'day', name=f'uq_{table_name}_{key}_day')
+        )
+        # Existing history; from here on every flush keeps the buckets current
+        op.execute(BACKFILL.format(table=table_name, key=key, day=day))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name, _, _ in reversed(BUCKETS):
+        op.drop_table(table_name)
@@ -3,11 +3,18 @@ from .user import User
 from .product import Product
 from .session import Session
 from .history import History
+from .data_version import DataVersion
+from .rollup import UserTxRollup, ProductTxRollup, UserDailyTx, ProductDailyTx
 
 __all__ = [
     'BaseModel',
     'User',
     'Product',
     'Session',
-    'History'
+    'History',
+    'DataVersion',
+    'UserTxRollup',
+    'ProductTxRollup',
+    'UserDailyTx',
+    'ProductDailyTx'
 ]
\ No newline at end of file
@@ -1,8 +1,92 @@
-from datetime import datetime
-from sqlalchemy import Column, Integer, DateTime
+from operator import attrgetter
+from sqlalchemy import Column, Integer, DateTime, Date, Numeric, event
+from sqlalchemy.orm import configure_mappers
 from sqlalchemy.sql import func
 from ..database import Base
 
+# Columns never included in serialized output
+SENSITIVE_FIELDS = frozenset(['password', 'secret', 'token', 'key'])
+
+
+def _coerce_decimal(value):
+    return str(value)
+
+
+def _coerce_datetime(value):
+    return value.isoformat()
+
+
+def _coercer_for(column):
+    """Pick the JSON coercion for a column type, None if the value is JSON-native"""
+    if isinstance(column.type, Numeric) and column.type.asdecimal:
+        return _coerce_decimal
+    if isinstance(column.type, (DateTime, Date)):
+        return _coerce_datetime
+    return None
+
+
+class ModelSerializer:
+    """Precompiled field plan turning model instances into dicts.
+
+    Built once per model class when its mapper is configured. The plan is a
+    tuple of field names read with a single attrgetter, plus the positions
+    of fields that need coercion (Decimal -> str, datetime -> ISO 8601).
+    """
+    __slots__ = ('fields', '_getter', '_coercers', '_subsets')
+
+    def __init__(self, fields):
+        self.fields = tuple(name for name, _ in fields)
+        self._coercers = tuple((i, coerce) for i, (_, coerce) in enumerate(fields) if coerce)
+        self._subsets = {}
+        if len(self.fields) > 1:
+            self._getter = attrgetter(*self.fields)
+        elif self.fields:
+            getter = attrgetter(self.fields[0])
+            self._getter = lambda instance: (getter(instance),)
+        else:
+            self._getter = lambda instance: ()
+
+    @classmethod
+    def for_model(cls, model_class):
+        """Build the plan for a mapped class from its table columns"""
+        exclude = SENSITIVE_FIELDS | frozenset(getattr(model_class, '__serialize_exclude__', ()))
+        return cls([
+            (column.key, _coercer_for(column))
+            for column in model_class.__table__.columns
+            if column.key not in exclude
+        ])
+
+    def subset(self, fields):
+        """Get (and cache) a plan limited to the given fields, in plan order"""
+        key = tuple(fields)
+        plan = self._subsets.get(key)
+        if plan is None:
+            wanted = set(key)
+            coercers = dict((self.fields[i], coerce) for i, coerce in self._coercers)
+            plan = ModelSerializer([(name, coercers.get(name)) for name in self.fields if name in wanted])
+            self._subsets[key] = plan
+        return plan
+
+    def _coerce(self, values):
+        values = list(values)
+        for i, coerce in self._coercers:
+            if values[i] is not None:
+                values[i] = coerce(values[i])
+        return values
+
+    def __call__(self, instance, coerce=False):
+        values = self._getter(instance)
+        if coerce and self._coercers:
+            values = self._coerce(values)
+        return dict(zip(self.fields, values))
+
+    def many(self, instances, coerce=False):
+        """Serialize a sequence of instances"""
+        fields, getter = self.fields, self._getter
+        if coerce and self._coercers:
+            return [dict(zip(fields, self._coerce(getter(instance)))) for instance in instances]
+        return [dict(zip(fields, getter(instance))) for instance in instances]
+
 
 class TimestampMixin:
     """Mixin to add timestamp fields to models"""
@@ -14,21 +98,37 @@ class TimestampMixin:
 class BaseModel(Base, TimestampMixin):
     """Base model class that other models inherit from"""
     __abstract__ = True
-    
-    def to_dict(self, exclude=None):
+    __serializer__ = None
+
+    @classmethod
+    def get_serializer(cls, fields=None, exclude=None):
+        """Get the precompiled serializer, optionally limited to some fields"""
+        serializer = cls.__serializer__
+        if serializer is None:
+            configure_mappers()
+            serializer = cls.__serializer__
+        if fields is not None:
+            serializer = serializer.subset(fields)
+        if exclude:
+            serializer = serializer.subset(name for name in serializer.fields if name not in exclude)
+        return serializer
+
+    @classmethod
+    def to_dict_list(cls, instances, fields=None, exclude=None, coerce=False):
+        """Convert a list of instances to dictionaries"""
+        return cls.get_serializer(fields, exclude).many(instances, coerce)
+
+    def to_dict(self, exclude=None, fields=None, coerce=False):
         """Convert model instance to dictionary, excluding sensitive fields"""
-        exclude = exclude or []
-        # Default sensitive fields to exclude
-        sensitive_fields = ['password', 'secret', 'token', 'key']
-        exclude = exclude + sensitive_fields
-        
-        return {
-            column.name: getattr(self, column.name)
-            for column in self.__table__.columns
-            if column.name not in exclude
-        }
-    
+        return self.get_serializer(fields, exclude)(self, coerce)
+
     def __repr__(self):
         """String representation of the model"""
         class_name = self.__class__.__name__
         return f"<{class_name}(id={getattr(self, 'id', None)})>"
+
+
+@event.listens_for(BaseModel, 'mapper_configured', propagate=True)
+def _build_serializer(mapper, model_class):
+    """Compile the serializer once, when the model's mapper is configured"""
+    model_class.__serializer__ = ModelSerializer.for_model(model_class)
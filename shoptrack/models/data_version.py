@@ -0,0 +1,13 @@
+from .base import BaseModel
+from sqlalchemy import ForeignKey, BigInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+class DataVersion(BaseModel):
+    """Monotonic per-owner counter, bumped by every product and history write"""
+    __tablename__ = "data_version"
+
+    owner_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), unique=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DataVersion(owner_id={self.owner_id}, version={self.version})>"
@@ -1,6 +1,6 @@
 from .base import BaseModel
 from typing import Optional
-from sqlalchemy import String, ForeignKey, CheckConstraint, Numeric, Integer
+from sqlalchemy import String, ForeignKey, CheckConstraint, Numeric, Integer, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 class History(BaseModel):
@@ -20,7 +20,9 @@ class History(BaseModel):
     __table_args__ = (
         CheckConstraint('price > 0.0', name='price_positive'),
         CheckConstraint('quantity > 0', name='quantity_positive'),
-        CheckConstraint("action IN ('buy', 'sell')", name='action_valid')
+        CheckConstraint("action IN ('buy', 'sell')", name='action_valid'),
+        Index('ix_history_user_id_created_at', 'user_id', 'created_at'),
+        Index('ix_history_created_at', 'created_at')
     )
     def __repr__(self):
         return f"<History(id={self.id}, action='{self.action}', product='{self.product_name}', quantity={self.quantity})>"
\ No newline at end of file
@@ -1,6 +1,6 @@
 from .base import BaseModel
 from typing import Optional, List
-from sqlalchemy import String, ForeignKey, CheckConstraint, Numeric, Integer
+from sqlalchemy import String, ForeignKey, CheckConstraint, Numeric, Integer, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 class Product(BaseModel):
@@ -20,7 +20,9 @@ class Product(BaseModel):
 
     __table_args__ = (
         CheckConstraint('price > 0.0', name='price_positive'),
-        CheckConstraint('stock >= 0', name='stock_positive')
+        CheckConstraint('stock >= 0', name='stock_positive'),
+        Index('ix_product_owner_id', 'owner_id'),
+        Index('ix_product_stock', 'stock')
     )
     def __repr__(self):
         return f"<Product(id={self.id}, name='{self.name}', price={self.price}, stock={self.stock})>"
\ No newline at end of file
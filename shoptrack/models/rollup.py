@@ -0,0 +1,85 @@
+from .base import BaseModel
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy import BigInteger, Date, ForeignKey, Integer, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.types import TypeDecorator
+
+
+class Cents(TypeDecorator):
+    """Money kept as a whole number of cents, so running sums stay exact
+    (SQLite stores NUMERIC as floating point); Decimal on the Python side"""
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return int((Decimal(str(value)) * 100).to_integral_value(ROUND_HALF_UP))
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else Decimal(int(value)).scaleb(-2)
+
+
+class TransactionTotals:
+    """Running totals of a set of history rows, kept up to date on every flush"""
+    buy_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sell_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    bought_quantity: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sold_quantity: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # price * quantity of buys and sells
+    spent: Mapped[Decimal] = mapped_column(Cents, nullable=False, default=0)
+    earned: Mapped[Decimal] = mapped_column(Cents, nullable=False, default=0)
+    # Sum of unit prices, for the average price
+    price_total: Mapped[Decimal] = mapped_column(Cents, nullable=False, default=0)
+
+
+class UserTxRollup(TransactionTotals, BaseModel):
+    """Transaction totals of one user's history"""
+    __tablename__ = "user_tx_rollup"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), unique=True)
+
+    def __repr__(self):
+        return f"<UserTxRollup(user_id={self.user_id}, buys={self.buy_count}, sells={self.sell_count})>"
+
+
+class ProductTxRollup(TransactionTotals, BaseModel):
+    """Transaction totals of one product's history"""
+    __tablename__ = "product_tx_rollup"
+
+    product_id: Mapped[int] = mapped_column(ForeignKey("product.id", ondelete="CASCADE"), unique=True)
+
+    def __repr__(self):
+        return f"<ProductTxRollup(product_id={self.product_id}, buys={self.buy_count}, sells={self.sell_count})>"
+
+
+class UserDailyTx(TransactionTotals, BaseModel):
+    """Transaction totals of one user's history on one (UTC) day"""
+    __tablename__ = "user_daily_tx"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"))
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'day', name='uq_user_daily_tx_user_id_day'),
+    )
+
+    def __repr__(self):
+        return f"<UserDailyTx(user_id={self.user_id}, day={self.day}, buys={self.buy_count}, sells={self.sell_count})>"
+
+
+class ProductDailyTx(TransactionTotals, BaseModel):
+    """Transaction totals of one product's history on one (UTC) day"""
+    __tablename__ = "product_daily_tx"
+
+    product_id: Mapped[int] = mapped_column(ForeignKey("product.id", ondelete="CASCADE"))
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('product_id', 'day', name='uq_product_daily_tx_product_id_day'),
+    )
+
+    def __repr__(self):
+        return (f"<ProductDailyTx(product_id={self.product_id}, day={self.day}, "
+                f"buys={self.buy_count}, sells={self.sell_count})>")
@@ -1,5 +1,5 @@
 from .base import BaseModel
-from sqlalchemy import String, ForeignKey, DateTime
+from sqlalchemy import String, ForeignKey, DateTime, Index
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -12,5 +12,9 @@ class Session(BaseModel):
     # Relationship
     user: Mapped["User"] = relationship(back_populates="sessions")
 
+    __table_args__ = (
+        Index('ix_session_user_id_expires', 'user_id', 'expires'),
+    )
+
     def __repr__(self):
         return f"<Session(id={self.id}, user_id={self.user_id}, expires={self.expires})>"
\ No newline at end of file
@@ -0,0 +1,20 @@
+from .queries import init_app as init_queries
+from .capture import init_app as init_capture
+from .logs import init_app as init_logs
+from .memory import init_app as init_memory
+from .metrics import init_app as init_metrics
+from .profiling import init_app as init_profiling
+from .statements import init_app as init_statements
+from .tracing import init_app as init_tracing
+
+
+def init_app(app):
+    """Register the request instrumentation hooks"""
+    init_logs(app)
+    init_queries(app)
+    init_metrics(app)
+    init_statements(app)
+    init_tracing(app)
+    init_profiling(app)
+    init_memory(app)
+    init_capture(app)
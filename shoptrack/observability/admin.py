@@ -0,0 +1,13 @@
+import hmac
+from flask import current_app, request
+
+ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+
+
+def is_admin_request():
+    """Whether the request carries the configured admin token"""
+    expected = current_app.config.get('ADMIN_TOKEN')
+    supplied = request.headers.get(ADMIN_TOKEN_HEADER)
+    if not expected or not supplied:
+        return False
+    return hmac.compare_digest(supplied.encode(), expected.encode())
@@ -0,0 +1,213 @@
+import atexit
+import hashlib
+import hmac
+import io
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode
+from flask import g, request
+from ..models.base import SENSITIVE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+SCRUBBED = '[scrubbed]'
+# environ key the app fills in for the recorder: endpoint and user id
+CAPTURE_ENVIRON_KEY = 'shoptrack.capture'
+# Never recorded: the scrape endpoint and operator-only routes
+EXCLUDED_PREFIXES = ('/metrics', '/api/admin')
+
+
+def _is_sensitive(name):
+    name = name.lower()
+    return any(field in name for field in SENSITIVE_FIELDS)
+
+
+def scrub(value):
+    """Copy of a decoded JSON body with secret-looking fields replaced"""
+    if isinstance(value, dict):
+        return {key: SCRUBBED if _is_sensitive(key) else scrub(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [scrub(item) for item in value]
+    return value
+
+
+def scrub_query(query_string):
+    pairs = parse_qsl(query_string, keep_blank_values=True)
+    return urlencode([(key, SCRUBBED if _is_sensitive(key) else value) for key, value in pairs])
+
+
+class CaptureWriter:
+    """Append records to an NDJSON file from a background thread, dropping
+    them when the queue is full rather than slowing requests down"""
+
+    def __init__(self, path, max_queue=10000):
+        self.path = path
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pid = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, record):
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='capture-writer', daemon=True).start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout=5.0):
+        """Wait until everything queued has been written"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            try:
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(record, separators=(',', ':'), default=str) + '\n')
+            except OSError as e:
+                logger.warning("Could not write captured request to %s: %s", self.path, e)
+            finally:
+                self._queue.task_done()
+
+
+class CaptureMiddleware:
+    """WSGI middleware recording a sample of requests for later replay.
+
+    Each record holds the method, path, query, JSON body and timing. Secret
+    fields are scrubbed, and the bearer token is replaced by an alias (an
+    HMAC of the token) plus the user id it resolved to, so replay can map
+    each recorded client onto a user of the target instance.
+    """
+
+    def __init__(self, wsgi_app, writer, secret, sample_rate=0.01, max_body=65536):
+        self.wsgi_app = wsgi_app
+        self.writer = writer
+        self.secret = secret.encode()
+        self.sample_rate = sample_rate
+        self.max_body = max_body
+
+    def alias(self, token):
+        return hmac.new(self.secret, token.encode(), hashlib.sha256).hexdigest()[:16]
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if path.startswith(EXCLUDED_PREFIXES) or random.random() >= self.sample_rate:
+            return self.wsgi_app(environ, start_response)
+
+        body = self._read_body(environ)
+        environ[CAPTURE_ENVIRON_KEY] = {}
+        started_at = time.time()
+        started = time.perf_counter()
+        status = []
+
+        def capturing_start_response(status_line, headers, exc_info=None):
+            status.append(int(status_line.split(' ', 1)[0]))
+            return start_response(status_line, headers, exc_info)
+
+        def finish():
+            self.writer.write(self._record(environ, body, started_at, time.perf_counter() - started,
+                                           status[0] if status else None))
+
+        try:
+            response = self.wsgi_app(environ, capturing_start_response)
+        except Exception:
+            finish()
+            raise
+        return _ClosingIterator(response, finish)
+
+    def _read_body(self, environ):
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return None
+        if not length:
+            return None
+        raw = environ['wsgi.input'].read(length)
+        # The app still needs to read it
+        environ['wsgi.input'] = io.BytesIO(raw)
+        if length > self.max_body:
+            return None
+        try:
+            return scrub(json.loads(raw))
+        except ValueError:
+            return None
+
+    def _record(self, environ, body, started_at, duration, status):
+        seen = environ.get(CAPTURE_ENVIRON_KEY, {})
+        auth = None
+        header = environ.get('HTTP_AUTHORIZATION', '')
+        if header.startswith('Bearer '):
+            auth = {'alias': self.alias(header[7:]), 'user_id': seen.get('user_id')}
+        elif seen.get('user_id') is not None:
+            auth = {'alias': None, 'user_id': seen['user_id']}
+        return {
+            'ts': round(started_at, 6),
+            'method': environ.get('REQUEST_METHOD'),
+            'path': environ.get('PATH_INFO'),
+            'query': scrub_query(environ.get('QUERY_STRING', '')),
+            'body': body,
+            'auth': auth,
+            'endpoint': seen.get('endpoint'),
+            'status': status,
+            'duration_ms': round(duration * 1000, 3),
+        }
+
+
+class _ClosingIterator:
+    """Response iterable calling on_close once the body has been sent or the
+    server closes it, whichever comes first"""
+
+    def __init__(self, response, on_close):
+        self._response = response
+        self._on_close = on_close
+        self._closed = False
+
+    def __iter__(self):
+        yield from self._response
+        self._finish()
+
+    def _finish(self):
+        if not self._closed:
+            self._closed = True
+            self._on_close()
+
+    def close(self):
+        try:
+            if hasattr(self._response, 'close'):
+                self._response.close()
+        finally:
+            self._finish()
+
+
+def init_app(app):
+    if not app.config['CAPTURE_ENABLED']:
+        return
+
+    writer = CaptureWriter(app.config['CAPTURE_FILE'])
+    app.wsgi_app = CaptureMiddleware(
+        app.wsgi_app, writer,
+        secret=app.config['CAPTURE_SECRET'] or app.config['SECRET_KEY'],
+        sample_rate=app.config['CAPTURE_SAMPLE_RATE'],
+        max_body=app.config['CAPTURE_MAX_BODY'],
+    )
+    app.extensions['capture_writer'] = writer
+    atexit.register(writer.flush)
+
+    @app.after_request
+    def note_capture_details(response):
+        seen = request.environ.get(CAPTURE_ENVIRON_KEY)
+        if seen is not None:
+            seen['endpoint'] = request.endpoint
+            seen['user_id'] = g.get('current_user_id')
+        return response
@@ -0,0 +1,35 @@
+from contextvars import ContextVar
+from functools import wraps
+
+# (repository class name, method name) of the outermost repository call in progress
+current_repository_method = ContextVar('current_repository_method', default=None)
+
+
+def format_method(method):
+    """Render a (class name, method name) pair as 'Class.method'"""
+    return f"{method[0]}.{method[1]}" if method else None
+
+
+def track_repository_method(func):
+    """Record the outermost repository method on the call stack, so the
+    statements it issues can be attributed to it"""
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if current_repository_method.get() is not None:
+            return func(self, *args, **kwargs)
+        token = current_repository_method.set((type(self).__name__, name))
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            current_repository_method.reset(token)
+    return wrapper
+
+
+def instrument_public_methods(cls, decorator):
+    """Wrap every public method defined directly on cls"""
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith('_') or not callable(value) or isinstance(value, (staticmethod, classmethod, type)):
+            continue
+        setattr(cls, attr, decorator(value))
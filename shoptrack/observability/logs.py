@@ -0,0 +1,184 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, request
+from flask.logging import default_handler
+from .queries import current_query_stats
+
+ACCESS_LOGGER = 'shoptrack.access'
+access_logger = logging.getLogger(ACCESS_LOGGER)
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s [%(name)s] %(message)s'
+
+logger = logging.getLogger(__name__)
+
+# Arguments that can't change or lazy-load before the listener formats them
+_IMMUTABLE = (str, int, float, bool, type(None))
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; a dict passed as extra={'fields': ...} is merged in"""
+
+    def format(self, record):
+        data = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str, separators=(',', ':'))
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread and drops
+    records instead of blocking when the queue is full. Once the queue has
+    room again, a warning saying how many records were lost goes out first"""
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+        self._reported = 0
+        self._report_lock = threading.Lock()
+
+    def prepare(self, record):
+        # The stock handler formats here, on the request thread. Only merge the
+        # message now when an argument could change before the listener sees it
+        # (a lone dict argument arrives as the args mapping itself)
+        args = record.args or ()
+        if isinstance(args, dict) or not all(isinstance(arg, _IMMUTABLE) for arg in args):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self.dropped != self._reported:
+                self._report_dropped()
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._report_lock:
+                self.dropped += 1
+
+    def _report_dropped(self):
+        with self._report_lock:
+            lost = self.dropped - self._reported
+            if not lost:
+                return
+            self.queue.put_nowait(logger.makeRecord(
+                logger.name, logging.WARNING, __file__, 0,
+                "Log queue full: dropped %d records", (lost,), None,
+            ))
+            self._reported = self.dropped
+
+
+class BackgroundLogging:
+    """Route root logging through a queue drained by a listener thread, so
+    request threads never wait on a slow sink"""
+
+    def __init__(self, handlers, max_queue=10000):
+        self.handlers = handlers
+        self.max_queue = max_queue
+        self.queue_handler = BackgroundQueueHandler(queue.Queue(max_queue))
+        self.listener = None
+
+    def start(self):
+        self.listener = QueueListener(self.queue_handler.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+        return self
+
+    def stop(self):
+        """Write out what is queued and stop the listener thread"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def restart_after_fork(self):
+        # The listener thread doesn't survive a fork (gunicorn workers); give
+        # the child a fresh queue and its own thread
+        self.queue_handler.queue = queue.Queue(self.max_queue)
+        self.listener = None
+        self.start()
+
+
+_background = None
+
+
+def _sink(path, formatter, record_filter):
+    handler = logging.FileHandler(path) if path else logging.StreamHandler(sys.stderr)
+    handler.setFormatter(formatter)
+    handler.addFilter(record_filter)
+    return handler
+
+
+def init_background_logging(app):
+    """Install the queue handler on the root logger (once per process)"""
+    global _background
+    if _background is not None:
+        return _background
+
+    app_formatter = JsonFormatter() if app.config['LOG_FORMAT'] == 'json' else logging.Formatter(TEXT_FORMAT)
+    handlers = [
+        _sink(app.config['LOG_FILE'], app_formatter, lambda record: record.name != ACCESS_LOGGER),
+        _sink(app.config['ACCESS_LOG_FILE'], JsonFormatter(), logging.Filter(ACCESS_LOGGER)),
+    ]
+    _background = BackgroundLogging(handlers, app.config['LOG_QUEUE_SIZE']).start()
+
+    root = logging.getLogger()
+    root.setLevel(app.config['LOG_LEVEL'])
+    root.addHandler(_background.queue_handler)
+    app.logger.removeHandler(default_handler)
+    os.register_at_fork(after_in_child=_background.restart_after_fork)
+    atexit.register(_background.stop)
+    return _background
+
+
+def init_app(app):
+    if app.config['LOG_QUEUE_ENABLED']:
+        init_background_logging(app)
+
+    if not app.config['ACCESS_LOG_ENABLED']:
+        return
+
+    track_queries = app.config['QUERY_TRACKING']
+
+    @app.before_request
+    def start_access_timer():
+        g.access_started = time.perf_counter()
+
+    # Registered ahead of the other observability hooks, so this after_request
+    # runs after them and the timings cover their work too
+    @app.after_request
+    def log_access(response):
+        started = g.pop('access_started', None)
+        if started is None or not access_logger.isEnabledFor(logging.INFO):
+            return response
+
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+            'bytes': response.calculate_content_length(),
+            'user_id': g.get('current_user_id'),
+            'remote_addr': request.remote_addr,
+        }
+        stats = current_query_stats() if track_queries else None
+        if stats is not None:
+            fields['queries'] = stats.count
+            fields['db_ms'] = round(stats.total_time * 1000, 2)
+        span = g.get('trace_span')
+        if span is not None:
+            fields['trace_id'] = span.trace.trace_id
+        access_logger.info("%s %s %s", request.method, request.path, response.status_code, extra={'fields': fields})
+        return response
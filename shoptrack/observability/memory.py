@@ -0,0 +1,138 @@
+import itertools
+import logging
+import sys
+import threading
+import tracemalloc
+from collections import OrderedDict
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+# Allocations made by the tracing machinery itself
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def _site(statistic):
+    frame = statistic.traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+def statistic_to_dict(statistic):
+    """JSON-friendly form of a tracemalloc Statistic or StatisticDiff"""
+    data = {'site': _site(statistic), 'size_kb': round(statistic.size / 1024, 1), 'count': statistic.count}
+    if isinstance(statistic, tracemalloc.StatisticDiff):
+        data['size_diff_kb'] = round(statistic.size_diff / 1024, 1)
+        data['count_diff'] = statistic.count_diff
+    return data
+
+
+def top_allocations(snapshot, baseline=None, group_by='lineno', limit=10):
+    """Biggest allocation sites in snapshot, or biggest growth since baseline"""
+    snapshot = snapshot.filter_traces(_IGNORED)
+    if baseline is None:
+        return snapshot.statistics(group_by)[:limit]
+    growth = snapshot.compare_to(baseline.filter_traces(_IGNORED), group_by)
+    return [stat for stat in growth if stat.size_diff > 0][:limit]
+
+
+class SnapshotStore:
+    """Named tracemalloc snapshots kept for diffing, oldest dropped first"""
+
+    def __init__(self, max_snapshots=5):
+        self.max_snapshots = max_snapshots
+        self._snapshots = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # Whether take() started tracemalloc, so clear() knows to stop it
+        self._started_tracing = False
+
+    def take(self, frames=1):
+        """Take a snapshot, starting tracemalloc first if it isn't running"""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+                self._started_tracing = True
+            snapshot = tracemalloc.take_snapshot()
+            snapshot_id = next(self._ids)
+            self._snapshots[snapshot_id] = snapshot
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return snapshot_id, snapshot
+
+    def get(self, snapshot_id):
+        with self._lock:
+            return self._snapshots.get(snapshot_id)
+
+    def ids(self):
+        with self._lock:
+            return list(self._snapshots)
+
+    def clear(self):
+        """Drop the snapshots, and stop tracemalloc if take() started it:
+        tracing slows down every allocation in the process"""
+        with self._lock:
+            self._snapshots.clear()
+            if self._started_tracing:
+                self._started_tracing = False
+                if tracemalloc.is_tracing():
+                    tracemalloc.stop()
+
+
+snapshots = SnapshotStore()
+
+
+def init_app(app):
+    snapshots.max_snapshots = app.config['MEMORY_MAX_SNAPSHOTS']
+    if not app.config['MEMORY_PROFILING_ENABLED']:
+        return
+
+    frames = app.config['MEMORY_TRACE_FRAMES']
+    threshold = app.config['MEMORY_REPORT_THRESHOLD_KB'] * 1024
+    top_sites = app.config['MEMORY_TOP_SITES']
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    # The peak and block counts are process-wide, so requests are measured
+    # one at a time; concurrent requests wait for each other in this mode
+    measuring = threading.Lock()
+
+    @app.before_request
+    def start_memory_tracking():
+        measuring.acquire()
+        g.memory_lock = measuring
+        tracemalloc.reset_peak()
+        g.memory_start = (tracemalloc.get_traced_memory()[0], sys.getallocatedblocks())
+        # Diffing against this shows where the request's memory went; it's
+        # the expensive part of this mode
+        g.memory_baseline = tracemalloc.take_snapshot()
+
+    @app.after_request
+    def report_memory(response):
+        start = g.pop('memory_start', None)
+        baseline = g.pop('memory_baseline', None)
+        if start is None:
+            return response
+
+        current, peak = tracemalloc.get_traced_memory()
+        peak_growth = peak - start[0]
+        blocks = sys.getallocatedblocks() - start[1]
+        logger.info(
+            "memory method=%s path=%s peak_kb=%.1f retained_kb=%.1f blocks=%d",
+            request.method, request.path, peak_growth / 1024, (current - start[0]) / 1024, blocks
+        )
+        if peak_growth >= threshold:
+            sites = top_allocations(tracemalloc.take_snapshot(), baseline, limit=top_sites)
+            logger.warning(
+                "%s %s peaked at %.1f KB; top allocation sites: %s", request.method, request.path, peak_growth / 1024,
+                '; '.join(f"{_site(s)} +{s.size_diff / 1024:.1f} KB ({s.count_diff:+d} blocks)" for s in sites)
+            )
+        return response
+
+    @app.teardown_request
+    def release_memory_lock(exception=None):
+        lock = g.pop('memory_lock', None)
+        if lock is not None:
+            lock.release()
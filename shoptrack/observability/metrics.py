@@ -0,0 +1,154 @@
+import ipaddress
+import os
+import time
+from flask import Response, g, request
+from sqlalchemy import event
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client import multiprocess
+from ..database import add_checkout_observer, engine
+from .admin import is_admin_request
+from .context import format_method
+from .queries import add_query_observer, install_listeners
+
+# Latency buckets (seconds) sized for an API whose requests mostly take a few ms
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+REQUESTS = Counter(
+    'shoptrack_http_requests_total', 'HTTP requests handled',
+    ['endpoint', 'method', 'status'],
+)
+REQUEST_LATENCY = Histogram(
+    'shoptrack_http_request_duration_seconds', 'Time spent handling a request',
+    ['endpoint', 'method'], buckets=REQUEST_BUCKETS,
+)
+REQUEST_QUEUE_TIME = Histogram(
+    'shoptrack_http_request_queue_seconds', 'Time between the proxy accepting a request and a worker picking it up',
+    buckets=REQUEST_BUCKETS,
+)
+QUERY_LATENCY = Histogram(
+    'shoptrack_db_query_duration_seconds', 'SQL statement execution time by repository method',
+    ['repository_method'], buckets=QUERY_BUCKETS,
+)
+POOL_CHECKED_OUT = Gauge(
+    'shoptrack_db_pool_checked_out', 'Connections currently checked out of the pool',
+    multiprocess_mode='livesum',
+)
+POOL_OVERFLOW = Gauge(
+    'shoptrack_db_pool_overflow', 'Connections open beyond the pool size',
+    multiprocess_mode='livesum',
+)
+POOL_WAIT = Histogram(
+    'shoptrack_db_pool_wait_seconds', 'Time spent waiting to check a connection out of the pool',
+    buckets=QUERY_BUCKETS,
+)
+
+
+def parse_request_start(value, now=None):
+    """Queue time in seconds from an X-Request-Start header, None if unparseable.
+
+    Proxies send the epoch in seconds (nginx: t=1700000000.123), milliseconds
+    or microseconds; the magnitude tells them apart.
+    """
+    if not value:
+        return None
+    try:
+        started = float(value.strip().removeprefix('t='))
+    except ValueError:
+        return None
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    now = time.time() if now is None else now
+    return max(now - started, 0.0)
+
+
+def _observe_query(statement, parameters, duration, method, rowcount):
+    QUERY_LATENCY.labels(format_method(method) or 'none').observe(duration)
+
+
+def _update_pool_gauges(pool):
+    # Only QueuePool keeps counts; SQLite's singleton/static pools don't
+    if hasattr(pool, 'checkedout'):
+        POOL_CHECKED_OUT.set(pool.checkedout())
+        POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+
+def instrument_pool(bind=engine):
+    """Track pool usage and checkout wait time"""
+    add_checkout_observer(POOL_WAIT.observe)
+    if not getattr(bind, '_shoptrack_pool_events', False):
+        # Listening on the engine follows it to the pool dispose() creates
+        event.listen(bind, 'checkout', lambda *args: _update_pool_gauges(bind.pool))
+        event.listen(bind, 'checkin', lambda *args: _update_pool_gauges(bind.pool))
+        bind._shoptrack_pool_events = True
+
+
+def parse_allowed_networks(value):
+    """IP networks from a comma-separated list of addresses and CIDR ranges"""
+    return [ipaddress.ip_network(item.strip(), strict=False) for item in value.split(',') if item.strip()]
+
+
+def is_scrape_allowed(networks):
+    """Whether the request may read the metrics: the admin token, or a
+    client address in the allowlist"""
+    if is_admin_request():
+        return True
+    try:
+        address = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def collect_metrics():
+    """Render the metrics, merged across workers in multiprocess mode"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def init_app(app):
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    install_listeners()
+    add_query_observer(_observe_query)
+    instrument_pool()
+    metrics_path = app.config['METRICS_PATH']
+    allowed_networks = parse_allowed_networks(app.config['METRICS_ALLOWED_IPS'])
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+        queued = parse_request_start(request.headers.get('X-Request-Start'))
+        if queued is not None:
+            REQUEST_QUEUE_TIME.observe(queued)
+
+    @app.after_request
+    def note_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def record_request(exception=None):
+        # Teardown runs for requests that raised before a response was built too
+        started = g.pop('metrics_started', None)
+        status = g.pop('metrics_status', 500)
+        if request.path == metrics_path:
+            return
+        endpoint = request.endpoint or 'unmatched'
+        REQUESTS.labels(endpoint, request.method, status).inc()
+        if started is not None:
+            REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - started)
+
+    @app.route(metrics_path, endpoint='metrics')
+    def metrics():
+        if not is_scrape_allowed(allowed_networks):
+            return Response('Admin token or allowed address required\n', status=403, content_type='text/plain')
+        return Response(collect_metrics(), content_type=CONTENT_TYPE_LATEST)
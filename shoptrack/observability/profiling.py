@@ -0,0 +1,326 @@
+import atexit
+import cProfile
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from flask import current_app, g, request
+from .admin import is_admin_request
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_QUERY_ARG = '_profile'
+PROFILE_MODES = ('cprofile', 'sample')
+
+
+def frame_stack(frame):
+    """The call stack ending at frame, outermost call first"""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+class RateLimiter:
+    """Allow at most limit events per window seconds (per process)"""
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self._events = deque()
+        self._lock = threading.Lock()
+
+    def allow(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._events and self._events[0] <= now - self.window:
+                self._events.popleft()
+            if len(self._events) >= self.limit:
+                return False
+            self._events.append(now)
+            return True
+
+
+class RequestSampler:
+    """Sample one thread's stack at a fixed interval until stopped"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-sampler', daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is not None:
+                self.samples.append((frame_stack(frame), now - last))
+            last = now
+
+
+class BackgroundProfiler:
+    """Low-rate stack sampler for the threads serving requests.
+
+    Samples are aggregated into folded stacks (one "frame;frame;frame count"
+    line per distinct stack, the input of flamegraph.pl, inferno and
+    speedscope) and flushed to a new file every flush_interval seconds; only
+    the newest max_files files in the directory are kept. The sampling thread times itself and halves its rate whenever it spends more
+    than max_overhead of the wall clock sampling.
+    """
+
+    def __init__(self, directory, interval, flush_interval, max_files=None, max_overhead=0.01):
+        self.directory = directory
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.max_files = max_files
+        self.max_overhead = max_overhead
+        self.active_threads = set()
+        self.stacks = Counter()
+        self.sampling_time = 0.0
+        self._labels = {}
+        self._lock = threading.Lock()
+        self._pid = None
+        self._thread = None
+
+    def ensure_started(self):
+        """Start the sampling thread in this process (once per forked worker)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.active_threads = set()
+            self.stacks = Counter()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='background-profiler', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        """Stop sampling and write out what is left"""
+        if self._thread is not None and self._pid == os.getpid():
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        started = time.perf_counter()
+        next_flush = time.monotonic() + self.flush_interval
+        while not self._stop.wait(self.interval):
+            before = time.perf_counter()
+            self.sample()
+            self.sampling_time += time.perf_counter() - before
+
+            if self.sampling_time > self.max_overhead * (time.perf_counter() - started):
+                self.interval *= 2
+                logger.warning("Background profiler over its overhead budget, sampling every %.3fs", self.interval)
+                started, self.sampling_time = time.perf_counter(), 0.0
+            if time.monotonic() >= next_flush:
+                self.flush()
+                next_flush = time.monotonic() + self.flush_interval
+
+    def _label(self, frame):
+        label = self._labels.get(frame)
+        if label is None:
+            name, filename, line = frame
+            label = self._labels[frame] = f"{name} ({os.path.basename(filename)}:{line})".replace(';', ':')
+        return label
+
+    def sample(self):
+        """Take one sample of every thread currently serving a request"""
+        frames = sys._current_frames()
+        for thread_id in tuple(self.active_threads):
+            frame = frames.get(thread_id)
+            if frame is not None:
+                folded = ';'.join(self._label(f) for f in frame_stack(frame))
+                with self._lock:
+                    self.stacks[folded] += 1
+
+    def flush(self):
+        """Write the folded stacks gathered since the last flush, return the file path"""
+        with self._lock:
+            stacks, self.stacks = self.stacks, Counter()
+        if not stacks:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.folded")
+        with open(path, 'w') as f:
+            for folded, count in stacks.most_common():
+                f.write(f"{folded} {count}\n")
+        self.prune()
+        return path
+
+    def prune(self):
+        """Delete the oldest folded files beyond max_files (shared by every worker)"""
+        if not self.max_files:
+            return
+        # Names start with the flush time, so they sort oldest first
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith('.folded'))
+        for name in names[:-self.max_files]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                # Another worker pruned it first
+                pass
+
+
+def speedscope_document(name, samples, duration):
+    """Build a speedscope file from (stack, weight) samples"""
+    frames, index, stacks, weights = [], {}, [], []
+    for stack, weight in samples:
+        ids = []
+        for frame in stack:
+            position = index.get(frame)
+            if position is None:
+                position = index[frame] = len(frames)
+                frames.append({'name': frame[0], 'file': frame[1], 'line': frame[2]})
+            ids.append(position)
+        stacks.append(ids)
+        weights.append(weight)
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'shoptrack',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'seconds',
+            'startValue': 0,
+            'endValue': duration,
+            'samples': stacks,
+            'weights': weights,
+        }],
+    }
+
+
+def _requested_mode():
+    """Profiling mode asked for by the request, None if it didn't ask"""
+    value = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_QUERY_ARG)
+    if not value:
+        return None
+    value = value.lower()
+    return value if value in PROFILE_MODES else current_app.config['PROFILE_DEFAULT_MODE']
+
+
+def _profile_path(extension):
+    """Profile file name tagged with the time, endpoint and user"""
+    endpoint = re.sub(r'[^\w.-]', '_', request.endpoint or 'unmatched')
+    user = g.get('current_user_id') or 'anon'
+    name = f"{time.strftime('%Y%m%dT%H%M%S')}-{endpoint}-user{user}-{uuid.uuid4().hex[:8]}.{extension}"
+    directory = current_app.config['PROFILE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, name)
+
+
+def init_background_profiler(app):
+    profiler = BackgroundProfiler(
+        os.path.join(app.config['PROFILE_DIR'], 'folded'),
+        1 / app.config['BACKGROUND_PROFILER_HZ'],
+        app.config['BACKGROUND_PROFILER_FLUSH_INTERVAL'],
+        app.config['BACKGROUND_PROFILER_MAX_FILES'],
+    )
+
+    @app.before_request
+    def track_request_thread():
+        # Started lazily so each forked gunicorn worker gets its own thread
+        profiler.ensure_started()
+        profiler.active_threads.add(threading.get_ident())
+
+    @app.teardown_request
+    def untrack_request_thread(exception=None):
+        profiler.active_threads.discard(threading.get_ident())
+
+    app.extensions['background_profiler'] = profiler
+
+
+def init_app(app):
+    if app.config['BACKGROUND_PROFILER_ENABLED']:
+        init_background_profiler(app)
+
+    if not app.config['PROFILING_ENABLED']:
+        return
+
+    limiter = RateLimiter(app.config['PROFILE_RATE_LIMIT'], app.config['PROFILE_RATE_WINDOW'])
+
+    @app.before_request
+    def start_profiling():
+        mode = _requested_mode()
+        if mode is None:
+            return
+        if not is_admin_request():
+            # Any client can send the flag, so this must stay cheap and quiet
+            logger.debug("Ignored unauthorized profiling request for %s", request.path)
+            return
+        if not limiter.allow():
+            g.profile_rate_limited = True
+            return
+
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler (a debugger, coverage) already owns the hook
+                return
+        else:
+            profiler = RequestSampler(threading.get_ident(), app.config['PROFILE_SAMPLE_INTERVAL']).start()
+        g.profiler = profiler
+
+    # after_request hooks run in reverse order of registration: this one is
+    # registered before compression, so the profile covers compressing too
+    @app.after_request
+    def save_profile(response):
+        if g.pop('profile_rate_limited', False):
+            response.headers[PROFILE_HEADER] = 'rate-limited'
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+
+        tags = f"{request.method} {request.path} endpoint={request.endpoint} user={g.get('current_user_id')}"
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            path = _profile_path('prof')
+            profiler.dump_stats(path)
+        else:
+            profiler.stop()
+            path = _profile_path('speedscope.json')
+            with open(path, 'w') as f:
+                json.dump(speedscope_document(tags, profiler.samples, profiler.duration), f)
+
+        logger.info("Saved profile of %s to %s", tags, path)
+        response.headers[PROFILE_HEADER] = os.path.basename(path)
+        return response
+
+    @app.teardown_request
+    def discard_profile(exception=None):
+        # The request failed before after_request ran; don't leave the profiler on
+        profiler = g.pop('profiler', None)
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+        elif profiler is not None:
+            profiler.stop()
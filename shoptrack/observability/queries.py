@@ -0,0 +1,137 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, request
+from sqlalchemy import event
+from ..database import engine
+from .admin import is_admin_request
+from .context import current_repository_method, format_method
+
+logger = logging.getLogger(__name__)
+
+# Statistics for the unit of work (request, test, benchmark) in progress
+_current_stats = ContextVar('query_stats', default=None)
+# Process-wide consumers of every statement (metrics, fingerprints)
+_observers = []
+
+
+class QueryStats:
+    """Statements issued during one unit of work"""
+
+    def __init__(self, track_shapes=False, parent=None):
+        self.parent = parent
+        self.started = time.perf_counter()
+        self.count = 0
+        self.total_time = 0.0
+        self.track_shapes = track_shapes
+        self.statements = []
+        self.shapes = Counter()
+        self.shape_methods = {}
+
+    def record(self, statement, duration, method, parameters=None):
+        # Enclosing collectors (a test around a request) see the statement too
+        if self.parent is not None:
+            self.parent.record(statement, duration, method, parameters)
+        self.count += 1
+        self.total_time += duration
+        if self.track_shapes:
+            self.statements.append((statement, duration, method, parameters))
+            self.shapes[statement] += 1
+            self.shape_methods.setdefault(statement, method)
+
+    def repeated_statements(self, threshold):
+        """Statement shapes issued at least threshold times, most repeated first"""
+        return [
+            (statement, count, format_method(self.shape_methods[statement]))
+            for statement, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+
+@contextmanager
+def collect_queries(track_shapes=True):
+    """Collect the statements issued inside the block"""
+    stats = QueryStats(track_shapes, parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def current_query_stats():
+    return _current_stats.get()
+
+
+def add_query_observer(observer):
+    """Call observer(statement, parameters, duration, method, rowcount) for every statement executed"""
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _observers or _current_stats.get() is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_started', None)
+    if started is None:
+        return
+    duration = time.perf_counter() - started
+    method = current_repository_method.get()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, duration, method, parameters)
+    for observer in _observers:
+        observer(statement, parameters, duration, method, cursor.rowcount)
+
+
+def install_listeners(bind=engine):
+    """Register the cursor listeners on the engine (once)"""
+    if not event.contains(bind, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(bind, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(bind, 'after_cursor_execute', _after_cursor_execute)
+
+
+def init_app(app):
+    if not app.config['QUERY_TRACKING']:
+        return
+
+    install_listeners()
+    debug = app.config['QUERY_DEBUG']
+    threshold = app.config['N_PLUS_ONE_THRESHOLD']
+
+    @app.before_request
+    def start_query_tracking():
+        stats = QueryStats(track_shapes=debug, parent=_current_stats.get())
+        g.query_stats_token = _current_stats.set(stats)
+
+    @app.after_request
+    def report_queries(response):
+        stats = _current_stats.get()
+        if stats is None:
+            return response
+
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        db_ms = stats.total_time * 1000
+        if app.config['SERVER_TIMING_HEADER'] or is_admin_request():
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={db_ms:.2f};desc="{stats.count} queries", app;dur={total_ms:.2f}'
+            )
+        if debug:
+            for statement, count, method in stats.repeated_statements(threshold):
+                logger.warning(
+                    "Likely N+1 in %s %s: %d x %s: %s",
+                    request.method, request.path, count, method or 'unknown', ' '.join(statement.split())[:200]
+                )
+        return response
+
+    @app.teardown_request
+    def stop_query_tracking(exception=None):
+        token = g.pop('query_stats_token', None)
+        if token is not None:
+            _current_stats.reset(token)
@@ -0,0 +1,159 @@
+import logging
+import os
+import re
+import threading
+from collections import deque
+from .context import format_method
+from .queries import add_query_observer, install_listeners
+
+logger = logging.getLogger(__name__)
+
+# Durations kept per fingerprint for the p95, most recent first out
+SAMPLE_SIZE = 1024
+# Raw statement -> fingerprint cache size before it's dropped and rebuilt
+FINGERPRINT_CACHE_SIZE = 10000
+
+_WHITESPACE = re.compile(r'\s+')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%\(\w+\)s|(?<!:):\w+|\$\d+|%s|\?')
+_VALUE_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_POSTCOMPILE = re.compile(r'\(?__\[POSTCOMPILE_\w+\]\)?')
+
+
+def fingerprint(statement):
+    """Normalize a statement so calls differing only in values collapse together"""
+    text = _WHITESPACE.sub(' ', statement).strip()
+    text = _STRING.sub('?', text)
+    text = _NUMBER.sub('?', text)
+    text = _PLACEHOLDER.sub('?', text)
+    text = _POSTCOMPILE.sub('(...)', text)
+    return _VALUE_LIST.sub('(...)', text)
+
+
+def parameter_shape(parameters):
+    """Describe bind parameters by type only, never by value"""
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"{len(parameters)} x {parameter_shape(parameters[0])}"
+        return tuple(type(value).__name__ for value in parameters)
+    return type(parameters).__name__
+
+
+class StatementStats:
+    """Running totals for one fingerprint issued by one repository method"""
+    __slots__ = ('fingerprint', 'method', 'calls', 'total_time', 'max_time', 'rows', 'samples')
+
+    def __init__(self, fingerprint, method):
+        self.fingerprint = fingerprint
+        self.method = method
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def record(self, duration, rowcount):
+        self.calls += 1
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        # Drivers report -1 when they don't know (SQLite SELECTs)
+        if rowcount > 0:
+            self.rows += rowcount
+        self.samples.append(duration)
+
+    @property
+    def mean_time(self):
+        return self.total_time / self.calls if self.calls else 0.0
+
+    @property
+    def p95_time(self):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+
+    def to_dict(self):
+        return {
+            'fingerprint': self.fingerprint,
+            'repository_method': self.method,
+            'calls': self.calls,
+            'total_ms': round(self.total_time * 1000, 3),
+            'mean_ms': round(self.mean_time * 1000, 3),
+            'p95_ms': round(self.p95_time * 1000, 3),
+            'max_ms': round(self.max_time * 1000, 3),
+            'rows': self.rows,
+        }
+
+
+class StatementRegistry:
+    """In-process equivalent of pg_stat_statements, keyed by fingerprint and
+    the repository method that issued it. One registry per worker process."""
+
+    SORT_KEYS = {
+        'total': lambda stats: stats.total_time,
+        'mean': lambda stats: stats.mean_time,
+        'p95': lambda stats: stats.p95_time,
+        'calls': lambda stats: stats.calls,
+        'rows': lambda stats: stats.rows,
+    }
+
+    def __init__(self, slow_threshold=None):
+        self.slow_threshold = slow_threshold
+        self._entries = {}
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+
+    def observe(self, statement, parameters, duration, method, rowcount):
+        """Query observer: fold one executed statement into the registry"""
+        text = self._fingerprints.get(statement)
+        if text is None:
+            if len(self._fingerprints) >= FINGERPRINT_CACHE_SIZE:
+                self._fingerprints.clear()
+            text = self._fingerprints[statement] = fingerprint(statement)
+        method = format_method(method) or 'none'
+        key = (text, method)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = StatementStats(text, method)
+            entry.record(duration, rowcount)
+
+        if self.slow_threshold is not None and duration >= self.slow_threshold:
+            logger.warning(
+                "Slow query (%.1f ms) in %s: %s params=%s",
+                duration * 1000, method, text, parameter_shape(parameters)
+            )
+
+    def top(self, sort='total', limit=20):
+        """Entries ordered by the given statistic, largest first"""
+        with self._lock:
+            entries = list(self._entries.values())
+        entries.sort(key=self.SORT_KEYS[sort], reverse=True)
+        return entries[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+    def dump(self, sort='total', limit=20):
+        return {
+            'pid': os.getpid(),
+            'statements': [entry.to_dict() for entry in self.top(sort, limit)],
+        }
+
+
+registry = StatementRegistry()
+
+
+def init_app(app):
+    if not app.config['STATEMENT_STATS_ENABLED']:
+        return
+
+    threshold_ms = app.config['SLOW_QUERY_THRESHOLD_MS']
+    # 0 turns the slow-query log off
+    registry.slow_threshold = threshold_ms / 1000 if threshold_ms else None
+    install_listeners()
+    add_query_observer(registry.observe)
@@ -0,0 +1,318 @@
+import atexit
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from functools import wraps
+from urllib.request import Request, urlopen
+from flask import g, request
+from .context import instrument_public_methods
+from .queries import add_query_observer, install_listeners
+
+logger = logging.getLogger(__name__)
+
+# Innermost open span of the sampled trace in progress; None means "not tracing"
+_current_span = ContextVar('current_span', default=None)
+
+# (class, layer) pairs whose public methods get spans once an app enables tracing
+_traceable = []
+_instrumented = False
+
+# Arguments recorded as the owner of the data a span touches
+OWNER_ARGUMENTS = ('owner_id', 'user_id')
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class Span:
+    """One timed operation, laid out after the OpenTelemetry span model"""
+    __slots__ = (
+        'trace', 'span_id', 'parent_id', 'name', 'kind', 'start', 'end',
+        'attributes', 'status', 'statements', 'rows',
+    )
+
+    def __init__(self, trace, name, parent_id=None, kind=SPAN_KIND_INTERNAL, attributes=None):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.status = STATUS_OK
+        self.statements = 0
+        self.rows = 0
+        self.start = time.time_ns()
+        self.end = None
+
+    def finish(self):
+        self.end = time.time_ns()
+        if self.statements:
+            self.attributes['db.statement_count'] = self.statements
+            self.attributes['db.rows_affected'] = self.rows
+        self.trace.spans.append(self)
+
+
+class Trace:
+    """Spans of one sampled request"""
+    __slots__ = ('trace_id', 'spans')
+
+    def __init__(self, trace_id=None):
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.spans = []
+
+
+def _attribute_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def otlp_document(trace, service_name):
+    """Encode a trace as an OTLP/JSON ExportTraceServiceRequest"""
+    spans = []
+    for span in trace.spans:
+        encoded = {
+            'traceId': trace.trace_id,
+            'spanId': span.span_id,
+            'name': span.name,
+            'kind': span.kind,
+            'startTimeUnixNano': str(span.start),
+            'endTimeUnixNano': str(span.end),
+            'attributes': [{'key': k, 'value': _attribute_value(v)} for k, v in span.attributes.items()],
+            'status': {'code': span.status},
+        }
+        if span.parent_id:
+            encoded['parentSpanId'] = span.parent_id
+        spans.append(encoded)
+    return {'resourceSpans': [{
+        'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service_name}}]},
+        'scopeSpans': [{'scope': {'name': 'shoptrack'}, 'spans': spans}],
+    }]}
+
+
+class BackgroundExporter(ABC):
+    """Export traces from a background thread, so requests never wait on the
+    sink; traces are dropped when the queue is full"""
+
+    def __init__(self, max_queue=1000):
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pid = None
+
+    def export(self, document):
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='trace-exporter', daemon=True).start()
+        try:
+            self._queue.put_nowait(document)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout=5.0):
+        """Wait until everything queued has been exported"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    @abstractmethod
+    def send(self, document):
+        """Deliver one trace document to the sink"""
+
+    def _run(self):
+        while True:
+            document = self._queue.get()
+            try:
+                self.send(document)
+            except Exception as e:
+                logger.warning("Trace export failed: %s", e)
+            finally:
+                self._queue.task_done()
+
+
+class FileExporter(BackgroundExporter):
+    """Append one OTLP/JSON document per trace to a file"""
+
+    def __init__(self, path, max_queue=1000):
+        super().__init__(max_queue)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def send(self, document):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(document, separators=(',', ':')) + '\n')
+
+
+class OTLPHttpExporter(BackgroundExporter):
+    """POST traces to an OTLP/HTTP collector"""
+
+    def __init__(self, endpoint, max_queue=1000, timeout=5):
+        super().__init__(max_queue)
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def send(self, document):
+        body = json.dumps(document).encode()
+        urlopen(Request(self.endpoint, data=body, headers={'Content-Type': 'application/json'}),
+                timeout=self.timeout).close()
+
+
+def _owner_position(func):
+    """Positional index (counting self) of func's owner argument, None if it has none"""
+    try:
+        parameters = list(inspect.signature(func).parameters)
+    except (TypeError, ValueError):
+        return None
+    for name in OWNER_ARGUMENTS:
+        if name in parameters:
+            return parameters.index(name)
+    return None
+
+
+def traced(layer):
+    """Decorator factory: record a span per call while a sampled trace is active"""
+    def decorator(func):
+        name = func.__name__
+        owner_index = _owner_position(func)
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            parent = _current_span.get()
+            if parent is None:
+                return func(self, *args, **kwargs)
+
+            span = Span(parent.trace, f"{type(self).__name__}.{name}", parent.span_id,
+                        attributes={'shoptrack.layer': layer})
+            owner = next((kwargs[key] for key in OWNER_ARGUMENTS if key in kwargs), None)
+            if owner is None and owner_index is not None and owner_index <= len(args):
+                owner = args[owner_index - 1]
+            if owner is not None:
+                span.attributes['shoptrack.owner_id'] = owner
+
+            token = _current_span.set(span)
+            try:
+                result = func(self, *args, **kwargs)
+                if isinstance(result, (list, tuple)):
+                    span.attributes['shoptrack.result_count'] = len(result)
+                return result
+            except Exception as e:
+                span.status = STATUS_ERROR
+                span.attributes['exception.type'] = type(e).__name__
+                raise
+            finally:
+                _current_span.reset(token)
+                span.finish()
+        return wrapper
+    return decorator
+
+
+def traceable(cls, layer):
+    """Give cls's public methods spans. They are only wrapped once an app
+    enables tracing, so untraced processes don't pay for the extra call."""
+    _traceable.append((cls, layer))
+    if _instrumented:
+        instrument_public_methods(cls, traced(layer))
+
+
+def _instrument_traceable():
+    global _instrumented
+    if not _instrumented:
+        _instrumented = True
+        for cls, layer in _traceable:
+            instrument_public_methods(cls, traced(layer))
+
+
+def _count_statement(statement, parameters, duration, method, rowcount):
+    span = _current_span.get()
+    if span is not None:
+        span.statements += 1
+        if rowcount > 0:
+            span.rows += rowcount
+
+
+def _parse_traceparent(value):
+    """(trace id, parent span id, sampled) from a W3C traceparent header, None if invalid"""
+    parts = (value or '').split('-')
+    if len(parts) < 4 or [len(part) for part in parts[:4]] != [2, 32, 16, 2]:
+        return None
+    try:
+        version, trace_id, parent_id, flags = (int(part, 16) for part in parts[:4])
+    except ValueError:
+        return None
+    # Version ff is invalid, version 00 has exactly four fields, and all-zero ids are invalid
+    if version == 0xff or (version == 0 and len(parts) != 4) or not trace_id or not parent_id:
+        return None
+    return parts[1].lower(), parts[2].lower(), bool(flags & 1)
+
+
+def init_app(app):
+    if not app.config['TRACING_ENABLED']:
+        return
+
+    if app.config['TRACE_EXPORTER'] == 'otlp':
+        exporter = OTLPHttpExporter(app.config['TRACE_OTLP_ENDPOINT'])
+    else:
+        exporter = FileExporter(app.config['TRACE_FILE'])
+    sample_rate = app.config['TRACE_SAMPLE_RATE']
+    service_name = app.config['TRACE_SERVICE_NAME']
+    trust_upstream = app.config['TRACE_TRUST_UPSTREAM']
+    install_listeners()
+    add_query_observer(_count_statement)
+    _instrument_traceable()
+    app.extensions['trace_exporter'] = exporter
+    atexit.register(exporter.flush)
+
+    @app.before_request
+    def start_trace():
+        trace_id = parent_id = None
+        sampled = random.random() < sample_rate
+        parent = _parse_traceparent(request.headers.get('traceparent'))
+        if parent is not None:
+            trace_id, parent_id, upstream_sampled = parent
+            # Anyone can send a sampled flag; only a trusted proxy's decides
+            if trust_upstream:
+                sampled = upstream_sampled
+        if not sampled:
+            return
+
+        span = Span(Trace(trace_id), f"{request.method} {request.url_rule or request.path}", parent_id,
+                    kind=SPAN_KIND_SERVER, attributes={'http.method': request.method, 'http.target': request.path})
+        g.trace_token = _current_span.set(span)
+        g.trace_span = span
+
+    @app.after_request
+    def tag_trace(response):
+        span = g.get('trace_span')
+        if span is not None:
+            span.attributes['http.status_code'] = response.status_code
+            if request.endpoint:
+                span.attributes['http.route'] = request.endpoint
+            if g.get('current_user_id'):
+                span.attributes['shoptrack.owner_id'] = g.current_user_id
+            response.headers['traceparent'] = f"00-{span.trace.trace_id}-{span.span_id}-01"
+        return response
+
+    @app.teardown_request
+    def finish_trace(exception=None):
+        span = g.pop('trace_span', None)
+        if span is None:
+            return
+        _current_span.reset(g.pop('trace_token'))
+        if exception is not None:
+            span.status = STATUS_ERROR
+        span.finish()
+        exporter.export(otlp_document(span.trace, service_name))
@@ -3,11 +3,15 @@ from .user_repository import UserRepository
 from .product_repository import ProductRepository
 from .history_repository import HistoryRepository
 from .session_repository import SessionRepository
+from .data_version_repository import DataVersionRepository
+from .registry import RepositoryRegistry
 
 __all__ = [
     'BaseRepository',
     'UserRepository',
     'ProductRepository', 
     'HistoryRepository',
-    'SessionRepository'
+    'SessionRepository',
+    'DataVersionRepository',
+    'RepositoryRegistry'
 ]
\ No newline at end of file
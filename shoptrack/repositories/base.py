@@ -1,6 +1,8 @@
 from typing import TypeVar, Generic, Optional, List, Type
 from sqlalchemy import select, func
 from sqlalchemy.exc import SQLAlchemyError
+from ..observability.context import track_repository_method, instrument_public_methods
+from ..observability.tracing import traceable
 import logging
 
 T = TypeVar("T")
@@ -11,6 +13,12 @@ class BaseRepository(Generic[T]):
         self.session = session
         self.logger = logging.getLogger(self.__class__.__name__)
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Attribute the SQL each query method issues to that method
+        instrument_public_methods(cls, track_repository_method)
+        traceable(cls, 'repository')
+
     def create(self, **kwargs) -> T:
         """Create a new record"""
         try:
@@ -19,7 +27,7 @@ class BaseRepository(Generic[T]):
             self.session.flush()
             return instance
         except SQLAlchemyError as e:
-            self.logger.error(f"Error creating {self.model_class.__name__}: {e}")
+            self.logger.error("Error creating %s: %s", self.model_class.__name__, e)
             raise
 
     def get_by_id(self, id: int) -> Optional[T]:
@@ -29,7 +37,7 @@ class BaseRepository(Generic[T]):
             result = self.session.execute(stmt).scalar_one_or_none()
             return result
         except SQLAlchemyError as e:
-            self.logger.error(f"Error fetching {self.model_class.__name__} id {id}: {e}")
+            self.logger.error("Error fetching %s id %s: %s", self.model_class.__name__, id, e)
             raise
 
     def get_all(self) -> List[T]:
@@ -39,7 +47,7 @@ class BaseRepository(Generic[T]):
             result = self.session.execute(stmt).scalars().all()
             return result
         except SQLAlchemyError as e:
-            self.logger.error(f"Error fetching all {self.model_class.__name__}: {e}")
+            self.logger.error("Error fetching all %s: %s", self.model_class.__name__, e)
             raise
 
     def get_by(self, **filters) -> Optional[T]:
@@ -50,7 +58,7 @@ class BaseRepository(Generic[T]):
                 stmt = stmt.where(getattr(self.model_class, field) == value)
             return self.session.execute(stmt).scalar_one_or_none()
         except SQLAlchemyError as e:
-            self.logger.error(f"Error filtering {self.model_class.__name__} by {filters}: {e}")
+            self.logger.error("Error filtering %s by %s: %s", self.model_class.__name__, filters, e)
             raise
 
     def filter_by(self, **filters) -> List[T]:
@@ -61,7 +69,7 @@ class BaseRepository(Generic[T]):
                 stmt = stmt.where(getattr(self.model_class, field) == value)
             return self.session.execute(stmt).scalars().all()
         except SQLAlchemyError as e:
-            self.logger.error(f"Error filtering {self.model_class.__name__} by {filters}: {e}")
+            self.logger.error("Error filtering %s by %s: %s", self.model_class.__name__, filters, e)
             raise
 
     def update(self, id: int, **kwargs) -> Optional[T]:
@@ -73,7 +81,7 @@ class BaseRepository(Generic[T]):
                     setattr(instance, field, value)
             return instance
         except SQLAlchemyError as e:
-            self.logger.error(f"Error updating {self.model_class.__name__} id {id}: {e}")
+            self.logger.error("Error updating %s id %s: %s", self.model_class.__name__, id, e)
             raise
 
     def delete(self, id: int) -> bool:
@@ -85,7 +93,7 @@ class BaseRepository(Generic[T]):
                 return True
             return False
         except SQLAlchemyError as e:
-            self.logger.error(f"Error deleting {self.model_class.__name__} id {id}: {e}")
+            self.logger.error("Error deleting %s id %s: %s", self.model_class.__name__, id, e)
             raise
 
     def exists(self, id: int) -> bool:
@@ -96,5 +104,8 @@ class BaseRepository(Generic[T]):
             stmt = select(func.count(self.model_class.id))
             return self.session.execute(stmt).scalar()
         except SQLAlchemyError as e:
-            self.logger.error(f"Error counting {self.model_class.__name__}: {e}")
-            raise
\ No newline at end of file
+            self.logger.error("Error counting %s: %s", self.model_class.__name__, e)
+            raise
+
+instrument_public_methods(BaseRepository, track_repository_method)
+traceable(BaseRepository, 'repository')
@@ -0,0 +1,43 @@
+from .base import BaseRepository
+from ..models.data_version import DataVersion
+from typing import Optional, Tuple
+from datetime import datetime
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+class DataVersionRepository(BaseRepository[DataVersion]):
+    def __init__(self, session):
+        super().__init__(DataVersion, session)
+
+    def get_version(self, owner_id: int) -> Tuple[int, Optional[datetime]]:
+        """Get (version, updated_at) for an owner, (0, None) if never written"""
+        stmt = (
+            select(DataVersion.version, DataVersion.updated_at)
+            .where(DataVersion.owner_id == owner_id)
+        )
+        row = self.session.execute(stmt).first()
+        return (row.version, row.updated_at) if row else (0, None)
+
+    def bump(self, owner_id: int) -> None:
+        """Atomically increment an owner's version, creating it on first write"""
+        try:
+            if self._increment(owner_id):
+                return
+            try:
+                with self.session.begin_nested():
+                    self.session.add(DataVersion(owner_id=owner_id, version=1))
+            except IntegrityError:
+                # Another transaction created the row first
+                self._increment(owner_id)
+        except SQLAlchemyError as e:
+            self.logger.error("Error bumping data version for owner %s: %s", owner_id, e)
+            raise
+
+    def _increment(self, owner_id: int) -> bool:
+        stmt = (
+            update(DataVersion)
+            .where(DataVersion.owner_id == owner_id)
+            .values(version=DataVersion.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        return self.session.execute(stmt).rowcount > 0
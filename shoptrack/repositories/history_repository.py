@@ -1,8 +1,216 @@
 from .base import BaseRepository
 from ..models.history import History
+from ..models.product import Product
+from ..models.rollup import ProductDailyTx, ProductTxRollup, UserDailyTx, UserTxRollup
+from ..models.user import User
+from datetime import date, datetime, timezone
+from decimal import Decimal
 from typing import Optional, List
-from sqlalchemy import select
-from sqlalchemy.orm import joinedload
+from sqlalchemy import case, cast, delete, event, func, inspect, insert, select, update, BigInteger, Date
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, attributes, joinedload, object_session
+
+# History columns the rollups are computed from
+ROLLUP_FIELDS = ('user_id', 'product_id', 'action', 'quantity', 'price', 'created_at')
+TOTAL_COLUMNS = ('buy_count', 'sell_count', 'bought_quantity', 'sold_quantity', 'spent', 'earned', 'price_total')
+# Rollup model -> the columns identifying its rows: an owner id, plus the
+# UTC day for the daily buckets
+ROLLUP_KEYS = {
+    UserTxRollup: ('user_id',),
+    ProductTxRollup: ('product_id',),
+    UserDailyTx: ('user_id', 'day'),
+    ProductDailyTx: ('product_id', 'day'),
+}
+_PENDING_KEY = 'history_rollup_pending'
+
+
+def _day(created_at):
+    """UTC day of a timestamp (naive ones, as SQLite returns them, are UTC)"""
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+def _totals(action, quantity, price, sign=1):
+    """Rollup deltas one history row contributes"""
+    price = Decimal(str(price))
+    buy = action == 'buy'
+    return {
+        'buy_count': sign if buy else 0,
+        'sell_count': 0 if buy else sign,
+        'bought_quantity': sign * quantity if buy else 0,
+        'sold_quantity': 0 if buy else sign * quantity,
+        'spent': sign * price * quantity if buy else 0,
+        'earned': 0 if buy else sign * price * quantity,
+        'price_total': sign * price,
+    }
+
+
+def _committed_values(connection, history):
+    """Values of a history row as its rollups last counted it"""
+    state = inspect(history)
+    values = []
+    for name in ROLLUP_FIELDS:
+        changes = attributes.get_history(history, name, passive=attributes.PASSIVE_NO_INITIALIZE)
+        old = changes.deleted or changes.unchanged
+        if not old:
+            # Expired, or set while expired so the old value was never
+            # loaded: the row in the database still has it
+            columns = [getattr(History, field) for field in ROLLUP_FIELDS]
+            return tuple(connection.execute(select(*columns).where(History.id == state.identity[0])).one())
+        values.append(old[0])
+    return tuple(values)
+
+
+def _rollup_changed(history):
+    return any(attributes.get_history(history, name).has_changes() for name in ROLLUP_FIELDS)
+
+
+def _day_expression(dialect):
+    if dialect == 'sqlite':
+        return func.date(History.created_at)
+    if dialect == 'postgresql':
+        return cast(func.timezone('UTC', History.created_at), Date)
+    return cast(History.created_at, Date)
+
+
+def _rollup_select(model, dialect):
+    """Per-key totals of a rollup model aggregated from the history table"""
+    columns = {'user_id': History.user_id, 'product_id': History.product_id, 'day': _day_expression(dialect)}
+    keys = [columns[name] for name in ROLLUP_KEYS[model]]
+    buy = History.action == 'buy'
+    # The money totals are whole cents (see models.rollup.Cents)
+    price_cents = cast(func.round(History.price * 100), BigInteger)
+    value = price_cents * History.quantity
+    return (
+        select(
+            *keys,
+            func.sum(case((buy, 1), else_=0)),
+            func.sum(case((buy, 0), else_=1)),
+            func.sum(case((buy, History.quantity), else_=0)),
+            func.sum(case((buy, 0), else_=History.quantity)),
+            func.sum(case((buy, value), else_=0)),
+            func.sum(case((buy, 0), else_=value)),
+            func.sum(price_cents),
+        )
+        .where(keys[0].is_not(None))
+        .group_by(*keys)
+    )
+
+
+def rebuild_rollups(executor) -> dict:
+    """Recompute every rollup from the history table on a session or
+    connection, for writes that skipped the ORM; returns row counts"""
+    dialect = executor.get_bind().dialect.name if isinstance(executor, Session) else executor.dialect.name
+    counts = {}
+    for model, keys in ROLLUP_KEYS.items():
+        executor.execute(delete(model))
+        result = executor.execute(
+            insert(model).from_select([*keys, *TOTAL_COLUMNS], _rollup_select(model, dialect))
+        )
+        counts[model.__tablename__] = result.rowcount
+    return counts
+
+
+def _pending(target):
+    """Rollup changes collected during the flush of target's session"""
+    return object_session(target).info.setdefault(_PENDING_KEY, {
+        'removed': [], 'added': [], 'gone': {'user_id': set(), 'product_id': set()},
+    })
+
+
+# Mapper events only fire for the classes involved, so flushes that touch
+# no history, users or products don't pay for the rollups
+
+@event.listens_for(History, 'before_insert')
+def _count_inserted_history(mapper, connection, history):
+    if history.created_at is None:
+        # Stamped here rather than by the server so the row and its day bucket agree
+        history.created_at = datetime.now(timezone.utc)
+    _store_in_utc(history)
+    _pending(history)['added'].append(history)
+
+
+@event.listens_for(History, 'before_update')
+def _count_updated_history(mapper, connection, history):
+    if not _rollup_changed(history):
+        return
+    pending = _pending(history)
+    pending['removed'].append(_committed_values(connection, history))
+    _store_in_utc(history)
+    pending['added'].append(history)
+
+
+@event.listens_for(History, 'before_delete')
+def _count_deleted_history(mapper, connection, history):
+    _pending(history)['removed'].append(_committed_values(connection, history))
+
+
+@event.listens_for(User, 'after_delete')
+def _forget_deleted_user(mapper, connection, user):
+    _pending(user)['gone']['user_id'].add(user.id)
+
+
+@event.listens_for(Product, 'after_delete')
+def _forget_deleted_product(mapper, connection, product):
+    _pending(product)['gone']['product_id'].add(product.id)
+
+
+def _store_in_utc(history):
+    """SQLite keeps only the wall time, so an offset other than UTC would
+    shift the row out of its day bucket when read back"""
+    created_at = history.created_at
+    if created_at is not None and created_at.tzinfo is not None and created_at.utcoffset():
+        history.created_at = created_at.astimezone(timezone.utc)
+
+
+@event.listens_for(Session, 'after_flush')
+def _maintain_rollups(session, flush_context):
+    """Apply the flush's history changes to the rollups, in its transaction"""
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending is None:
+        return
+    gone = pending['gone']
+    added = [tuple(getattr(history, name) for name in ROLLUP_FIELDS) for history in pending['added']]
+
+    changes = {model: {} for model in ROLLUP_KEYS}
+    for values, sign in [(values, -1) for values in pending['removed']] + [(values, 1) for values in added]:
+        user_id, product_id, action, quantity, price, created_at = values
+        row = {'user_id': user_id, 'product_id': product_id, 'day': _day(created_at)}
+        deltas = _totals(action, quantity, price, sign)
+        for model, keys in ROLLUP_KEYS.items():
+            key = tuple(row[name] for name in keys)
+            if key[0] is None or key[0] in gone[keys[0]]:
+                continue
+            totals = changes[model].setdefault(key, dict.fromkeys(TOTAL_COLUMNS, 0))
+            for column, delta in deltas.items():
+                totals[column] += delta
+
+    connection = session.connection()
+    for model, keys in ROLLUP_KEYS.items():
+        for key, totals in changes[model].items():
+            _add_to_rollup(connection, model, dict(zip(keys, key)), totals)
+        if gone[keys[0]]:
+            connection.execute(delete(model).where(getattr(model, keys[0]).in_(gone[keys[0]])))
+
+
+def _add_to_rollup(connection, model, key, totals):
+    """Atomically add totals to a rollup row, creating it on first use"""
+    table = model.__table__
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        upsert = (sqlite if dialect == 'sqlite' else postgresql).insert(table).values({**key, **totals})
+        increments = {column: table.c[column] + upsert.excluded[column] for column in totals}
+        connection.execute(upsert.on_conflict_do_update(
+            index_elements=list(key), set_={**increments, 'updated_at': func.now()},
+        ))
+        return
+    stmt = update(table).values({column: table.c[column] + delta for column, delta in totals.items()})
+    for column, value in key.items():
+        stmt = stmt.where(table.c[column] == value)
+    if connection.execute(stmt).rowcount == 0:
+        connection.execute(insert(table).values({**key, **totals}))
+
 
 class HistoryRepository(BaseRepository[History]):
     def __init__(self, session):
@@ -75,14 +283,12 @@ class HistoryRepository(BaseRepository[History]):
 
     def get_user_transaction_summary(self, user_id: int) -> dict:
         """Get summary of user's transaction history"""
-        buy_transactions = self.filter_by(user_id=user_id, action="buy")
-        sell_transactions = self.filter_by(user_id=user_id, action="sell")
-        
-        total_bought = sum(t.quantity for t in buy_transactions)
-        total_sold = sum(t.quantity for t in sell_transactions)
-        total_spent = sum(t.price * t.quantity for t in buy_transactions)
-        total_earned = sum(t.price * t.quantity for t in sell_transactions)
-        
+        rollup = self.get_user_rollup(user_id)
+        total_bought = rollup.bought_quantity if rollup else 0
+        total_sold = rollup.sold_quantity if rollup else 0
+        total_spent = rollup.spent if rollup else 0
+        total_earned = rollup.earned if rollup else 0
+
         return {
             "total_bought": total_bought,
             "total_sold": total_sold,
@@ -91,3 +297,42 @@ class HistoryRepository(BaseRepository[History]):
             "net_quantity": total_bought - total_sold,
             "net_amount": total_earned - total_spent
         }
+
+    def get_user_rollup(self, user_id: int) -> Optional[UserTxRollup]:
+        """Transaction totals of a user, None if they have no history"""
+        return self.session.execute(
+            select(UserTxRollup).where(UserTxRollup.user_id == user_id)
+        ).scalar_one_or_none()
+
+    def get_product_rollup(self, product_id: int) -> Optional[ProductTxRollup]:
+        """Transaction totals of a product, None if it has no history"""
+        return self.session.execute(
+            select(ProductTxRollup).where(ProductTxRollup.product_id == product_id)
+        ).scalar_one_or_none()
+
+    def get_rollup_totals(self, user_id: Optional[int] = None, product_id: Optional[int] = None) -> dict:
+        """Transaction totals of a user, a product or (neither given) every
+        user, as a dict of TOTAL_COLUMNS; zeros when there is no history"""
+        model = ProductTxRollup if product_id is not None else UserTxRollup
+        stmt = select(*(func.coalesce(func.sum(getattr(model, column)), 0) for column in TOTAL_COLUMNS))
+        if product_id is not None:
+            stmt = stmt.where(ProductTxRollup.product_id == product_id)
+        elif user_id is not None:
+            stmt = stmt.where(UserTxRollup.user_id == user_id)
+        return dict(zip(TOTAL_COLUMNS, self.session.execute(stmt).one()))
+
+    def rebuild_rollups(self) -> dict:
+        """Recompute every rollup from the history table; returns row counts"""
+        return rebuild_rollups(self.session)
+
+    def find_daily_totals(self, start: date, end: date, user_id: Optional[int] = None,
+                          product_id: Optional[int] = None) -> List:
+        """Daily transaction totals of a user or a product between two days, inclusive"""
+        model, owner = (ProductDailyTx, ProductDailyTx.product_id == product_id) if product_id is not None \
+            else (UserDailyTx, UserDailyTx.user_id == user_id)
+        stmt = (
+            select(model)
+            .where(owner, model.day >= start, model.day <= end)
+            .order_by(model.day)
+        )
+        return self.session.execute(stmt).scalars().all()
@@ -0,0 +1,32 @@
+from .user_repository import UserRepository
+from .product_repository import ProductRepository
+from .history_repository import HistoryRepository
+from .session_repository import SessionRepository
+from .data_version_repository import DataVersionRepository
+
+class RepositoryRegistry:
+    """Repositories bound to one session, created on first use and shared
+    by every service working on that session"""
+
+    repository_classes = {
+        'user': UserRepository,
+        'product': ProductRepository,
+        'history': HistoryRepository,
+        'session': SessionRepository,
+        'data_version': DataVersionRepository
+    }
+
+    def __init__(self, session):
+        self.session = session
+        self._repositories = {}
+
+    def get(self, name):
+        """Get the repository registered under name, creating it if needed"""
+        repository = self._repositories.get(name)
+        if repository is None:
+            repository = self.repository_classes[name](self.session)
+            self._repositories[name] = repository
+        return repository
+
+    def __contains__(self, name):
+        return name in self._repositories
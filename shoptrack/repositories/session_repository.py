@@ -59,9 +59,13 @@ class SessionRepository(BaseRepository[Session]):
         session = self.get_by_id(session_id)
         if not session:
             return False
-        # Use timezone-aware datetime for comparison
+        # Use timezone-aware datetime for comparison; SQLite hands back
+        # naive datetimes, which are stored in UTC
         now = datetime.now(timezone.utc)
-        return session.expires > now
+        expires = session.expires
+        if expires.tzinfo is None:
+            expires = expires.replace(tzinfo=timezone.utc)
+        return expires > now
 
     def create_session(self, user_id: int, expires: datetime) -> Session:
         """Create a new session for a user"""
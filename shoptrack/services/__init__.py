@@ -4,6 +4,7 @@ from .user_service import UserService
 from .product_service import ProductService
 from .session_service import SessionService
 from .history_service import HistoryService
+from .container import ServiceContainer
 
 __all__ = [
     'BaseService',
@@ -11,5 +12,6 @@ __all__ = [
     'UserService',
     'ProductService',
     'SessionService',
-    'HistoryService'
+    'HistoryService',
+    'ServiceContainer'
 ]
@@ -1,13 +1,14 @@
 from .base import BaseService
-from werkzeug.security import check_password_hash, generate_password_hash
 from datetime import datetime, timedelta
 
 class AuthService(BaseService):
-    def __init__(self, session):
-        super().__init__(session)
+    def __init__(self, session, repositories=None):
+        super().__init__(session, repositories)
 
     def authenticate_user(self, username, password):
         """Authenticate a user"""
+        from werkzeug.security import check_password_hash
+
         user = self.user_repository.find_by_username(username.lower())
         if not user:
             return None
@@ -17,6 +18,8 @@ class AuthService(BaseService):
 
     def register_user(self, username, password, email=None):
         """Register a user"""
+        from werkzeug.security import generate_password_hash
+
         try:
             hashed_password = generate_password_hash(password)
             
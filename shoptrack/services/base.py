@@ -1,15 +1,36 @@
 import logging
-from ..repositories import UserRepository, ProductRepository, HistoryRepository, SessionRepository
+from ..repositories.registry import RepositoryRegistry
+from ..observability.tracing import traceable
 
 class BaseService:
-    def __init__(self, session):
+    def __init__(self, session, repositories=None):
         self.session = session
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.repositories = repositories if repositories is not None else RepositoryRegistry(session)
 
-        self.user_repository = UserRepository(self.session)
-        self.product_repository = ProductRepository(self.session)
-        self.history_repository = HistoryRepository(self.session)
-        self.session_repository = SessionRepository(self.session)
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        traceable(cls, 'service')
+
+    @property
+    def user_repository(self):
+        return self.repositories.get('user')
+
+    @property
+    def product_repository(self):
+        return self.repositories.get('product')
+
+    @property
+    def history_repository(self):
+        return self.repositories.get('history')
+
+    @property
+    def session_repository(self):
+        return self.repositories.get('session')
+
+    @property
+    def data_version_repository(self):
+        return self.repositories.get('data_version')
 
     def commit(self):
         """Commit the session"""
@@ -23,9 +44,18 @@ class BaseService:
         """Close the session"""
         self.session.close()
 
+    def get_data_version(self, owner_id):
+        """Get (version, updated_at) of an owner's products and history"""
+        return self.data_version_repository.get_version(owner_id)
+
+    def bump_data_version(self, owner_id):
+        """Mark an owner's products and history as changed"""
+        if owner_id:
+            self.data_version_repository.bump(owner_id)
+
     def handle_error(self, error, message):
         """Handle an error"""
-        self.logger.error(f"{message}: {error}")
+        self.logger.error("%s: %s", message, error)
         self.rollback()
         raise error
 
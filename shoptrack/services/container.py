@@ -0,0 +1,33 @@
+from ..repositories.registry import RepositoryRegistry
+from .auth_service import AuthService
+from .session_service import SessionService
+from .user_service import UserService
+from .product_service import ProductService
+from .history_service import HistoryService
+
+class ServiceContainer:
+    """Services for one request, created on first use and sharing a single
+    session and set of repositories"""
+
+    service_classes = {
+        'auth': AuthService,
+        'session': SessionService,
+        'user': UserService,
+        'product': ProductService,
+        'history': HistoryService
+    }
+
+    def __init__(self, session):
+        self.session = session
+        self.repositories = RepositoryRegistry(session)
+        self._services = {}
+
+    def __getitem__(self, name):
+        service = self._services.get(name)
+        if service is None:
+            service = self.service_classes[name](self.session, self.repositories)
+            self._services[name] = service
+        return service
+
+    def __contains__(self, name):
+        return name in self._services
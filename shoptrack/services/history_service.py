@@ -1,8 +1,38 @@
 from .base import BaseService
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+TIMESERIES_BUCKETS = ('day', 'week', 'month')
+TIMESERIES_COLUMNS = ('buy_count', 'sell_count', 'bought_quantity', 'sold_quantity', 'spent', 'earned')
+# Longest range one timeseries request may cover
+MAX_TIMESERIES_DAYS = 3660
+
+
+def bucket_start(day, bucket):
+    """First day of the bucket (weeks start on Monday) holding day"""
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def timeseries_range(start=None, end=None):
+    """Range of a timeseries with the defaults filled in: up to today, and a
+    year back from its end"""
+    end = end or datetime.now(timezone.utc).date()
+    return start or end - timedelta(days=364), end
+
+
+def _next_bucket(start, bucket):
+    if bucket == 'month':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=7 if bucket == 'week' else 1)
+
 
 class HistoryService(BaseService):
-    def __init__(self, session):
-        super().__init__(session)
+    def __init__(self, session, repositories=None):
+        super().__init__(session, repositories)
 
     def create_transaction(self, product_id, product_name, user_id, price, quantity, action):
         """Create a new transaction record"""
@@ -38,6 +68,7 @@ class HistoryService(BaseService):
                 quantity=quantity,
                 action=action
             )
+            self.bump_data_version(user_id)
             return history
         except Exception as e:
             self.handle_error(e, "Transaction creation failed")
@@ -125,9 +156,10 @@ class HistoryService(BaseService):
     def get_product_transaction_summary(self, product_id):
         """Get transaction summary for a specific product"""
         try:
-            product_transactions = self.history_repository.find_by_product(product_id)
-            
-            if not product_transactions:
+            rollup = self.history_repository.get_product_rollup(product_id)
+            total_transactions = rollup.buy_count + rollup.sell_count if rollup else 0
+
+            if not total_transactions:
                 return {
                     "total_transactions": 0,
                     "total_bought": 0,
@@ -135,24 +167,14 @@ class HistoryService(BaseService):
                     "total_revenue": 0,
                     "average_price": 0
                 }
-            
-            buy_transactions = [t for t in product_transactions if t.action == "buy"]
-            sell_transactions = [t for t in product_transactions if t.action == "sell"]
-            
-            total_bought = sum(t.quantity for t in buy_transactions)
-            total_sold = sum(t.quantity for t in sell_transactions)
-            total_revenue = sum(t.price * t.quantity for t in sell_transactions)
-            
-            all_prices = [t.price for t in product_transactions]
-            average_price = sum(all_prices) / len(all_prices) if all_prices else 0
-            
+
             return {
-                "total_transactions": len(product_transactions),
-                "total_bought": total_bought,
-                "total_sold": total_sold,
-                "total_revenue": total_revenue,
-                "average_price": average_price,
-                "net_quantity": total_bought - total_sold
+                "total_transactions": total_transactions,
+                "total_bought": rollup.bought_quantity,
+                "total_sold": rollup.sold_quantity,
+                "total_revenue": rollup.earned,
+                "average_price": rollup.price_total / total_transactions,
+                "net_quantity": rollup.bought_quantity - rollup.sold_quantity
             }
         except Exception as e:
             self.handle_error(e, "Product transaction summary failed")
@@ -161,45 +183,91 @@ class HistoryService(BaseService):
         """Get general transaction statistics"""
         try:
             if user_id and product_id:
-                # Both user and product specified
+                # Both user and product specified: no rollup covers the pair
                 user_transactions = self.history_repository.find_by_user(user_id)
                 product_transactions = self.history_repository.find_by_product(product_id)
                 transactions = [t for t in user_transactions if t in product_transactions]
-            elif user_id:
-                transactions = self.history_repository.find_by_user(user_id)
-            elif product_id:
-                transactions = self.history_repository.find_by_product(product_id)
-            else:
-                transactions = self.history_repository.get_all()
-            
-            if not transactions:
-                return {
-                    "total_transactions": 0,
-                    "total_buy_transactions": 0,
-                    "total_sell_transactions": 0,
-                    "total_volume": 0,
-                    "total_value": 0,
-                    "average_transaction_value": 0
-                }
-            
-            buy_transactions = [t for t in transactions if t.action == "buy"]
-            sell_transactions = [t for t in transactions if t.action == "sell"]
-            
-            total_volume = sum(t.quantity for t in transactions)
-            total_value = sum(t.price * t.quantity for t in transactions)
-            average_transaction_value = total_value / len(transactions) if transactions else 0
-            
+                return self._statistics_of(transactions)
+
+            totals = self.history_repository.get_rollup_totals(user_id=user_id or None,
+                                                               product_id=product_id or None)
+
+            total_transactions = totals['buy_count'] + totals['sell_count']
+            if not total_transactions:
+                return self._statistics_of([])
+            total_value = totals['spent'] + totals['earned']
             return {
-                "total_transactions": len(transactions),
-                "total_buy_transactions": len(buy_transactions),
-                "total_sell_transactions": len(sell_transactions),
-                "total_volume": total_volume,
+                "total_transactions": total_transactions,
+                "total_buy_transactions": totals['buy_count'],
+                "total_sell_transactions": totals['sell_count'],
+                "total_volume": totals['bought_quantity'] + totals['sold_quantity'],
                 "total_value": total_value,
-                "average_transaction_value": average_transaction_value
+                "average_transaction_value": total_value / total_transactions
             }
         except Exception as e:
             self.handle_error(e, "Transaction statistics failed")
 
+    def _statistics_of(self, transactions):
+        """Statistics computed from loaded transactions"""
+        if not transactions:
+            return {
+                "total_transactions": 0,
+                "total_buy_transactions": 0,
+                "total_sell_transactions": 0,
+                "total_volume": 0,
+                "total_value": 0,
+                "average_transaction_value": 0
+            }
+
+        buy_transactions = [t for t in transactions if t.action == "buy"]
+        sell_transactions = [t for t in transactions if t.action == "sell"]
+
+        total_volume = sum(t.quantity for t in transactions)
+        total_value = sum(t.price * t.quantity for t in transactions)
+        average_transaction_value = total_value / len(transactions) if transactions else 0
+
+        return {
+            "total_transactions": len(transactions),
+            "total_buy_transactions": len(buy_transactions),
+            "total_sell_transactions": len(sell_transactions),
+            "total_volume": total_volume,
+            "total_value": total_value,
+            "average_transaction_value": average_transaction_value
+        }
+
+    def get_transaction_timeseries(self, user_id=None, product_id=None, bucket='day', start=None, end=None):
+        """Buy and sell totals per day, week or month of a user's or a
+        product's history, read from the daily buckets. The range is widened
+        to whole buckets, and empty buckets are included so the series has
+        no gaps."""
+        try:
+            if bucket not in TIMESERIES_BUCKETS:
+                raise ValueError("Bucket must be 'day', 'week' or 'month'")
+
+            start, end = timeseries_range(start, end)
+            if start > end:
+                raise ValueError("Start date cannot be after end date")
+            if (end - start).days >= MAX_TIMESERIES_DAYS:
+                raise ValueError(f"Date range cannot exceed {MAX_TIMESERIES_DAYS} days")
+
+            series = {}
+            current = bucket_start(start, bucket)
+            while current <= end:
+                series[current] = dict.fromkeys(TIMESERIES_COLUMNS, 0)
+                series[current].update(spent=Decimal('0.00'), earned=Decimal('0.00'))
+                current = _next_bucket(current, bucket)
+            first, last = min(series), current - timedelta(days=1)
+
+            for daily in self.history_repository.find_daily_totals(first, last, user_id=user_id,
+                                                                   product_id=product_id):
+                totals = series[bucket_start(daily.day, bucket)]
+                for column in TIMESERIES_COLUMNS:
+                    totals[column] += getattr(daily, column)
+
+            return [{'start': day.isoformat(), **totals} for day, totals in series.items()]
+        except Exception as e:
+            self.handle_error(e, "Transaction timeseries failed")
+
     def search_transactions(self, query, user_id=None, product_id=None):
         """Search transactions by product name"""
         try:
@@ -261,6 +329,7 @@ class HistoryService(BaseService):
                 return False
             
             result = self.history_repository.delete(history_id)
+            self.bump_data_version(transaction.user_id)
             return result
         except Exception as e:
             self.handle_error(e, "Transaction deletion failed")
@@ -299,6 +368,7 @@ class HistoryService(BaseService):
                 updates['action'] = action
             
             transaction = self.history_repository.update(history_id, **updates)
+            self.bump_data_version(transaction.user_id)
             return transaction
         except Exception as e:
             self.handle_error(e, "Transaction update failed")
@@ -1,8 +1,8 @@
 from .base import BaseService
 
 class ProductService(BaseService):
-    def __init__(self, session):
-        super().__init__(session)
+    def __init__(self, session, repositories=None):
+        super().__init__(session, repositories)
 
     def create_product(self, name, price, stock=0, description=None, owner_id=None):
         """Create a new product"""
@@ -20,6 +20,7 @@ class ProductService(BaseService):
                 description=description,
                 owner_id=owner_id
             )
+            self.bump_data_version(owner_id)
             return product
         except Exception as e:
             self.handle_error(e, "Product creation failed")
@@ -78,6 +79,7 @@ class ProductService(BaseService):
                 updates['description'] = description
             
             product = self.product_repository.update(product_id, **updates)
+            self.bump_data_version(product.owner_id)
             return product
         except Exception as e:
             self.handle_error(e, "Product update failed")
@@ -94,6 +96,7 @@ class ProductService(BaseService):
                 return False
             
             result = self.product_repository.delete(product_id)
+            self.bump_data_version(product.owner_id)
             return result
         except Exception as e:
             self.handle_error(e, "Product deletion failed")
@@ -114,6 +117,7 @@ class ProductService(BaseService):
             
             new_stock = product.stock + quantity
             updated_product = self.product_repository.update(product_id, stock=new_stock)
+            self.bump_data_version(product.owner_id)
             
             # Create transaction record for stock addition (buy)
             if updated_product:
@@ -126,9 +130,9 @@ class ProductService(BaseService):
                         quantity=quantity,
                         action="buy"
                     )
-                    self.logger.info(f"Created buy transaction for product {product_id}, quantity {quantity}")
+                    self.logger.info("Created buy transaction for product %s, quantity %s", product_id, quantity)
                 except Exception as e:
-                    self.logger.error(f"Failed to create transaction: {e}")
+                    self.logger.error("Failed to create transaction: %s", e)
                     # Don't fail the stock update if transaction creation fails
             
             return updated_product
@@ -154,6 +158,7 @@ class ProductService(BaseService):
             
             new_stock = product.stock - quantity
             updated_product = self.product_repository.update(product_id, stock=new_stock)
+            self.bump_data_version(product.owner_id)
             
             # Create transaction record for stock removal (sell)
             if updated_product:
@@ -166,9 +171,9 @@ class ProductService(BaseService):
                         quantity=quantity,
                         action="sell"
                     )
-                    self.logger.info(f"Created sell transaction for product {product_id}, quantity {quantity}")
+                    self.logger.info("Created sell transaction for product %s, quantity %s", product_id, quantity)
                 except Exception as e:
-                    self.logger.error(f"Failed to create transaction: {e}")
+                    self.logger.error("Failed to create transaction: %s", e)
                     # Don't fail the stock update if transaction creation fails
             
             return updated_product
@@ -191,6 +196,8 @@ class ProductService(BaseService):
             
             old_stock = product.stock
             updated_product = self.product_repository.update(product_id, stock=quantity)
+            if quantity != old_stock:
+                self.bump_data_version(product.owner_id)
             
             # Create transaction record for stock change
             if updated_product:
@@ -215,9 +222,9 @@ class ProductService(BaseService):
                         quantity=transaction_quantity,
                         action=action
                     )
-                    self.logger.info(f"Created {action} transaction for product {product_id}, quantity {transaction_quantity}")
+                    self.logger.info("Created %s transaction for product %s, quantity %s", action, product_id, transaction_quantity)
                 except Exception as e:
-                    self.logger.error(f"Failed to create transaction: {e}")
+                    self.logger.error("Failed to create transaction: %s", e)
                     # Don't fail the stock update if transaction creation fails
             
             return updated_product
@@ -238,7 +245,9 @@ class ProductService(BaseService):
             if not product:
                 return None
             
-            return self.product_repository.update(product_id, price=new_price)
+            product = self.product_repository.update(product_id, price=new_price)
+            self.bump_data_version(product.owner_id)
+            return product
         except Exception as e:
             self.handle_error(e, "Price update failed")
 
@@ -337,6 +346,14 @@ class ProductService(BaseService):
             if not new_owner:
                 raise ValueError("New owner not found")
             
-            return self.product_repository.update(product_id, owner_id=new_owner_id)
+            product = self.product_repository.get_by_id(product_id)
+            if not product:
+                return None
+
+            old_owner_id = product.owner_id
+            product = self.product_repository.update(product_id, owner_id=new_owner_id)
+            self.bump_data_version(old_owner_id)
+            self.bump_data_version(new_owner_id)
+            return product
         except Exception as e:
             self.handle_error(e, "Ownership transfer failed")
@@ -2,8 +2,8 @@ from .base import BaseService
 from datetime import datetime, timedelta, timezone
 
 class SessionService(BaseService):
-    def __init__(self, session):
-        super().__init__(session)
+    def __init__(self, session, repositories=None):
+        super().__init__(session, repositories)
 
     def create_session(self, user_id):
         """Create a session"""
@@ -1,12 +1,13 @@
 from .base import BaseService
-from werkzeug.security import generate_password_hash
 
 class UserService(BaseService):
-    def __init__(self, session):
-        super().__init__(session)
+    def __init__(self, session, repositories=None):
+        super().__init__(session, repositories)
 
     def create_user(self, username, password, email=None):
         """Create a user"""
+        from werkzeug.security import generate_password_hash
+
         try:
             user = self.user_repository.create(
                 username=username.lower(), 
@@ -67,6 +68,8 @@ class UserService(BaseService):
 
     def change_password(self, user_id, password):
         """Change a user password"""
+        from werkzeug.security import generate_password_hash
+
         try:
             # Validate user exists
             if not user_id:
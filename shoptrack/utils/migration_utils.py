@@ -0,0 +1,132 @@
+import threading
+import time
+from alembic import op
+from sqlalchemy import text
+
+def _dialect_name():
+    return op.get_bind().dialect.name
+
+def _drop_invalid_postgres_index(index_name):
+    """Drop an index left INVALID by an interrupted CREATE INDEX CONCURRENTLY"""
+    invalid = op.get_bind().execute(
+        text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ),
+        {'name': index_name}
+    ).scalar()
+    if invalid:
+        op.drop_index(index_name, postgresql_concurrently=True, if_exists=True)
+
+def create_index_online(index_name, table_name, columns, unique=False, **kw):
+    """Create an index without blocking writes to the table.
+
+    On Postgres this runs CREATE INDEX CONCURRENTLY outside the migration
+    transaction; on SQLite it goes through a batch operation so the table
+    is rebuilt when the change requires it.
+    """
+    dialect = _dialect_name()
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            _drop_invalid_postgres_index(index_name)
+            op.create_index(
+                index_name, table_name, columns, unique=unique,
+                postgresql_concurrently=True, if_not_exists=True, **kw
+            )
+    elif dialect == 'sqlite':
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.create_index(index_name, columns, unique=unique, **kw)
+    else:
+        op.create_index(index_name, table_name, columns, unique=unique, **kw)
+
+def drop_index_online(index_name, table_name):
+    """Drop an index without blocking reads and writes to the table"""
+    dialect = _dialect_name()
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True)
+    elif dialect == 'sqlite':
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_index(index_name)
+    else:
+        op.drop_index(index_name, table_name=table_name)
+
+
+class LockMonitor:
+    """Background thread reporting lock waits and index build progress of a
+    Postgres backend while it runs migrations"""
+
+    ACTIVITY_SQL = text(
+        "SELECT wait_event_type, wait_event, pg_blocking_pids(pid) AS blockers, "
+        "extract(epoch FROM now() - query_start) AS running_for, left(query, 120) AS query "
+        "FROM pg_stat_activity WHERE pid = :pid"
+    )
+    PROGRESS_SQL = text(
+        "SELECT phase, blocks_done, blocks_total, tuples_done, tuples_total "
+        "FROM pg_stat_progress_create_index WHERE pid = :pid"
+    )
+
+    def __init__(self, engine, backend_pid, report, interval=2.0):
+        self.engine = engine
+        self.backend_pid = backend_pid
+        self.report = report
+        self.interval = interval
+        self.lock_waits = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='migration-lock-monitor', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=self.interval * 2)
+
+    def _run(self):
+        last_message = None
+        with self.engine.connect() as connection:
+            while not self._stop.wait(self.interval):
+                message = self._poll(connection)
+                if message and message != last_message:
+                    self.report(message)
+                last_message = message
+                connection.rollback()
+
+    def _poll(self, connection):
+        activity = connection.execute(self.ACTIVITY_SQL, {'pid': self.backend_pid}).mappings().first()
+        if not activity:
+            return None
+
+        if activity['wait_event_type'] == 'Lock':
+            self.lock_waits += 1
+            blockers = ', '.join(str(pid) for pid in activity['blockers']) or 'unknown'
+            return (
+                f"waiting {activity['running_for'] or 0:.0f}s for {activity['wait_event']} lock "
+                f"(blocked by pid {blockers}): {activity['query']}"
+            )
+
+        progress = connection.execute(self.PROGRESS_SQL, {'pid': self.backend_pid}).mappings().first()
+        if progress:
+            done, total = progress['blocks_done'], progress['blocks_total']
+            if total:
+                return f"index build: {progress['phase']} ({done * 100 // total}% of {total} blocks)"
+            return f"index build: {progress['phase']}"
+        return None
+
+
+class MigrationProgress:
+    """on_version_apply callback that reports each applied migration step"""
+
+    def __init__(self, total, report):
+        self.total = total
+        self.report = report
+        self.applied = 0
+        self._started = time.monotonic()
+
+    def __call__(self, ctx, step, heads, run_args):
+        self.applied += 1
+        elapsed = time.monotonic() - self._started
+        self._started = time.monotonic()
+        direction = 'upgraded to' if step.is_upgrade else 'downgraded from'
+        self.report(f"[{self.applied}/{self.total or '?'}] {direction} {step.up_revision_id} in {elapsed:.1f}s")
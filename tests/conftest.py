@@ -1,34 +1,71 @@
 import pytest
 import os
+from flask.testing import FlaskClient
 from shoptrack import create_app
-from shoptrack.database import engine, Base
+from shoptrack.observability.queries import collect_queries
+from shoptrack import models  # noqa: F401 - registers the tables on Base.metadata
+from shoptrack.database import engine, Base, ScopedSession
 
 
+class QueryBudgetClient(FlaskClient):
+    """Test client counting the statements each call issues, optionally
+    failing the test when a call goes over budget"""
+    query_budget = None
+
+    def open(self, *args, **kwargs):
+        with collect_queries() as stats:
+            response = super().open(*args, **kwargs)
+        self.last_queries = stats
+        if self.query_budget is not None and stats.count > self.query_budget:
+            statements = '\n'.join(
+                f"  {i}. [{method[0] + '.' + method[1] if method else '-'}] {' '.join(statement.split())}"
+                for i, (statement, _, method, _) in enumerate(stats.statements, 1)
+            )
+            pytest.fail(
+                f"{response.request.method} {response.request.path} issued {stats.count} statements, "
+                f"budget is {self.query_budget}:\n{statements}",
+                pytrace=False
+            )
+        return response
+
+
+@pytest.fixture(scope='session')
+def schema():
+    """Create the tables once for the whole test run"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
 @pytest.fixture(scope='function')
-def app():
+def app(schema):
     """Create a test app for each test function"""
     os.environ['FLASK_ENV'] = 'testing'
     app = create_app('testing')
     
     with app.app_context():
-        # Create fresh tables for each test
-        Base.metadata.drop_all(bind=engine)
-        Base.metadata.create_all(bind=engine)
         yield app
-        # Clean up after test
-        Base.metadata.drop_all(bind=engine)
+        # Clean up after test: empty every table instead of recreating the schema
+        ScopedSession.remove()
+        with engine.begin() as connection:
+            for table in reversed(Base.metadata.sorted_tables):
+                connection.execute(table.delete())
 
 @pytest.fixture(scope='function')
-def client(app):
-    """Create a test client"""
-    return app.test_client()
+def client(app, request):
+    """Create a test client, enforcing the test's query_budget marker if any"""
+    app.test_client_class = QueryBudgetClient
+    client = app.test_client()
+    marker = request.node.get_closest_marker('query_budget')
+    if marker is not None:
+        client.query_budget = marker.args[0]
+    return client
 
 @pytest.fixture(scope='function')
 def db_session(app):
     """Create a test database session"""
-    from shoptrack.database import ScopedSession
     session = ScopedSession()
     yield session
     session.rollback()
     session.close()
-    ScopedSession.remove()
\ No newline at end of file
+    ScopedSession.remove()
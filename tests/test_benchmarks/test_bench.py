@@ -0,0 +1,76 @@
+import json
+from shoptrack.benchmarks.data import history_database
+from shoptrack.benchmarks.runner import compare, measure
+from shoptrack.benchmarks.suite import run_suite
+
+
+def _result(name, median, iqr=0.0, rows=1000):
+    return {'name': name, 'rows': rows, 'median_s': median, 'iqr_s': iqr}
+
+
+class TestRunner:
+    """Test timing and baseline comparison"""
+
+    def test_measure_rounds(self):
+        """Test a fast case is looped and repeated as asked"""
+        calls = []
+
+        timing = measure(lambda: calls.append(1), 'noop', repeat=4, min_round_time=0.001)
+
+        assert len(timing.rounds) == 4
+        assert timing.loops > 1
+        assert len(calls) == 1 + 4 * timing.loops
+        assert timing.to_dict()['median_s'] >= 0
+
+    def test_compare_flags_regressions_and_improvements(self):
+        """Test changes beyond the threshold and the noise are flagged"""
+        baseline = [_result('slower', 0.010), _result('faster', 0.010), _result('steady', 0.010)]
+        results = [_result('slower', 0.013), _result('faster', 0.007), _result('steady', 0.0105), _result('added', 1)]
+
+        statuses = {entry['name']: entry['status'] for entry in compare(results, baseline, threshold=0.1)}
+
+        assert statuses == {'slower': 'regression', 'faster': 'improvement', 'steady': 'same', 'added': 'new'}
+
+    def test_compare_ignores_noisy_cases(self):
+        """Test a change within the spread of the runs isn't a regression"""
+        comparison = compare([_result('noisy', 0.013, iqr=0.004)], [_result('noisy', 0.010, iqr=0.002)])
+
+        assert comparison[0]['status'] == 'same'
+
+
+class TestSuite:
+    """Test seeding and running the benchmark suite"""
+
+    def test_database_cached(self, tmp_path):
+        """Test a seeded database is built once and reused"""
+        path = history_database(str(tmp_path), 200)
+        modified = (tmp_path / path.split('/')[-1]).stat().st_mtime_ns
+
+        assert history_database(str(tmp_path), 200) == path
+        assert (tmp_path / path.split('/')[-1]).stat().st_mtime_ns == modified
+
+    def test_run_suite(self, tmp_path):
+        """Test each chosen case is timed at each size"""
+        document = run_suite([200, 100], str(tmp_path), ['HistoryRepository.find_by_user', 'History.to_dict_list'],
+                             repeat=3, report=lambda message: None)
+
+        assert [(r['rows'], r['name']) for r in document['results']] == [
+            (100, 'HistoryRepository.find_by_user'), (100, 'History.to_dict_list'),
+            (200, 'HistoryRepository.find_by_user'), (200, 'History.to_dict_list'),
+        ]
+        assert 'python' in document['environment']
+
+    def test_bench_command_compare(self, app, tmp_path):
+        """Test flask bench writes results and fails on a regression against a baseline"""
+        baseline = tmp_path / 'baseline.json'
+        baseline.write_text(json.dumps({'results': [_result('ProductService.search_products', 1e-9, rows=100)]}))
+        output = tmp_path / 'results.json'
+
+        result = app.test_cli_runner().invoke(args=[
+            'bench', '--rows', '100', '--case', 'search_products', '--repeat', '3',
+            '--data-dir', str(tmp_path), '--output', str(output), '--compare', str(baseline),
+        ])
+
+        assert result.exit_code == 1
+        assert 'regression' in result.output
+        assert json.loads(output.read_text())['results'][0]['name'] == 'ProductService.search_products'
@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import create_engine, update
+from shoptrack.benchmarks.contention import OPERATIONS, check_stock, run_contention, setup_products
+from shoptrack.benchmarks.load import parse_mix
+from shoptrack.models import Product
+
+
+class TestContention:
+    """Test the stock-contention benchmark and its invariant check"""
+
+    def test_single_worker_keeps_invariant(self, tmp_path):
+        """Test one worker commits operations without any drift"""
+        report = run_contention(f"sqlite:///{tmp_path / 'one.db'}", products=2, workers=1, duration=0.5)
+
+        assert report['committed'] > 0
+        assert report['ops_per_s'] > 0
+        assert set(report['operations']) == set(OPERATIONS)
+        assert report['drifted_products'] == 0
+        assert all(product['stock'] == product['expected'] for product in report['products'])
+
+    def test_drift_detected(self, tmp_path):
+        """Test a stock change without history shows up as drift"""
+        bind = create_engine(f"sqlite:///{tmp_path / 'drift.db'}")
+        initial = setup_products(bind, 2, initial_stock=100)
+        product_id = min(initial)
+        with bind.begin() as connection:
+            connection.execute(update(Product).where(Product.id == product_id).values(stock=97))
+
+        products = {product['product_id']: product for product in check_stock(bind, initial)}
+        bind.dispose()
+
+        assert products[product_id]['drift'] == -3
+        assert products[max(initial)]['drift'] == 0
+
+    def test_mix_operations(self):
+        """Test the mix accepts only stock operations"""
+        assert parse_mix('add=2,set=1', OPERATIONS) == {'add': 2.0, 'set': 1.0}
+        with pytest.raises(ValueError):
+            parse_mix('search=1', OPERATIONS)
@@ -0,0 +1,113 @@
+import http.client
+import random
+import pytest
+from shoptrack.benchmarks import load
+from shoptrack.benchmarks.load import OPERATIONS, HTTPClient, WSGIClient, create_users, parse_mix, percentile, run_load
+
+
+class FakeClient:
+    """Client answering every request with a fixed status"""
+
+    def __init__(self, status=200):
+        self.status = status
+        self.paths = []
+
+    def request(self, method, path, body=None, headers=None):
+        self.paths.append((method, path))
+        return self.status, {'data': {'session_id': 1, 'user_id': 1}}
+
+
+class FakeUser:
+    username = 'fake'
+    headers = {}
+
+    def pick_product(self, rng):
+        return {'id': 1, 'name': 'Widget', 'price': 1.0}
+
+
+class DroppingConnection:
+    """HTTP connection whose response is lost while drop is set"""
+    drop = False
+    sent = []
+    status = 200
+
+    def __init__(self, host, port, timeout=None):
+        pass
+
+    def request(self, method, url, body=None, headers=None):
+        self.sent.append(method)
+
+    def getresponse(self):
+        if DroppingConnection.drop:
+            DroppingConnection.drop = False
+            raise http.client.RemoteDisconnected('closed')
+        return self
+
+    def read(self):
+        return b'{}'
+
+    def close(self):
+        pass
+
+
+class TestLoadGenerator:
+    """Test the traffic mix, the users it acts as and the report"""
+
+    def test_parse_mix(self):
+        """Test a mix string becomes weights, rejecting unknown operations"""
+        assert parse_mix('login=1,search=2.5') == {'login': 1.0, 'search': 2.5}
+        with pytest.raises(ValueError):
+            parse_mix('checkout=1')
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        ordered = [i / 100 for i in range(1, 101)]
+
+        assert percentile(ordered, 0.5) == 0.51
+        assert percentile(ordered, 0.99) == 1.0
+        assert percentile([], 0.5) == 0.0
+
+    def test_operations_against_app(self, app):
+        """Test every operation succeeds against the app with seeded users"""
+        client = WSGIClient(app)
+        users = create_users(client, 2, max_products=4)
+        rng = random.Random(0)
+
+        assert [len(user.products) for user in users] == [4, 2]
+        for name, operation in OPERATIONS.items():
+            assert operation(client, users[0], rng) == 200, name
+
+    def test_run_load_report(self):
+        """Test a bounded run reports each operation of the mix"""
+        client = FakeClient()
+
+        result = run_load(client, [FakeUser()], {'list_products': 1, 'search': 1}, threads=2, max_requests=50)
+        report = result.summary()
+
+        assert report['total']['requests'] == 50
+        assert set(report['routes']) == {'list_products', 'search'}
+        assert report['routes']['search']['p99_ms'] >= report['routes']['search']['p50_ms']
+        assert report['total']['errors'] == 0
+
+    def test_server_errors_counted(self):
+        """Test 5xx responses count as errors and 4xx separately"""
+        result = run_load(FakeClient(status=503), [FakeUser()], {'search': 1}, threads=1, max_requests=5)
+
+        assert result.summary()['routes']['search']['errors'] == 5
+        assert result.summary()['routes']['search']['client_errors'] == 0
+
+    def test_http_client_retries_only_safe_methods(self, monkeypatch):
+        """Test a dropped keep-alive connection is retried for reads but a write is never sent twice"""
+        monkeypatch.setattr(load.http.client, 'HTTPConnection', DroppingConnection)
+        monkeypatch.setattr(DroppingConnection, 'sent', [])
+        client = HTTPClient('http://localhost:5000')
+        client.request('GET', '/api/products/')
+
+        DroppingConnection.drop = True
+        assert client.request('GET', '/api/products/')[0] == 200
+        client.request('GET', '/api/products/')
+        DroppingConnection.drop = True
+        with pytest.raises(http.client.RemoteDisconnected):
+            client.request('POST', '/api/products/1/stock/add/1', {})
+
+        assert DroppingConnection.sent == ['GET', 'GET', 'GET', 'GET', 'POST']
@@ -0,0 +1,43 @@
+import json
+from shoptrack.benchmarks.data import history_database
+from shoptrack.benchmarks.memory import growth_exponent, measure_in_child
+
+
+class TestMemoryBenchmark:
+    """Test the peak-memory benchmark mode"""
+
+    def test_growth_exponent(self):
+        """Test linear growth gives ~1, bounded memory ~0, too few points None"""
+        assert growth_exponent([(1000, 10), (100000, 1000)]) == 1.0
+        assert growth_exponent([(1000, 50), (10000, None), (100000, 50)]) == 0.0
+        assert growth_exponent([(1000, 10)]) is None
+
+    def test_measure_in_child(self, tmp_path):
+        """Test a case is measured in a fresh process against a seeded database"""
+        path = history_database(str(tmp_path), 200, users=1)
+
+        result = measure_in_child(path, 'GET /api/history/')
+
+        assert 'error' not in result, result
+        assert result['traced_peak_kb'] > 0
+        assert result['peak_rss_kb'] >= result['rss_growth_kb']
+
+    def test_child_failure_reported(self, tmp_path):
+        """Test a failing case comes back as an error instead of raising"""
+        path = history_database(str(tmp_path), 200, users=1)
+
+        assert 'error' in measure_in_child(path, 'GET /no/such/case')
+
+    def test_memory_command(self, app, tmp_path):
+        """Test flask bench --memory writes a curve per case"""
+        output = tmp_path / 'memory.json'
+
+        result = app.test_cli_runner().invoke(args=[
+            'bench', '--memory', '--rows', '100', '--rows', '200', '--case', 'search',
+            '--data-dir', str(tmp_path), '--output', str(output),
+        ])
+
+        assert result.exit_code == 0, result.output
+        curves = json.loads(output.read_text())['curves']
+        assert list(curves) == ['GET /api/products/search/<query>']
+        assert curves['GET /api/products/search/<query>']['rows'] == [100, 200]
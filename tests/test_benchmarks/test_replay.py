@@ -0,0 +1,80 @@
+from shoptrack.benchmarks.replay import compare_latencies, ks_statistic, login_users, prepare_request, replay
+from shoptrack.observability.capture import SCRUBBED
+
+
+class FakeClient:
+    """Client answering every request with a fixed status, logging what it got"""
+
+    def __init__(self, status=200):
+        self.status = status
+        self.requests = []
+
+    def request(self, method, path, body=None, headers=None):
+        self.requests.append((method, path, body, headers))
+        return self.status, {'data': {'session_id': 100 + len(self.requests)}}
+
+
+def _record(ts, path='/api/products/', user_id=3, duration_ms=5.0, **extra):
+    record = {'ts': ts, 'method': 'GET', 'path': path, 'query': '', 'body': None,
+              'auth': {'alias': 'a1', 'user_id': user_id}, 'endpoint': 'product.get_products',
+              'status': 200, 'duration_ms': duration_ms}
+    record.update(extra)
+    return record
+
+
+class TestReplay:
+    """Test turning captured requests back into traffic"""
+
+    def test_prepare_login(self):
+        """Test a scrubbed login becomes one for the stand-in user"""
+        record = _record(0, '/api/auth/login', method='POST', auth={'alias': None, 'user_id': 7},
+                         body={'username': 'alice', 'password': SCRUBBED})
+
+        method, path, body, headers = prepare_request(record, {}, 'load{user_id}', 'secret')
+
+        assert (method, path) == ('POST', '/api/auth/login')
+        assert body == {'username': 'load7', 'password': 'secret'}
+
+    def test_prepare_authenticated(self):
+        """Test recorded users get the token of their stand-in"""
+        record = _record(0, query='q=lamp')
+
+        assert prepare_request(record, {3: 42}) == ('GET', '/api/products/?q=lamp', None,
+                                                    {'Authorization': 'Bearer 42'})
+
+    def test_login_users_once_each(self):
+        """Test each recorded user is logged in once"""
+        client = FakeClient()
+        trace = [_record(0), _record(1), _record(2, user_id=4), _record(3, auth=None)]
+
+        tokens = login_users(client, trace)
+
+        assert tokens == {3: 101, 4: 102}
+        assert [request[2]['username'] for request in client.requests] == ['user3', 'user4']
+
+    def test_replay_sends_every_request(self):
+        """Test an unpaced replay re-issues the whole trace"""
+        client = FakeClient(status=503)
+        trace = [_record(i * 0.1) for i in range(10)]
+
+        results = replay(client, trace, {3: 1}, speed=0, threads=4)
+
+        assert len(results) == 10
+        assert compare_latencies(trace, results)['product.get_products']['errors'] == 10
+
+    def test_ks_statistic(self):
+        """Test the KS distance of equal and disjoint samples"""
+        assert ks_statistic([1, 2, 3], [1, 2, 3]) == 0.0
+        assert ks_statistic([1, 2, 3], [4, 5, 6]) == 1.0
+        assert 0 < ks_statistic([1, 2, 3, 4], [3, 4, 5, 6]) < 1
+
+    def test_compare_latencies(self):
+        """Test recorded and replayed percentiles are reported per route"""
+        trace = [_record(i, duration_ms=10.0) for i in range(4)]
+        results = [('product.get_products', 0.010, 200)] * 4
+
+        entry = compare_latencies(trace, results)['product.get_products']
+
+        assert entry['recorded'] == entry['replayed'] == 4
+        assert entry['recorded_p50_ms'] == entry['replayed_p50_ms'] == 10.0
+        assert entry['ks'] == 0.0
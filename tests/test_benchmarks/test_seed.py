@@ -0,0 +1,107 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from shoptrack.benchmarks.data import allocate, seed_database, sqlite_engine
+from shoptrack.database import get_current_revision
+from shoptrack.models import History, Product, ProductDailyTx, ProductTxRollup, User, UserDailyTx, UserTxRollup
+from shoptrack.repositories.history_repository import TOTAL_COLUMNS, rebuild_rollups
+from shoptrack.services.user_service import UserService
+
+
+def _seed(path, **kwargs):
+    bind = sqlite_engine(str(path), bulk_load=True)
+    counts = seed_database(bind, 20, 5, 10, **kwargs)
+    return bind, counts
+
+
+class TestSeedDatabase:
+    """Test the bulk data generator"""
+
+    def test_allocate_exact_totals(self):
+        """Test shares add up to the total and follow the weights"""
+        shares = allocate(100, [4, 2, 1, 1])
+
+        assert sum(shares) == 100
+        assert shares == sorted(shares, reverse=True)
+
+    def test_counts_and_skew(self, tmp_path):
+        """Test the requested totals are loaded, the first users owning the most"""
+        bind, counts = _seed(tmp_path / 'seed.db')
+
+        assert counts == {'users': 20, 'products': 100, 'history': 1000}
+        with Session(bind) as session:
+            assert session.scalar(select(func.count()).select_from(History)) == 1000
+            owned = dict(session.execute(select(Product.owner_id, func.count()).group_by(Product.owner_id)).all())
+        assert owned[1] == max(owned.values())
+        assert owned[1] > 5 * owned[20]
+
+    def test_deterministic(self, tmp_path):
+        """Test the same seed gives the same rows and another seed different ones"""
+        def snapshot(bind):
+            with Session(bind) as session:
+                return session.execute(
+                    select(History.product_id, History.quantity, History.action, History.created_at)
+                    .order_by(History.id)
+                ).all()
+
+        first = snapshot(_seed(tmp_path / 'a.db', seed=1)[0])
+        again = snapshot(_seed(tmp_path / 'b.db', seed=1)[0])
+        other = snapshot(_seed(tmp_path / 'c.db', seed=2)[0])
+
+        assert [row[:3] for row in first] == [row[:3] for row in again]
+        assert [row[:3] for row in first] != [row[:3] for row in other]
+
+    def test_stock_matches_history(self, tmp_path):
+        """Test every product's stock is its bought minus sold quantity"""
+        bind, _ = _seed(tmp_path / 'stock.db')
+        net = func.sum(func.iif(History.action == 'buy', History.quantity, -History.quantity))
+
+        with Session(bind) as session:
+            totals = dict(session.execute(select(History.product_id, net).group_by(History.product_id)).all())
+            for product in session.scalars(select(Product)):
+                assert product.stock == totals.get(product.id, 0) >= 0
+
+    def test_rollups_match_rebuild(self, tmp_path):
+        """Test the rollups filled during the load equal ones rebuilt from history"""
+        bind, _ = _seed(tmp_path / 'rollups.db')
+        tables = [(UserTxRollup, ('user_id',)), (ProductTxRollup, ('product_id',)),
+                  (UserDailyTx, ('user_id', 'day')), (ProductDailyTx, ('product_id', 'day'))]
+
+        def snapshot():
+            with Session(bind) as session:
+                return [
+                    sorted(session.execute(select(*(getattr(model, name) for name in (*keys, *TOTAL_COLUMNS)))).all())
+                    for model, keys in tables
+                ]
+
+        seeded = snapshot()
+        with bind.begin() as connection:
+            rebuild_rollups(connection)
+
+        assert all(seeded)
+        assert snapshot() == seeded
+
+    def test_seed_db_snapshot(self, app, tmp_path):
+        """Test flask seed-db --snapshot writes a stamped SQLite file"""
+        path = tmp_path / 'snapshot.db'
+
+        result = app.test_cli_runner().invoke(args=[
+            'seed-db', '--users', '5', '--products-per-user', '2', '--history-per-product', '3',
+            '--snapshot', str(path),
+        ])
+
+        assert result.exit_code == 0, result.output
+        bind = sqlite_engine(str(path))
+        assert get_current_revision(bind) is not None
+        with Session(bind) as session:
+            assert session.scalar(select(func.count()).select_from(User)) == 5
+            assert session.scalar(select(func.count()).select_from(History)) == 30
+
+    def test_seed_db_refuses_populated_database(self, app, db_session):
+        """Test seeding the app database won't mix with existing users"""
+        UserService(db_session).create_user('existing', 'password123', 'existing@example.com')
+        db_session.commit()
+
+        result = app.test_cli_runner().invoke(args=['seed-db', '--users', '1'])
+
+        assert result.exit_code == 1
+        assert '--reset' in result.output
@@ -0,0 +1,94 @@
+import gzip
+import json
+import pytest
+import zlib
+from flask import Response
+from shoptrack import compression
+
+
+@pytest.fixture
+def compress_client(app):
+    """Client for an app with a large, a small and a streamed JSON route"""
+    rows = [{'id': i, 'product_name': f'Product {i}', 'price': '19.99'} for i in range(500)]
+
+    app.add_url_rule('/_test/large', 'test_large', lambda: app.json.response(rows))
+    app.add_url_rule('/_test/small', 'test_small', lambda: app.json.response({'ok': True}))
+    app.add_url_rule('/_test/stream', 'test_stream', lambda: Response(
+        (json.dumps(row) + '\n' for row in rows), mimetype='application/x-ndjson'
+    ))
+    return app.test_client()
+
+
+class TestCompression:
+    """Test Accept-Encoding negotiated response compression"""
+
+    def test_large_response_is_gzipped(self, compress_client):
+        """Test responses above the threshold are compressed"""
+        response = compress_client.get('/_test/large', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert int(response.headers['Content-Length']) == len(response.data)
+        assert len(json.loads(gzip.decompress(response.data))) == 500
+
+    def test_small_response_is_not_compressed(self, compress_client):
+        """Test responses below the threshold are sent as-is"""
+        response = compress_client.get('/_test/small', headers={'Accept-Encoding': 'gzip'})
+
+        assert 'Content-Encoding' not in response.headers
+        assert json.loads(response.data) == {'ok': True}
+
+    def test_no_accept_encoding(self, compress_client):
+        """Test clients that don't ask for compression get plain responses"""
+        response = compress_client.get('/_test/large')
+
+        assert 'Content-Encoding' not in response.headers
+        assert len(json.loads(response.data)) == 500
+
+    def test_streamed_response_is_compressed(self, compress_client):
+        """Test streamed responses are compressed chunk by chunk"""
+        response = compress_client.get('/_test/stream', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Content-Length' not in response.headers
+        lines = gzip.decompress(response.data).decode().splitlines()
+        assert len(lines) == 500
+
+    def test_stream_flushes_each_chunk(self):
+        """Test every streamed chunk can be decoded as soon as it is sent"""
+        stream = compression.compress_stream(iter([b'first\n', b'second\n']), 'gzip', 6)
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        assert decompressor.decompress(next(stream)) == b'first\n'
+        assert decompressor.decompress(next(stream)) == b'second\n'
+
+    def test_stream_closes_body(self, app):
+        """Test closing a compressed stream closes the body it wraps, even unread"""
+        class Body:
+            closed = False
+
+            def __iter__(self):
+                yield b'{"row": 1}\n'
+
+            def close(self):
+                self.closed = True
+
+        body = Body()
+        app.add_url_rule('/_test/closing', 'test_closing',
+                         lambda: Response(body, mimetype='application/x-ndjson'))
+
+        response = app.test_client().get('/_test/closing', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+        assert response.headers['Content-Encoding'] == 'gzip'
+        response.close()
+
+        assert body.closed
+
+    @pytest.mark.parametrize('encoding', ['br', 'zstd'])
+    def test_optional_codecs(self, compress_client, encoding):
+        """Test brotli and zstd are preferred when installed"""
+        if encoding not in compression.available_encodings():
+            pytest.skip(f"{encoding} codec not installed")
+
+        response = compress_client.get('/_test/large', headers={'Accept-Encoding': f'gzip, {encoding}'})
+
+        assert response.headers['Content-Encoding'] == encoding
@@ -413,3 +413,109 @@ class TestHistoryController:
         assert len(data['data']) == 2
         for transaction in data['data']:
             assert transaction['product_id'] == product.id
+    
+    def test_get_history_etag(self, client, db_session):
+        """Test the history list answers conditional GETs from the data version"""
+        user_service = UserService(db_session)
+        user = user_service.create_user('testuser', 'password123', 'test@example.com')
+        db_session.commit()
+        
+        from shoptrack.services.session_service import SessionService
+        session_service = SessionService(db_session)
+        session = session_service.create_session(user.id)
+        db_session.commit()
+        
+        headers = {'Authorization': f'Bearer {session.id}'}
+        response = client.get('/api/history/', headers=headers)
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+        
+        response = client.get('/api/history/', headers={**headers, 'If-None-Match': etag})
+        assert response.status_code == 304
+        
+        response = client.post('/api/history/',
+            json={'product_name': 'Product 1', 'price': 10.0, 'quantity': 1, 'action': 'buy'},
+            headers=headers
+        )
+        assert response.status_code == 200
+        
+        response = client.get('/api/history/', headers={**headers, 'If-None-Match': etag})
+        assert response.status_code == 200
+        assert len(json.loads(response.data)['data']) == 1
+    
+    def test_get_timeseries(self, client, db_session):
+        """Test daily and monthly totals come back for the requested range"""
+        user_service = UserService(db_session)
+        user = user_service.create_user('testuser', 'password123', 'test@example.com')
+        db_session.commit()
+        
+        from shoptrack.services.session_service import SessionService
+        session_service = SessionService(db_session)
+        session = session_service.create_session(user.id)
+        db_session.commit()
+        
+        from datetime import datetime, timezone
+        from shoptrack.models.history import History
+        for day, action, quantity in ((3, 'buy', 5), (3, 'sell', 2), (20, 'buy', 1)):
+            db_session.add(History(
+                product_name='Product 1', user_id=user.id, price=10.0, quantity=quantity, action=action,
+                created_at=datetime(2026, 3, day, 12, tzinfo=timezone.utc)
+            ))
+        db_session.commit()
+        
+        headers = {'Authorization': f'Bearer {session.id}'}
+        response = client.get('/api/history/timeseries?bucket=day&from=2026-03-02&to=2026-03-04', headers=headers)
+        assert response.status_code == 200
+        data = json.loads(response.data)['data']
+        assert [bucket['start'] for bucket in data] == ['2026-03-02', '2026-03-03', '2026-03-04']
+        assert data[1]['bought_quantity'] == 5
+        assert data[1]['sold_quantity'] == 2
+        assert data[0]['buy_count'] == 0
+        
+        response = client.get('/api/history/timeseries?bucket=month&from=2026-02-15&to=2026-03-31', headers=headers)
+        data = json.loads(response.data)['data']
+        assert [bucket['start'] for bucket in data] == ['2026-02-01', '2026-03-01']
+        assert data[1]['buy_count'] == 2
+        assert data[1]['bought_quantity'] == 6
+    
+    def test_get_timeseries_invalid(self, client, db_session):
+        """Test bad buckets, dates and foreign products are rejected"""
+        user_service = UserService(db_session)
+        user = user_service.create_user('testuser', 'password123', 'test@example.com')
+        db_session.commit()
+        
+        from shoptrack.services.session_service import SessionService
+        session_service = SessionService(db_session)
+        session = session_service.create_session(user.id)
+        db_session.commit()
+        
+        headers = {'Authorization': f'Bearer {session.id}'}
+        for query in ('bucket=hour', 'from=yesterday', 'from=2026-03-02&to=2026-03-01', 'product_id=999'):
+            response = client.get(f'/api/history/timeseries?{query}', headers=headers)
+            assert response.status_code == 400, query
+
+    def test_get_timeseries_invalid_range(self, client, db_session, caplog):
+        """Test too long ranges and a start after the default end get their own 400, not an error log"""
+        user_service = UserService(db_session)
+        user = user_service.create_user('testuser', 'password123', 'test@example.com')
+        db_session.commit()
+
+        from shoptrack.services.session_service import SessionService
+        session_service = SessionService(db_session)
+        session = session_service.create_session(user.id)
+        db_session.commit()
+
+        from datetime import date, timedelta
+        headers = {'Authorization': f'Bearer {session.id}'}
+        later = (date.today() + timedelta(days=2)).isoformat()
+        cases = (
+            ('from=2000-01-01&to=2026-03-01', "Date range cannot exceed 3660 days"),
+            (f'from={later}', "Start date cannot be after end date"),
+        )
+        for query, message in cases:
+            with caplog.at_level('ERROR'):
+                caplog.clear()
+                response = client.get(f'/api/history/timeseries?{query}', headers=headers)
+            assert response.status_code == 400, query
+            assert json.loads(response.data)['message'] == message
+            assert not [record for record in caplog.records if record.levelname == 'ERROR']
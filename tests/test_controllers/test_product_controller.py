@@ -379,3 +379,84 @@ class TestProductController:
         assert data['success'] == True
         assert len(data['data']) == 1
         assert data['data'][0]['name'] == 'Low Stock'
+    
+    def test_get_products_etag_not_modified(self, client, db_session):
+        """Test polling the product list with If-None-Match returns 304"""
+        user_service = UserService(db_session)
+        user = user_service.create_user('testuser', 'password123', 'test@example.com')
+        db_session.commit()
+        
+        from shoptrack.services.session_service import SessionService
+        session_service = SessionService(db_session)
+        session = session_service.create_session(user.id)
+        db_session.commit()
+        
+        from shoptrack.services.product_service import ProductService
+        product_service = ProductService(db_session)
+        product = product_service.create_product('Test Product', 10.0, 5, owner_id=user.id)
+        db_session.commit()
+        
+        headers = {'Authorization': f'Bearer {session.id}'}
+        response = client.get('/api/products/', headers=headers)
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+        assert etag.startswith('W/')
+        assert 'Last-Modified' in response.headers
+        
+        response = client.get('/api/products/', headers={**headers, 'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+        assert response.headers['ETag'] == etag
+    
+    def test_get_products_if_modified_since(self, client, db_session):
+        """Test sending back Last-Modified as If-Modified-Since gets a 304"""
+        user_service = UserService(db_session)
+        user = user_service.create_user('testuser', 'password123', 'test@example.com')
+        db_session.commit()
+        
+        from shoptrack.services.session_service import SessionService
+        session_service = SessionService(db_session)
+        session = session_service.create_session(user.id)
+        db_session.commit()
+        
+        from shoptrack.services.product_service import ProductService
+        product_service = ProductService(db_session)
+        product_service.create_product('Test Product', 10.0, 5, owner_id=user.id)
+        db_session.commit()
+        
+        headers = {'Authorization': f'Bearer {session.id}'}
+        last_modified = client.get('/api/products/', headers=headers).headers['Last-Modified']
+        
+        response = client.get('/api/products/', headers={**headers, 'If-Modified-Since': last_modified})
+        assert response.status_code == 304
+        
+        response = client.get('/api/products/', headers={**headers, 'If-Modified-Since': 'Mon, 01 Jan 2001 00:00:00 GMT'})
+        assert response.status_code == 200
+    
+    def test_get_products_etag_changes_after_write(self, client, db_session):
+        """Test stock changes bump the version so polling sees fresh data"""
+        user_service = UserService(db_session)
+        user = user_service.create_user('testuser', 'password123', 'test@example.com')
+        db_session.commit()
+        
+        from shoptrack.services.session_service import SessionService
+        session_service = SessionService(db_session)
+        session = session_service.create_session(user.id)
+        db_session.commit()
+        
+        from shoptrack.services.product_service import ProductService
+        product_service = ProductService(db_session)
+        product = product_service.create_product('Test Product', 10.0, 5, owner_id=user.id)
+        db_session.commit()
+        
+        headers = {'Authorization': f'Bearer {session.id}'}
+        etag = client.get('/api/products/', headers=headers).headers['ETag']
+        
+        response = client.post(f'/api/products/{product.id}/stock/add/3', headers=headers)
+        assert response.status_code == 200
+        
+        response = client.get('/api/products/', headers={**headers, 'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        data = json.loads(response.data)
+        assert data['data'][0]['stock'] == 8
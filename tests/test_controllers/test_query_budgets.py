@@ -0,0 +1,210 @@
+import tracemalloc
+import pytest
+from shoptrack.services.history_service import HistoryService
+from shoptrack.services.product_service import ProductService
+from shoptrack.services.session_service import SessionService
+from shoptrack.services.user_service import UserService
+
+ADMIN = {'X-Admin-Token': 'test-admin-token'}
+
+
+@pytest.fixture
+def account(db_session):
+    """A logged in user with one product and one history row"""
+    user = UserService(db_session).create_user('budgetuser', 'password123', 'budget@example.com')
+    db_session.commit()
+    session = SessionService(db_session).create_session(user.id)
+    product = ProductService(db_session).create_product('Budget Product', 9.99, 20, 'desc', owner_id=user.id)
+    db_session.commit()
+    history = HistoryService(db_session).create_transaction(
+        product_id=product.id, product_name=product.name, user_id=user.id, price=9.99, quantity=20, action='buy')
+    db_session.commit()
+    return {
+        'user_id': user.id,
+        'product_id': product.id,
+        'history_id': history.id,
+        'headers': {'Authorization': f'Bearer {session.id}'},
+    }
+
+
+class TestAuthQueryBudgets:
+    """Statement budgets for the auth routes"""
+
+    @pytest.mark.query_budget(4)
+    def test_register(self, client):
+        """Test POST /api/auth/register stays within its statement budget"""
+        response = client.post('/api/auth/register', json={
+            'username': 'newbudget', 'password': 'password123', 'email': 'newbudget@example.com'})
+        assert response.status_code == 200
+
+    @pytest.mark.query_budget(2)
+    def test_login(self, client, account):
+        """Test POST /api/auth/login stays within its statement budget"""
+        response = client.post('/api/auth/login', json={'username': 'budgetuser', 'password': 'password123'})
+        assert response.status_code == 200
+
+    @pytest.mark.query_budget(3)
+    def test_logout(self, client, account):
+        """Test POST /api/auth/logout stays within its statement budget"""
+        response = client.post('/api/auth/logout', headers=account['headers'])
+        assert response.status_code == 200
+
+    @pytest.mark.query_budget(3)
+    def test_validate(self, client, account):
+        """Test GET /api/auth/validate stays within its statement budget"""
+        response = client.get('/api/auth/validate', headers=account['headers'])
+        assert response.status_code == 200
+
+
+class TestProductQueryBudgets:
+    """Statement budgets for the product routes"""
+
+    @pytest.mark.query_budget(4)
+    def test_list(self, client, account):
+        """Test GET /api/products/ stays within its statement budget"""
+        response = client.get('/api/products/', headers=account['headers'])
+        assert response.status_code == 200
+
+    @pytest.mark.query_budget(3)
+    def test_get(self, client, account):
+        """Test GET /api/products/<id> stays within its statement budget"""
+        response = client.get(f"/api/products/{account['product_id']}", headers=account['headers'])
+        assert response.status_code == 200
+
+    @pytest.mark.query_budget(12)
+    def test_create(self, client, account):
+        """Test POST /api/products/ stays within its statement budget"""
+        response = client.post('/api/products/', json={'name': 'New', 'price': 1.5, 'stock': 2},
+                               headers=account['headers'])
+        assert response.status_code == 200
+
+    @pytest.mark.query_budget(6)
+    def test_update(self, client, account):
+        """Test PUT /api/products/<id> stays within its statement budget"""
+        response = client.put(f"/api/products/{account['product_id']}", json={'name': 'Renamed'},
+                              headers=account['headers'])
+        assert response.status_code == 200
+
+    @pytest.mark.query_budget(12)
+    def test_delete(self, client, account):
+        """Test DELETE /api/products/<id> stays within its statement budget"""
+        response = client.delete(f"/api/products/{account['product_id']}", headers=account['headers'])
+        assert response.status_code == 200
+
+    @pytest.mark.query_budget(12)
+    def test_add_stock(self, client, account):
+        """Test POST /api/products/<id>/stock/add stays within its statement budget"""
+        response = client.post(f"/api/products/{account['product_id']}/stock/add/3", headers=account['headers'])
+        assert response.status_code == 200
+
+    @pytest.mark.query_budget(12)
+    def test_remove_stock(self, client, account):
+        """Test POST /api/products/<id>/stock/remove stays within its statement budget"""
+        response = client.post(f"/api/products/{account['product_id']}/stock/remove/3", headers=account['headers'])
+        assert response.status_code == 200
+
+    @pytest.mark.query_budget(12)
+    def test_set_stock(self, client, account):
+        """Test POST /api/products/<id>/stock/set stays within its statement budget"""
+        response = client.post(f"/api/products/{account['product_id']}/stock/set/7", headers=account['headers'])
+        assert response.status_code == 200
+
+    @pytest.mark.query_budget(3)
+    def test_search(self, client, account):
+        """Test GET /api/products/search/Budget stays within its statement budget"""
+        response = client.get('/api/products/search/Budget', headers=account['headers'])
+        assert response.status_code == 200
+
+    @pytest.mark.query_budget(6)
+    def test_update_price(self, client, account):
+        """Test PUT /api/products/<id>/price stays within its statement budget"""
+        response = client.put(f"/api/products/{account['product_id']}/price/12.5", headers=account['headers'])
+        assert response.status_code == 200
+
+    @pytest.mark.query_budget(3)
+    def test_low_stock(self, client, account):
+        """Test GET /api/products/low-stock stays within its statement budget"""
+        response = client.get('/api/products/low-stock?threshold=50', headers=account['headers'])
+        assert response.status_code == 200
+
+
+class TestHistoryQueryBudgets:
+    """Statement budgets for the history routes"""
+
+    @pytest.mark.query_budget(4)
+    def test_list(self, client, account):
+        """Test GET /api/history/ stays within its statement budget"""
+        response = client.get('/api/history/', headers=account['headers'])
+        assert response.status_code == 200
+
+    @pytest.mark.query_budget(3)
+    def test_get(self, client, account):
+        """Test GET /api/history/<id> stays within its statement budget"""
+        response = client.get(f"/api/history/{account['history_id']}", headers=account['headers'])
+        assert response.status_code == 200
+
+    @pytest.mark.query_budget(10)
+    def test_create(self, client, account):
+        """Test POST /api/history/ stays within its statement budget"""
+        response = client.post('/api/history/', json={
+            'product_id': account['product_id'], 'product_name': 'Budget Product',
+            'price': 9.99, 'quantity': 1, 'action': 'sell'}, headers=account['headers'])
+        assert response.status_code == 200
+
+    @pytest.mark.query_budget(10)
+    def test_update(self, client, account):
+        """Test PUT /api/history/<id> stays within its statement budget"""
+        response = client.put(f"/api/history/{account['history_id']}", json={'quantity': 4},
+                              headers=account['headers'])
+        assert response.status_code == 200
+
+    @pytest.mark.query_budget(10)
+    def test_delete(self, client, account):
+        """Test DELETE /api/history/<id> stays within its statement budget"""
+        response = client.delete(f"/api/history/{account['history_id']}", headers=account['headers'])
+        assert response.status_code == 200
+
+    @pytest.mark.query_budget(3)
+    def test_by_action(self, client, account):
+        """Test GET /api/history/action/buy stays within its statement budget"""
+        response = client.get('/api/history/action/buy', headers=account['headers'])
+        assert response.status_code == 200
+
+    @pytest.mark.query_budget(3)
+    def test_by_product(self, client, account):
+        """Test GET /api/history/product/<id> stays within its statement budget"""
+        response = client.get(f"/api/history/product/{account['product_id']}", headers=account['headers'])
+        assert response.status_code == 200
+
+
+    @pytest.mark.query_budget(3)
+    def test_timeseries(self, client, account):
+        """Test GET /api/history/timeseries stays within its statement budget"""
+        response = client.get('/api/history/timeseries?bucket=week', headers=account['headers'])
+        assert response.status_code == 200
+
+class TestAdminQueryBudgets:
+    """Statement budgets for the admin routes"""
+
+    @pytest.fixture(autouse=True)
+    def stop_tracemalloc(self):
+        was_tracing = tracemalloc.is_tracing()
+        yield
+        if not was_tracing:
+            tracemalloc.stop()
+
+    @pytest.mark.query_budget(0)
+    def test_statements(self, client):
+        """Test the statement stats routes stay within their statement budget"""
+        assert client.get('/api/admin/statements', headers=ADMIN).status_code == 200
+        assert client.delete('/api/admin/statements', headers=ADMIN).status_code == 200
+
+    @pytest.mark.query_budget(0)
+    def test_memory_snapshots(self, client):
+        """Test the memory snapshot routes stay within their statement budget"""
+        first = client.post('/api/admin/memory/snapshots', headers=ADMIN).get_json()['data']['id']
+        second = client.post('/api/admin/memory/snapshots', headers=ADMIN).get_json()['data']['id']
+        assert client.get('/api/admin/memory/snapshots', headers=ADMIN).status_code == 200
+        assert client.get(f'/api/admin/memory/snapshots/{first}/diff/{second}', headers=ADMIN).status_code == 200
+        assert client.delete('/api/admin/memory/snapshots', headers=ADMIN).status_code == 200
+
@@ -0,0 +1,112 @@
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect
+from shoptrack.database import Base, HEAD_REVISION, get_alembic_config, check_schema_version, get_head_revision
+from shoptrack.utils.migration_utils import create_index_online, drop_index_online
+
+
+@pytest.fixture
+def migration_engine(tmp_path):
+    """Engine for a throwaway SQLite database"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    engine.dispose()
+
+
+def upgrade_to_head(engine):
+    """Apply all migrations to the given engine"""
+    alembic_config = get_alembic_config()
+    with engine.begin() as connection:
+        alembic_config.attributes['connection'] = connection
+        command.upgrade(alembic_config, 'head')
+
+
+class TestSchemaVersion:
+    """Test the boot-time schema version check"""
+
+    def test_unmigrated_database_does_not_match(self, migration_engine):
+        """Test a database without alembic_version is reported as behind"""
+        matches, current, head = check_schema_version(migration_engine)
+
+        assert matches is False
+        assert current is None
+        assert head == get_head_revision()
+
+    def test_migrated_database_matches(self, migration_engine):
+        """Test a database upgraded to head passes the check"""
+        upgrade_to_head(migration_engine)
+
+        matches, current, head = check_schema_version(migration_engine)
+
+        assert matches is True
+        assert current == head
+
+    def test_head_revision_matches_scripts(self):
+        """Test HEAD_REVISION names the newest migration script"""
+        assert HEAD_REVISION == ScriptDirectory.from_config(get_alembic_config()).get_current_head()
+
+    def test_migrations_match_models(self, migration_engine):
+        """Test the migrations produce the schema the models describe"""
+        upgrade_to_head(migration_engine)
+
+        with migration_engine.connect() as connection:
+            diff = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+
+        assert diff == []
+
+
+class TestOnlineIndexes:
+    """Test the online index helpers used by migrations"""
+
+    def test_create_and_drop_index_on_sqlite(self, migration_engine):
+        """Test the helpers go through batch mode on SQLite"""
+        upgrade_to_head(migration_engine)
+
+        with migration_engine.begin() as connection:
+            with Operations.context(MigrationContext.configure(connection)):
+                create_index_online('ix_test_history_user', 'history', ['user_id'])
+
+        indexes = [index['name'] for index in inspect(migration_engine).get_indexes('history')]
+        assert 'ix_test_history_user' in indexes
+
+        with migration_engine.begin() as connection:
+            with Operations.context(MigrationContext.configure(connection)):
+                drop_index_online('ix_test_history_user', 'history')
+
+        indexes = [index['name'] for index in inspect(migration_engine).get_indexes('history')]
+        assert 'ix_test_history_user' not in indexes
+
+
+class TestDbCommands:
+    """Test the flask db command group"""
+
+    def test_upgrade_reports_progress(self, app, migration_engine, monkeypatch):
+        """Test upgrade applies pending migrations and reports each step"""
+        monkeypatch.setattr('shoptrack.cli.engine', migration_engine)
+        monkeypatch.setattr('shoptrack.database.engine', migration_engine)
+        runner = app.test_cli_runner()
+
+        result = runner.invoke(args=['db', 'upgrade'])
+
+        assert result.exit_code == 0, result.output
+        assert f"upgraded to {get_head_revision()}" in result.output
+        assert check_schema_version(migration_engine)[0] is True
+
+        result = runner.invoke(args=['db', 'upgrade'])
+        assert 'Nothing to do' in result.output
+
+    def test_upgrade_rejects_invalid_lock_timeout(self, app, migration_engine, monkeypatch):
+        """Test a lock timeout that isn't a number with a unit never reaches the database"""
+        monkeypatch.setattr('shoptrack.cli.engine', migration_engine)
+        monkeypatch.setattr('shoptrack.database.engine', migration_engine)
+        runner = app.test_cli_runner()
+
+        result = runner.invoke(args=['db', 'upgrade', '--lock-timeout', "5s'; DROP TABLE users; --"])
+
+        assert result.exit_code != 0
+        assert 'Invalid lock timeout' in result.output
+        assert check_schema_version(migration_engine)[1] is None
@@ -0,0 +1,52 @@
+import pytest
+import json
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from flask import request
+from shoptrack.utils import json_provider
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def provider(request, app, monkeypatch):
+    """The app's JSON provider, with and without orjson available"""
+    if request.param == 'stdlib':
+        monkeypatch.setattr(json_provider, 'orjson', None)
+    return app.json
+
+
+class TestOrjsonProvider:
+    """Test the application JSON provider"""
+
+    def test_decimal_and_datetime(self, provider):
+        """Test Decimal and datetime values are encoded the same way on both paths"""
+        created = datetime(2024, 5, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+
+        data = json.loads(provider.dumps({'price': Decimal('19.99'), 'created_at': created}))
+
+        assert data == {'price': '19.99', 'created_at': 'Wed, 01 May 2024 12:30:15 GMT'}
+
+    def test_datetime_format_matches_flask(self, provider):
+        """Test dates keep Flask's RFC 822 format, converted to GMT"""
+        created = datetime(2024, 5, 1, 9, 30, tzinfo=timezone(timedelta(hours=-3)))
+
+        data = json.loads(provider.dumps({'created_at': created, 'day': date(2024, 5, 1)}))
+
+        assert data == {'created_at': 'Wed, 01 May 2024 12:30:00 GMT', 'day': 'Wed, 01 May 2024 00:00:00 GMT'}
+
+    def test_response(self, provider):
+        """Test responses carry the JSON mimetype and body"""
+        response = provider.response({'success': True, 'data': [Decimal('1.50')]})
+
+        assert response.mimetype == 'application/json'
+        assert json.loads(response.data) == {'success': True, 'data': ['1.50']}
+
+    def test_unserializable_raises(self, provider):
+        """Test unknown types still raise TypeError"""
+        with pytest.raises(TypeError):
+            provider.dumps({'value': object()})
+
+    def test_request_parsing(self, app, provider):
+        """Test request bodies are parsed through the provider"""
+        with app.test_request_context('/', method='POST', data='{"name": "Widget", "stock": 3}',
+                                      content_type='application/json'):
+            assert request.json == {'name': 'Widget', 'stock': 3}
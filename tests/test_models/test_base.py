@@ -0,0 +1,74 @@
+import pytest
+from decimal import Decimal
+from shoptrack.models.base import ModelSerializer
+from shoptrack.models.user import User
+from shoptrack.models.product import Product
+
+
+class TestModelSerializer:
+    """Test the precompiled per-model serializers"""
+
+    def create_product(self, db_session):
+        user = User(username='testuser', password='password', email='test@example.com')
+        db_session.add(user)
+        db_session.commit()
+
+        product = Product(
+            name='Test Product',
+            price=Decimal('19.99'),
+            stock=10,
+            owner_id=user.id
+        )
+        db_session.add(product)
+        db_session.commit()
+        return product
+
+    def test_serializer_built_once_per_model(self, app):
+        """Test each model gets its plan when mappers are configured"""
+        assert isinstance(Product.__serializer__, ModelSerializer)
+        assert Product.get_serializer() is Product.__serializer__
+        assert 'password' not in User.__serializer__.fields
+
+    def test_field_subset(self, db_session):
+        """Test serializing a subset of fields"""
+        product = self.create_product(db_session)
+
+        product_dict = product.to_dict(fields=('id', 'name', 'price'))
+
+        assert product_dict == {'id': product.id, 'name': 'Test Product', 'price': Decimal('19.99')}
+        assert Product.get_serializer(('id', 'name', 'price')) is Product.get_serializer(('id', 'name', 'price'))
+
+    def test_sensitive_fields_cannot_be_requested(self, db_session):
+        """Test a subset never includes sensitive fields"""
+        user = User(username='testuser', password='password', email='test@example.com')
+        db_session.add(user)
+        db_session.commit()
+
+        assert user.to_dict(fields=('username', 'password')) == {'username': 'testuser'}
+
+    def test_exclude(self, db_session):
+        """Test excluding fields"""
+        product = self.create_product(db_session)
+
+        product_dict = product.to_dict(exclude=['description', 'created_at', 'updated_at'])
+
+        assert 'description' not in product_dict
+        assert 'created_at' not in product_dict
+        assert product_dict['name'] == 'Test Product'
+
+    def test_coerce(self, db_session):
+        """Test Decimal and datetime coercion"""
+        product = self.create_product(db_session)
+
+        product_dict = product.to_dict(coerce=True)
+
+        assert product_dict['price'] == '19.99'
+        assert product_dict['created_at'] == product.created_at.isoformat()
+        assert product_dict['description'] is None
+
+    def test_to_dict_list(self, db_session):
+        """Test serializing many instances at once"""
+        product = self.create_product(db_session)
+
+        assert Product.to_dict_list([product, product]) == [product.to_dict(), product.to_dict()]
+        assert Product.to_dict_list([product], fields=('id',), coerce=True) == [{'id': product.id}]
@@ -0,0 +1,84 @@
+import json
+import pytest
+from shoptrack.observability.capture import SCRUBBED, init_app as init_capture, scrub, scrub_query
+from shoptrack.services.session_service import SessionService
+from shoptrack.services.user_service import UserService
+
+
+@pytest.fixture
+def capture_file(app, tmp_path):
+    path = tmp_path / 'requests.ndjson'
+    app.config.update(CAPTURE_ENABLED=True, CAPTURE_SAMPLE_RATE=1.0, CAPTURE_FILE=str(path))
+    init_capture(app)
+    return path
+
+
+@pytest.fixture
+def user(db_session):
+    user = UserService(db_session).create_user('captureuser', 'password123', 'capture@example.com')
+    db_session.commit()
+    return user
+
+
+def _read_records(app, path):
+    app.extensions['capture_writer'].flush()
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+class TestScrubbing:
+    """Test secrets never reach the capture file"""
+
+    def test_body_scrubbed(self):
+        """Test password-like fields are replaced at any depth"""
+        body = {'username': 'alice', 'password': 'hunter2', 'nested': [{'api_token': 'abc', 'qty': 2}]}
+
+        assert scrub(body) == {'username': 'alice', 'password': SCRUBBED,
+                               'nested': [{'api_token': SCRUBBED, 'qty': 2}]}
+
+    def test_query_scrubbed(self):
+        """Test password-like query parameters are replaced"""
+        assert scrub_query('q=lamp&token=abc') == 'q=lamp&token=%5Bscrubbed%5D'
+
+
+class TestCapture:
+    """Test sampled requests are recorded for replay"""
+
+    def test_login_recorded_without_password(self, app, client, user, capture_file):
+        """Test a login is recorded with the user it resolved to and no password"""
+        response = client.post('/api/auth/login', json={'username': 'captureuser', 'password': 'password123'})
+        assert response.status_code == 200
+        # Records are written once the body has been sent
+        response.get_data()
+
+        [record] = _read_records(app, capture_file)
+        assert record['method'] == 'POST'
+        assert record['path'] == '/api/auth/login'
+        assert record['endpoint'] == 'auth.login'
+        assert record['status'] == 200
+        assert record['body'] == {'username': 'captureuser', 'password': SCRUBBED}
+        assert record['auth'] == {'alias': None, 'user_id': user.id}
+        assert 'password123' not in capture_file.read_text()
+
+    def test_token_aliased(self, app, client, db_session, user, capture_file):
+        """Test the bearer token is replaced by a stable alias"""
+        session = SessionService(db_session).create_session(user.id)
+        db_session.commit()
+        headers = {'Authorization': f'Bearer {session.id}'}
+
+        client.get('/api/products/?q=lamp', headers=headers).get_data()
+        client.get('/api/products/', headers=headers).get_data()
+
+        first, second = _read_records(app, capture_file)
+        assert first['query'] == 'q=lamp'
+        assert first['auth']['user_id'] == user.id
+        assert first['auth']['alias'] == second['auth']['alias']
+        assert first['auth']['alias'] != str(session.id)
+
+    def test_sampling_and_exclusions(self, app, client, capture_file):
+        """Test unsampled requests and the metrics endpoint are skipped"""
+        client.get('/metrics').get_data()
+        app.wsgi_app.sample_rate = 0.0
+        client.get('/api/products/').get_data()
+
+        assert not capture_file.exists() or _read_records(app, capture_file) == []
@@ -0,0 +1,122 @@
+import json
+import logging
+import queue
+import threading
+from shoptrack.observability.logs import BackgroundLogging, BackgroundQueueHandler, JsonFormatter
+
+
+class ListHandler(logging.Handler):
+    """Handler keeping what it was given, noting the thread that wrote it"""
+
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+        self.threads.add(threading.get_ident())
+
+
+def _record(msg, *args, **extra):
+    record = logging.LogRecord('shoptrack.test', logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestJsonFormatter:
+    """Test the JSON log line layout"""
+
+    def test_fields_merged(self):
+        """Test extra fields land at the top level next to the message"""
+        line = JsonFormatter().format(_record("GET %s %s", '/api/products/', 200, fields={'duration_ms': 1.5}))
+
+        data = json.loads(line)
+        assert data['message'] == 'GET /api/products/ 200'
+        assert data['level'] == 'INFO'
+        assert data['logger'] == 'shoptrack.test'
+        assert data['duration_ms'] == 1.5
+        assert data['ts'].endswith('+00:00')
+
+
+class TestBackgroundLogging:
+    """Test logging through the queue and listener thread"""
+
+    def test_records_written_by_listener_thread(self):
+        """Test records reach the sink from the listener thread, not the caller"""
+        sink = ListHandler()
+        background = BackgroundLogging([sink]).start()
+        logger = logging.getLogger('shoptrack.test.background')
+        logger.addHandler(background.queue_handler)
+        logger.propagate = False
+        try:
+            logger.warning("stock for product %s is %d", 7, 3)
+        finally:
+            logger.removeHandler(background.queue_handler)
+            background.stop()
+
+        assert sink.lines == ['stock for product 7 is 3']
+        assert threading.get_ident() not in sink.threads
+
+    def test_plain_arguments_left_for_listener(self):
+        """Test messages with plain arguments aren't formatted on the calling thread"""
+        handler = BackgroundQueueHandler(queue.Queue())
+
+        record = handler.prepare(_record("product %s", 7))
+
+        assert record.msg == 'product %s'
+        assert record.args == (7,)
+
+    def test_mutable_arguments_formatted_up_front(self):
+        """Test objects that could change before the listener runs are rendered immediately"""
+        handler = BackgroundQueueHandler(queue.Queue())
+        filters = {'owner_id': 1}
+
+        record = handler.prepare(_record("filtering by %s", filters))
+        filters['owner_id'] = 2
+
+        assert record.getMessage() == "filtering by {'owner_id': 1}"
+
+    def test_full_queue_drops_records(self):
+        """Test a full queue drops records instead of blocking the caller"""
+        handler = BackgroundQueueHandler(queue.Queue(maxsize=1))
+
+        handler.handle(_record("first"))
+        handler.handle(_record("second"))
+
+        assert handler.queue.qsize() == 1
+        assert handler.dropped == 1
+
+    def test_dropped_records_reported(self):
+        """Test the first record after a full queue is preceded by a count of what was lost"""
+        handler = BackgroundQueueHandler(queue.Queue(maxsize=2))
+        for message in ("first", "second", "third", "fourth"):
+            handler.handle(_record(message))
+        handler.queue.get_nowait()
+        handler.queue.get_nowait()
+
+        handler.handle(_record("fifth"))
+
+        messages = [handler.queue.get_nowait().getMessage() for _ in range(2)]
+        assert messages == ["Log queue full: dropped 2 records", "fifth"]
+        assert handler.dropped == 2
+
+
+class TestAccessLog:
+    """Test the structured per-request access log"""
+
+    def test_timings_recorded(self, client, caplog):
+        """Test an access record carries the request's status and timings"""
+        with caplog.at_level(logging.INFO, logger='shoptrack.access'):
+            client.post('/api/auth/login', json={'username': 'nobody', 'password': 'password123'})
+
+        records = [r for r in caplog.records if r.name == 'shoptrack.access']
+        assert len(records) == 1
+        fields = records[0].fields
+        assert fields['method'] == 'POST'
+        assert fields['endpoint'] == 'auth.login'
+        assert fields['status'] == 400
+        assert fields['duration_ms'] >= fields['db_ms'] >= 0
+        assert fields['queries'] >= 1
+        assert json.loads(JsonFormatter().format(records[0]))['path'] == '/api/auth/login'
+
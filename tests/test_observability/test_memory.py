@@ -0,0 +1,91 @@
+import logging
+import threading
+import tracemalloc
+import pytest
+from shoptrack.observability.memory import init_app as init_memory, snapshots
+
+ADMIN = {'X-Admin-Token': 'test-admin-token'}
+
+
+@pytest.fixture
+def tracing_memory():
+    was_tracing = tracemalloc.is_tracing()
+    yield
+    snapshots.clear()
+    if not was_tracing:
+        tracemalloc.stop()
+
+
+class TestRequestMemory:
+    """Test per-request tracemalloc accounting"""
+
+    def test_peak_logged_with_top_sites(self, app, client, caplog, tracing_memory):
+        """Test requests over the threshold log their top allocation sites"""
+        app.config.update(MEMORY_PROFILING_ENABLED=True, MEMORY_REPORT_THRESHOLD_KB=0)
+        init_memory(app)
+
+        with caplog.at_level(logging.INFO, logger='shoptrack.observability.memory'):
+            client.get('/api/products/')
+
+        messages = [record.getMessage() for record in caplog.records]
+        assert any(m.startswith('memory method=GET path=/api/products/ peak_kb=') for m in messages)
+        assert any('top allocation sites' in m for m in messages)
+
+    def test_requests_measured_one_at_a_time(self, app, client, tracing_memory):
+        """Test the measuring lock is released after each request, failed ones included"""
+        app.config.update(MEMORY_PROFILING_ENABLED=True)
+        init_memory(app)
+
+        assert client.get('/api/missing').status_code == 404
+        # Run the next request where a lock left held would hang it
+        statuses = []
+        worker = threading.Thread(target=lambda: statuses.append(client.get('/api/products/').status_code))
+        worker.start()
+        worker.join(timeout=10)
+        assert not worker.is_alive()
+        assert statuses and statuses[0] < 500
+
+    def test_off_by_default(self, client):
+        """Test nothing is traced unless enabled"""
+        client.get('/api/products/')
+
+        assert not tracemalloc.is_tracing()
+
+
+class TestMemorySnapshots:
+    """Test the admin snapshot endpoints"""
+
+    def test_requires_admin_token(self, client):
+        """Test snapshots can't be taken without the admin token"""
+        assert client.post('/api/admin/memory/snapshots').status_code == 403
+
+    def test_take_and_diff(self, client, tracing_memory):
+        """Test two snapshots can be diffed to show growth"""
+        first = client.post('/api/admin/memory/snapshots', headers=ADMIN).get_json()['data']
+        retained = [bytearray(1024) for _ in range(1000)]
+        second = client.post('/api/admin/memory/snapshots', headers=ADMIN).get_json()['data']
+
+        response = client.get(f"/api/admin/memory/snapshots/{first['id']}/diff/{second['id']}", headers=ADMIN)
+
+        growth = response.get_json()['data']['growth']
+        assert any('test_memory.py' in site['site'] and site['size_diff_kb'] >= 1000 for site in growth)
+        assert client.get('/api/admin/memory/snapshots', headers=ADMIN).get_json()['data']['ids'] == \
+            [first['id'], second['id']]
+        del retained
+
+    def test_clear_stops_tracing_it_started(self, client, tracing_memory):
+        """Test clearing the snapshots stops tracemalloc when a snapshot started it"""
+        if tracemalloc.is_tracing():
+            pytest.skip("tracemalloc was already running")
+
+        client.post('/api/admin/memory/snapshots', headers=ADMIN)
+        assert tracemalloc.is_tracing()
+
+        assert client.delete('/api/admin/memory/snapshots', headers=ADMIN).status_code == 200
+        assert not tracemalloc.is_tracing()
+
+    def test_unknown_snapshot(self, client, tracing_memory):
+        """Test diffing a missing snapshot is a 404"""
+        response = client.get('/api/admin/memory/snapshots/998/diff/999', headers=ADMIN)
+
+        assert response.status_code == 404
@@ -0,0 +1,161 @@
+import os
+import re
+import runpy
+import subprocess
+import sys
+import pytest
+from sqlalchemy import create_engine, text
+from shoptrack.database import CheckoutTimingPool, checkout_timing_pool_class
+from shoptrack import create_app
+from shoptrack.config import TestingConfig
+from shoptrack.observability.metrics import POOL_WAIT, instrument_pool, parse_request_start
+
+ADMIN_HEADERS = {'X-Admin-Token': 'test-admin-token'}
+
+
+def scrape(client):
+    return client.get('/metrics', headers=ADMIN_HEADERS).get_data(as_text=True)
+
+
+def pool_wait_count():
+    return next(sample.value for metric in POOL_WAIT.collect() for sample in metric.samples
+                if sample.name.endswith('_count'))
+
+
+class TestMetricsEndpoint:
+    """Test the Prometheus metrics endpoint"""
+
+    def test_metrics_text_format(self, client):
+        """Test the endpoint answers in the Prometheus text format"""
+        response = client.get('/metrics', headers=ADMIN_HEADERS)
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        assert b'# TYPE shoptrack_http_requests_total counter' in response.data
+
+    def test_requires_admin_token(self, client):
+        """Test the endpoint is closed to clients without the token"""
+        response = client.get('/metrics')
+
+        assert response.status_code == 403
+        assert b'shoptrack_http_requests_total' not in response.data
+
+    def test_allowed_address(self, schema, monkeypatch):
+        """Test scrapers from an allowlisted network need no token"""
+        monkeypatch.setattr(TestingConfig, 'METRICS_ALLOWED_IPS', '10.0.0.0/8, 192.168.1.5')
+        client = create_app('testing').test_client()
+
+        assert client.get('/metrics', environ_base={'REMOTE_ADDR': '10.1.2.3'}).status_code == 200
+        assert client.get('/metrics', environ_base={'REMOTE_ADDR': '192.168.1.6'}).status_code == 403
+
+    def test_request_that_raises_is_counted(self, app, client):
+        """Test a request failing before a response was built still counts as a 500"""
+        def fail():
+            raise RuntimeError("boom")
+        app.add_url_rule('/_test/fail', 'test_fail', fail)
+
+        with pytest.raises(RuntimeError):
+            client.get('/_test/fail')
+
+        assert 'shoptrack_http_requests_total{endpoint="test_fail",method="GET",status="500"} 1.0' in scrape(client)
+
+    def test_request_counted_by_endpoint(self, client):
+        """Test requests are counted and timed under their blueprint endpoint"""
+        client.get('/api/products/')
+        body = scrape(client)
+
+        assert 'shoptrack_http_requests_total{endpoint="product.get_products",method="GET",status=' in body
+        assert 'shoptrack_http_request_duration_seconds_bucket{endpoint="product.get_products"' in body
+
+    def test_query_timings_by_repository_method(self, client):
+        """Test statement timings are labeled with the repository method"""
+        client.post('/api/auth/login', json={'username': 'nobody', 'password': 'password123'})
+        body = scrape(client)
+
+        assert 'shoptrack_db_query_duration_seconds_count{repository_method="UserRepository.' in body
+
+    def test_pool_metrics_exposed(self, client):
+        """Test the pool gauges and wait histogram are exposed"""
+        body = scrape(client)
+
+        assert 'shoptrack_db_pool_checked_out' in body
+        assert 'shoptrack_db_pool_wait_seconds_count' in body
+
+
+class TestPoolInstrumentation:
+    """Test checkout wait timing"""
+
+    def test_survives_dispose(self, app):
+        """Test checkouts are still timed after dispose() recreates the pool"""
+        bind = create_engine('sqlite://', poolclass=checkout_timing_pool_class('sqlite://'))
+        try:
+            instrument_pool(bind)
+            bind.dispose()
+            assert isinstance(bind.pool, CheckoutTimingPool)
+
+            before = pool_wait_count()
+            with bind.connect() as connection:
+                connection.execute(text('SELECT 1'))
+            assert pool_wait_count() == before + 1
+        finally:
+            bind.dispose()
+
+
+class TestMultiprocess:
+    """Test metrics merged across worker processes"""
+
+    WORKER = (
+        "import sys\n"
+        "from shoptrack import create_app\n"
+        "client = create_app('testing').test_client()\n"
+        "client.get('/api/products/')\n"
+        "if sys.argv[1] == 'scrape':\n"
+        "    print(client.get('/metrics', headers={'X-Admin-Token': 'test-admin-token'}).get_data(as_text=True))\n"
+    )
+
+    def test_counts_merged_across_workers(self, tmp_path):
+        """Test /metrics sums the counters every worker wrote to the shared directory"""
+        metrics_dir = tmp_path / 'metrics'
+        metrics_dir.mkdir()
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(metrics_dir), SCHEMA_CHECK='off',
+                   DATABASE_URL=f"sqlite:///{tmp_path / 'metrics.db'}")
+
+        for mode in ('request', 'request', 'scrape'):
+            worker = subprocess.run([sys.executable, '-c', self.WORKER, mode], env=env, capture_output=True,
+                                    text=True, timeout=120)
+            assert worker.returncode == 0, worker.stderr
+
+        assert re.search(r'shoptrack_http_requests_total\{endpoint="product.get_products",method="GET",status="\d+"\} 3.0',
+                         worker.stdout)
+
+
+    def test_gunicorn_start_clears_only_metric_files(self, tmp_path, monkeypatch):
+        """Test gunicorn's on_starting hook removes old metric files and nothing else"""
+        (tmp_path / 'counter_123.db').write_text('')
+        (tmp_path / 'keep.txt').write_text('kept')
+        (tmp_path / 'data').mkdir()
+        monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+        hooks = runpy.run_path(os.path.join(os.path.dirname(__file__), '..', '..', 'gunicorn.conf.py'))
+
+        hooks['on_starting'](None)
+
+        assert sorted(os.listdir(tmp_path)) == ['data', 'keep.txt']
+
+
+class TestRequestStart:
+    """Test X-Request-Start parsing"""
+
+    def test_seconds(self):
+        """Test nginx-style seconds with a t= prefix"""
+        assert parse_request_start('t=1700000000.250', now=1700000000.5) == 0.25
+
+    def test_milliseconds_and_microseconds(self):
+        """Test epoch milliseconds and microseconds"""
+        assert parse_request_start('1700000000250', now=1700000000.5) == 0.25
+        assert parse_request_start('1700000000250000', now=1700000000.5) == 0.25
+
+    def test_invalid_or_future(self):
+        """Test junk is ignored and clock skew never goes negative"""
+        assert parse_request_start('garbage') is None
+        assert parse_request_start(None) is None
+        assert parse_request_start('t=1700000001', now=1700000000.0) == 0.0
@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+import pstats
+import threading
+import pytest
+from shoptrack.observability.profiling import (
+    BackgroundProfiler, RateLimiter, init_background_profiler, speedscope_document,
+)
+
+ADMIN = {'X-Admin-Token': 'test-admin-token'}
+
+
+@pytest.fixture
+def profile_dir(app, tmp_path):
+    app.config['PROFILE_DIR'] = str(tmp_path)
+    return tmp_path
+
+
+class TestRequestProfiling:
+    """Test on-demand profiling of single requests"""
+
+    def test_cprofile_saved_with_tags(self, client, profile_dir):
+        """Test a cProfile dump named after the endpoint and user is written"""
+        response = client.get('/api/products/', headers={'X-Profile': 'cprofile', **ADMIN})
+
+        name = response.headers['X-Profile']
+        assert name.endswith('.prof')
+        assert '-product.get_products-user' in name
+        stats = pstats.Stats(str(profile_dir / name))
+        functions = {func for _, _, func in stats.stats}
+        assert 'get_products' in functions
+
+    def test_sampled_profile_is_speedscope(self, client, profile_dir):
+        """Test the sampling mode writes a speedscope file"""
+        response = client.get('/api/products/?_profile=sample', headers=ADMIN)
+
+        name = response.headers['X-Profile']
+        assert name.endswith('.speedscope.json')
+        with open(profile_dir / name) as f:
+            document = json.load(f)
+        assert document['profiles'][0]['type'] == 'sampled'
+        assert 'endpoint=product.get_products' in document['name']
+
+    def test_requires_admin_token(self, client, profile_dir, caplog):
+        """Test the flag is ignored, without a warning, when the admin token is missing"""
+        with caplog.at_level(logging.INFO, logger='shoptrack.observability.profiling'):
+            response = client.get('/api/products/', headers={'X-Profile': 'cprofile', 'X-Admin-Token': 'wrong'})
+
+        assert 'X-Profile' not in response.headers
+        assert os.listdir(profile_dir) == []
+        assert not [r for r in caplog.records if r.name == 'shoptrack.observability.profiling']
+
+    def test_rate_limited(self, app, client, profile_dir):
+        """Test profiling stops once the per-worker budget is spent"""
+        headers = {'X-Profile': 'cprofile', **ADMIN}
+        for _ in range(app.config['PROFILE_RATE_LIMIT']):
+            client.get('/api/products/', headers=headers)
+
+        response = client.get('/api/products/', headers=headers)
+
+        assert response.headers['X-Profile'] == 'rate-limited'
+        assert len(os.listdir(profile_dir)) == app.config['PROFILE_RATE_LIMIT']
+
+
+class TestProfilingHelpers:
+    """Test the rate limiter and speedscope builder"""
+
+    def test_rate_limiter_window(self):
+        """Test events beyond the limit are refused"""
+        limiter = RateLimiter(2, 60)
+
+        assert [limiter.allow() for _ in range(3)] == [True, True, False]
+
+    def test_speedscope_frames_shared(self):
+        """Test frames are stored once and referenced by index"""
+        outer = ('ProductController.get', 'a.py', 1)
+        inner = ('ProductService.get_user_products', 'b.py', 2)
+
+        document = speedscope_document('test', [((outer, inner), 0.01), ((outer,), 0.02)], 0.03)
+
+        assert len(document['shared']['frames']) == 2
+        assert document['profiles'][0]['samples'] == [[0, 1], [0]]
+        assert document['profiles'][0]['weights'] == [0.01, 0.02]
+
+
+class TestBackgroundProfiler:
+    """Test the always-on sampling profiler"""
+
+    def test_samples_folded_stacks(self, tmp_path):
+        """Test samples of request threads become folded stack lines"""
+        profiler = BackgroundProfiler(str(tmp_path), 0.01, 60)
+        profiler.active_threads.add(threading.get_ident())
+
+        profiler.sample()
+        profiler.sample()
+        path = profiler.flush()
+
+        with open(path) as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 1
+        stack, count = lines[0].rsplit(' ', 1)
+        assert count == '2'
+        assert 'TestBackgroundProfiler.test_samples_folded_stacks (test_profiling.py:' in stack
+        assert stack.split(';')[-1].startswith('BackgroundProfiler.sample (profiling.py:')
+
+    def test_idle_threads_not_sampled(self, tmp_path):
+        """Test threads outside a request are left alone"""
+        profiler = BackgroundProfiler(str(tmp_path), 0.01, 60)
+
+        profiler.sample()
+
+        assert profiler.flush() is None
+
+    def test_flush_prunes_old_files(self, tmp_path):
+        """Test flushes keep only the newest max_files folded files"""
+        for name in ('20240101T000000-1.folded', '20240101T000100-2.folded', '20240101T000200-1.folded'):
+            (tmp_path / name).write_text('a;b 1\n')
+        (tmp_path / 'notes.txt').write_text('kept')
+        profiler = BackgroundProfiler(str(tmp_path), 0.01, 60, max_files=2)
+        profiler.active_threads.add(threading.get_ident())
+
+        profiler.sample()
+        path = profiler.flush()
+
+        assert sorted(os.listdir(tmp_path)) == ['20240101T000200-1.folded', os.path.basename(path), 'notes.txt']
+
+    def test_tracks_request_threads(self, app, client, tmp_path):
+        """Test the sampler starts on the first request and tracks only in-flight requests"""
+        app.config['PROFILE_DIR'] = str(tmp_path)
+        init_background_profiler(app)
+        profiler = app.extensions['background_profiler']
+
+        client.get('/api/products/')
+        profiler.stop()
+
+        assert profiler.active_threads == set()
+        assert profiler._pid is not None
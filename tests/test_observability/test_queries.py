@@ -0,0 +1,107 @@
+import logging
+import pytest
+from datetime import datetime, timedelta, timezone
+from shoptrack.api.base import BaseController
+from shoptrack.observability.queries import collect_queries
+from shoptrack.repositories.session_repository import SessionRepository
+from shoptrack.services.user_service import UserService
+
+
+def _create_user(db_session, username='queryuser'):
+    user = UserService(db_session).create_user(username, 'password123', f'{username}@example.com')
+    db_session.commit()
+    return user
+
+
+class TestQueryTracking:
+    """Test per-request query counting and N+1 detection"""
+
+    def test_server_timing_header(self, client):
+        """Test every response reports its database time"""
+        response = client.get('/api/products/')
+
+        timing = response.headers['Server-Timing']
+        assert timing.startswith('db;dur=')
+        assert 'queries"' in timing
+        assert 'app;dur=' in timing
+
+    def test_server_timing_header_admin_only(self, app, client):
+        """Test with the header turned off only admin requests see database timings"""
+        app.config['SERVER_TIMING_HEADER'] = False
+
+        assert 'Server-Timing' not in client.get('/api/products/').headers
+        response = client.get('/api/products/', headers={'X-Admin-Token': 'test-admin-token'})
+        assert response.headers['Server-Timing'].startswith('db;dur=')
+
+    def test_access_log_line(self, client, caplog):
+        """Test the per-request access log carries the query count and time"""
+        with caplog.at_level(logging.INFO, logger='shoptrack.access'):
+            client.get('/api/products/')
+
+        records = [r for r in caplog.records if r.name == 'shoptrack.access']
+        assert len(records) == 1
+        assert records[0].fields['path'] == '/api/products/'
+        assert records[0].fields['status'] == 400
+        assert 'queries' in records[0].fields
+        assert 'db_ms' in records[0].fields
+
+    def test_statements_attributed_to_repository_method(self, db_session):
+        """Test statements are attributed to the outermost repository method"""
+        user_id = _create_user(db_session).id
+        repository = SessionRepository(db_session)
+
+        with collect_queries() as stats:
+            repository.find_user_active_sessions(user_id)
+
+        assert stats.count == 1
+        assert stats.statements[0][2] == ('SessionRepository', 'find_user_active_sessions')
+
+    def test_repeated_statements_flagged(self, db_session):
+        """Test a per-row loop shows up as a repeated statement shape"""
+        user_id = _create_user(db_session).id
+        repository = SessionRepository(db_session)
+        expires = datetime.now(timezone.utc) + timedelta(days=1)
+        for _ in range(5):
+            repository.create_session(user_id, expires)
+        db_session.commit()
+
+        with collect_queries() as stats:
+            repository.invalidate_user_sessions(user_id)
+
+        repeated = stats.repeated_statements(5)
+        assert len(repeated) == 1
+        assert repeated[0][1] == 5
+        assert repeated[0][2] == 'SessionRepository.invalidate_user_sessions'
+
+    def test_n_plus_one_warning_logged(self, app, client, db_session, caplog):
+        """Test debug mode warns about repeated statements in a request"""
+        user_id = _create_user(db_session).id
+        repository = SessionRepository(db_session)
+        expires = datetime.now(timezone.utc) + timedelta(days=1)
+        for _ in range(5):
+            repository.create_session(user_id, expires)
+        db_session.commit()
+
+        @app.route('/test/logout-everywhere', methods=['POST'])
+        def logout_everywhere():
+            count = BaseController().get_services()['session'].invalidate_user_sessions(user_id)
+            return {'count': count}
+
+        with caplog.at_level(logging.WARNING, logger='shoptrack.observability.queries'):
+            response = client.post('/test/logout-everywhere')
+
+        assert response.get_json()['count'] == 5
+
+        warnings = [r.getMessage() for r in caplog.records if 'N+1' in r.getMessage()]
+        assert any('SessionRepository.invalidate_user_sessions' in w for w in warnings)
+
+    def test_query_budget_exceeded(self, client):
+        """Test the budgeted test client fails a call over its budget, listing the statements"""
+        client.query_budget = 0
+
+        with pytest.raises(pytest.fail.Exception) as excinfo:
+            client.post('/api/auth/login', json={'username': 'nobody', 'password': 'password123'})
+
+        message = str(excinfo.value)
+        assert 'budget is 0' in message
+        assert '[UserRepository.' in message
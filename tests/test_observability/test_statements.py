@@ -0,0 +1,133 @@
+import io
+import logging
+import pytest
+from datetime import datetime
+from shoptrack.observability.statements import (
+    StatementRegistry, fingerprint, parameter_shape, registry,
+)
+from shoptrack.repositories.product_repository import ProductRepository
+from shoptrack.services.user_service import UserService
+
+ADMIN = {'X-Admin-Token': 'test-admin-token'}
+
+
+@pytest.fixture
+def statement_registry():
+    registry.reset()
+    yield registry
+    registry.reset()
+
+
+class TestFingerprint:
+    """Test statement normalization"""
+
+    def test_literals_and_placeholders_collapse(self):
+        """Test statements differing only in values share a fingerprint"""
+        assert fingerprint("SELECT * FROM product WHERE id = 1 AND name = 'a'") == \
+            fingerprint("SELECT *\n  FROM product WHERE id = 42 AND name = 'it''s'")
+        assert fingerprint("SELECT * FROM product WHERE id = %(id_1)s") == "SELECT * FROM product WHERE id = ?"
+
+    def test_in_lists_collapse(self):
+        """Test IN lists of any length share a fingerprint"""
+        assert fingerprint("SELECT 1 FROM t WHERE id IN (?, ?, ?)") == fingerprint("SELECT 1 FROM t WHERE id IN (?)")
+
+    def test_casts_and_identifiers_kept(self):
+        """Test Postgres casts and digits inside names survive"""
+        assert fingerprint("SELECT col_1::text FROM t2") == "SELECT col_1::text FROM t2"
+
+    def test_parameter_shape_hides_values(self):
+        """Test bind parameters are described by type only"""
+        assert parameter_shape((1, 'secret', datetime(2024, 1, 1))) == ('int', 'str', 'datetime')
+        assert parameter_shape({'name': 'secret'}) == {'name': 'str'}
+        assert parameter_shape([(1,), (2,)]) == "2 x ('int',)"
+
+
+class TestStatementRegistry:
+    """Test the per-fingerprint statistics"""
+
+    def test_aggregates_by_fingerprint_and_method(self):
+        """Test calls, times and rows accumulate per fingerprint and method"""
+        stats = StatementRegistry()
+        method = ('ProductRepository', 'filter_by')
+        for duration in (0.001, 0.002, 0.003):
+            stats.observe("UPDATE product SET stock = ? WHERE id = 7", (1,), duration, method, 1)
+        stats.observe("SELECT 1", (), 0.5, None, -1)
+
+        top = stats.top('calls')
+        assert top[0].method == 'ProductRepository.filter_by'
+        assert top[0].calls == 3
+        assert top[0].rows == 3
+        assert top[0].fingerprint == "UPDATE product SET stock = ? WHERE id = ?"
+        assert stats.top('total')[0].method == 'none'
+
+    def test_slow_query_logged_with_parameter_shapes(self, caplog):
+        """Test statements over the threshold are logged without their values"""
+        stats = StatementRegistry(slow_threshold=0.1)
+
+        with caplog.at_level(logging.WARNING, logger='shoptrack.observability.statements'):
+            stats.observe("SELECT * FROM user WHERE username = ?", ('alice',), 0.2, ('UserRepository', 'get_by'), -1)
+            stats.observe("SELECT * FROM user WHERE username = ?", ('bob',), 0.01, ('UserRepository', 'get_by'), -1)
+
+        assert len(caplog.records) == 1
+        message = caplog.records[0].getMessage()
+        assert 'UserRepository.get_by' in message
+        assert "('str',)" in message
+        assert 'alice' not in message
+
+    def test_repository_statements_recorded(self, db_session, statement_registry):
+        """Test statements run through a repository are attributed to it"""
+        user_id = UserService(db_session).create_user('statuser', 'password123', 'stat@example.com').id
+        ProductRepository(db_session).find_all_by_owner(user_id)
+
+        methods = {entry.method for entry in statement_registry.top(limit=100)}
+        assert 'ProductRepository.find_all_by_owner' in methods
+
+
+class TestStatementsEndpoint:
+    """Test the admin dump endpoint and CLI"""
+
+    def test_requires_admin_token(self, client):
+        """Test the dump is refused without the admin token"""
+        response = client.get('/api/admin/statements')
+
+        assert response.status_code == 403
+
+    def test_dump_and_reset(self, client, statement_registry):
+        """Test the dump lists statements and can be reset"""
+        client.post('/api/auth/login', json={'username': 'nobody', 'password': 'password123'})
+
+        data = client.get('/api/admin/statements?sort=calls', headers=ADMIN).get_json()['data']
+        assert any(entry['repository_method'].startswith('UserRepository.') for entry in data['statements'])
+
+        assert client.delete('/api/admin/statements', headers=ADMIN).status_code == 200
+        assert client.get('/api/admin/statements', headers=ADMIN).get_json()['data']['statements'] == []
+
+    def test_invalid_sort(self, client):
+        """Test an unknown sort key is rejected"""
+        response = client.get('/api/admin/statements?sort=bogus', headers=ADMIN)
+
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize('limit', ['-1', '0', 'ten', '2.5'])
+    def test_invalid_limit(self, client, limit):
+        """Test a limit that isn't a positive integer is rejected"""
+        response = client.get(f'/api/admin/statements?limit={limit}', headers=ADMIN)
+
+        assert response.status_code == 400
+        assert response.get_json()['message'] == 'limit must be a positive integer'
+
+    def test_cli_renders_dump(self, app, client, statement_registry, monkeypatch):
+        """Test the CLI prints a running server's statistics"""
+        client.post('/api/auth/login', json={'username': 'nobody', 'password': 'password123'})
+
+        def fake_urlopen(request, timeout):
+            path = request.full_url.split('5000', 1)[1]
+            response = client.get(path, headers=dict(request.header_items()))
+            return io.BytesIO(response.data)
+        monkeypatch.setattr('shoptrack.cli.urlopen', fake_urlopen)
+
+        result = app.test_cli_runner().invoke(args=['statements', '--sort', 'calls'])
+
+        assert result.exit_code == 0, result.output
+        assert 'sorted by calls' in result.output
+        assert 'UserRepository.' in result.output
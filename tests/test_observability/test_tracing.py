@@ -0,0 +1,153 @@
+import json
+import pytest
+from shoptrack.observability import tracing
+from shoptrack.observability.tracing import init_app as init_tracing, _parse_traceparent
+from shoptrack.services.product_service import ProductService
+from shoptrack.services.session_service import SessionService
+from shoptrack.services.user_service import UserService
+
+
+def _enable_tracing(app, path, **config):
+    app.config.update({'TRACING_ENABLED': True, 'TRACE_SAMPLE_RATE': 1.0, 'TRACE_EXPORTER': 'file',
+                       'TRACE_FILE': str(path), **config})
+    init_tracing(app)
+    return path
+
+
+@pytest.fixture
+def trace_file(app, tmp_path):
+    return _enable_tracing(app, tmp_path / 'spans.ndjson')
+
+
+@pytest.fixture
+def auth_headers(db_session):
+    user = UserService(db_session).create_user('traceuser', 'password123', 'trace@example.com')
+    db_session.commit()
+    session = SessionService(db_session).create_session(user.id)
+    db_session.commit()
+    return {'Authorization': f'Bearer {session.id}'}
+
+
+def _read_traces(path):
+    from flask import current_app
+    current_app.extensions['trace_exporter'].flush()
+    traces = []
+    with open(path) as f:
+        for line in f:
+            spans = json.loads(line)['resourceSpans'][0]['scopeSpans'][0]['spans']
+            traces.append({span['name']: span for span in spans} | {'_spans': spans})
+    return traces
+
+
+def _attributes(span):
+    return {a['key']: next(iter(a['value'].values())) for a in span['attributes']}
+
+
+class TestTracing:
+    """Test controller/service/repository spans"""
+
+    def test_add_stock_span_chain(self, client, trace_file, auth_headers):
+        """Test a write produces controller -> service -> repository spans"""
+        product_id = client.post('/api/products/', json={'name': 'Traced', 'price': 2.5, 'stock': 1},
+                                 headers=auth_headers).get_json()['data']['id']
+
+        response = client.post(f'/api/products/{product_id}/stock/add/3', headers=auth_headers)
+
+        trace = _read_traces(trace_file)[-1]
+        controller = trace['ProductController.add_stock']
+        service = trace['ProductService.add_stock']
+        update = trace['ProductRepository.update']
+        assert service['parentSpanId'] == controller['spanId']
+        assert update['parentSpanId'] == service['spanId']
+        assert 'HistoryRepository.create' in trace
+
+        root = trace['POST /api/products/<int:product_id>/stock/add/<int:quantity>']
+        assert controller['parentSpanId'] == root['spanId']
+        assert root['traceId'] == response.headers['traceparent'].split('-')[1]
+        assert _attributes(root)['http.status_code'] == '200'
+        assert 'shoptrack.owner_id' in _attributes(root)
+
+    def test_row_counts_and_owner(self, client, trace_file, auth_headers):
+        """Test spans carry statement/row counts and the owner id"""
+        client.post('/api/products/', json={'name': 'Traced', 'price': 2.5, 'stock': 1}, headers=auth_headers)
+
+        trace = _read_traces(trace_file)[-1]
+        create = _attributes(trace['ProductRepository.create'])
+        assert create['shoptrack.owner_id'] == _attributes(trace['POST /api/products/'])['shoptrack.owner_id']
+        assert create['db.statement_count'] == '1'
+
+        client.get('/api/products/', headers=auth_headers)
+        listed = [_attributes(span) for span in _read_traces(trace_file)[-1]['_spans']]
+        assert any(attributes.get('shoptrack.result_count') == '1' for attributes in listed)
+
+    def test_unsampled_requests_not_exported(self, app, client, tmp_path):
+        """Test a trusted upstream's unsampled flag records nothing"""
+        path = _enable_tracing(app, tmp_path / 'spans.ndjson', TRACE_TRUST_UPSTREAM=True)
+
+        client.get('/api/products/', headers={'traceparent': f"00-{'a' * 32}-{'b' * 16}-00"})
+
+        app.extensions['trace_exporter'].flush()
+        assert not path.exists()
+
+    def test_incoming_traceparent_continued(self, client, trace_file):
+        """Test an upstream trace id and parent span are kept"""
+        client.get('/api/products/', headers={'traceparent': f"00-{'a' * 32}-{'b' * 16}-01"})
+
+        root = _read_traces(trace_file)[-1]['GET /api/products/']
+        assert root['traceId'] == 'a' * 32
+        assert root['parentSpanId'] == 'b' * 16
+
+    def test_disabled_by_default(self, client, auth_headers):
+        """Test no spans are produced unless tracing is configured"""
+        response = client.get('/api/products/', headers=auth_headers)
+
+        assert 'traceparent' not in response.headers
+
+    def test_parse_traceparent(self):
+        """Test malformed traceparent headers are ignored"""
+        assert _parse_traceparent('garbage') is None
+        assert _parse_traceparent(None) is None
+        assert _parse_traceparent(f"00-{'1' * 32}-{'2' * 16}-01") == ('1' * 32, '2' * 16, True)
+        assert _parse_traceparent(f"00-{'1' * 32}-{'2' * 16}-03") == ('1' * 32, '2' * 16, True)
+        assert _parse_traceparent(f"00-{'1' * 32}-{'2' * 16}-02") == ('1' * 32, '2' * 16, False)
+        assert _parse_traceparent(f"00-{'1' * 32}-{'2' * 16}-zz") is None
+        assert _parse_traceparent(f"00-{'0' * 32}-{'2' * 16}-01") is None
+        assert _parse_traceparent(f"ff-{'1' * 32}-{'2' * 16}-01") is None
+
+    def test_upstream_sampled_flag_ignored_by_default(self, app, client, tmp_path):
+        """Test a client can't force sampling with a sampled traceparent"""
+        path = _enable_tracing(app, tmp_path / 'spans.ndjson', TRACE_SAMPLE_RATE=0.0)
+
+        client.get('/api/products/', headers={'traceparent': f"00-{'a' * 32}-{'b' * 16}-01"})
+
+        app.extensions['trace_exporter'].flush()
+        assert not path.exists()
+
+    def test_trusted_upstream_decides_sampling(self, app, client, tmp_path):
+        """Test a trusted upstream's sampled flag overrides the local rate"""
+        path = _enable_tracing(app, tmp_path / 'spans.ndjson', TRACE_SAMPLE_RATE=0.0, TRACE_TRUST_UPSTREAM=True)
+
+        client.get('/api/products/', headers={'traceparent': f"00-{'a' * 32}-{'b' * 16}-01"})
+
+        assert _read_traces(path)[-1]['GET /api/products/']['traceId'] == 'a' * 32
+
+    def test_methods_wrapped_only_once_tracing_is_enabled(self, app, tmp_path, monkeypatch):
+        """Test classes are left unwrapped until an app enables tracing"""
+        monkeypatch.setattr(tracing, '_instrumented', False)
+        monkeypatch.setattr(tracing, '_traceable', [])
+
+        class PlainService(ProductService):
+            def ping(self):
+                return 'pong'
+
+        assert not hasattr(PlainService.ping, '__wrapped__')
+        _enable_tracing(app, tmp_path / 'spans.ndjson')
+        assert hasattr(PlainService.ping, '__wrapped__')
+
+    def test_exporter_requires_send(self):
+        """Test an exporter without a send method can't be built"""
+        class Incomplete(tracing.BackgroundExporter):
+            pass
+
+        with pytest.raises(TypeError):
+            Incomplete()
@@ -0,0 +1,31 @@
+import pytest
+from shoptrack.repositories.data_version_repository import DataVersionRepository
+from shoptrack.models.user import User
+
+
+class TestDataVersionRepository:
+    """Test DataVersionRepository functionality"""
+    
+    def test_get_version_without_writes(self, db_session):
+        """Test an owner that never wrote anything is at version 0"""
+        repo = DataVersionRepository(db_session)
+        
+        assert repo.get_version(12345) == (0, None)
+    
+    def test_bump(self, db_session):
+        """Test bumping creates the row and then increments it"""
+        repo = DataVersionRepository(db_session)
+        user = User(username='testuser', password='password', email='test@example.com')
+        db_session.add(user)
+        db_session.commit()
+        
+        repo.bump(user.id)
+        db_session.commit()
+        version, updated_at = repo.get_version(user.id)
+        assert version == 1
+        assert updated_at is not None
+        
+        repo.bump(user.id)
+        repo.bump(user.id)
+        db_session.commit()
+        assert repo.get_version(user.id)[0] == 3
@@ -0,0 +1,209 @@
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+import pytest
+from sqlalchemy import delete, select
+from shoptrack.models import History, Product, ProductTxRollup, User, UserDailyTx, UserTxRollup
+from shoptrack.repositories.history_repository import _PENDING_KEY, HistoryRepository
+from shoptrack.services.product_service import ProductService
+
+
+@pytest.fixture
+def owner(db_session):
+    user = User(username='rollupuser', password='password', email='rollup@example.com')
+    db_session.add(user)
+    db_session.commit()
+    product = Product(name='Rollup Product', price=Decimal('5.00'), stock=100, owner_id=user.id)
+    db_session.add(product)
+    db_session.commit()
+    return user, product
+
+
+def _add(repo, user, product, action, quantity, price):
+    return repo.create(product_id=product.id, product_name=product.name, user_id=user.id,
+                       price=Decimal(price), quantity=quantity, action=action)
+
+
+def _totals(rollup):
+    return (rollup.buy_count, rollup.sell_count, rollup.bought_quantity, rollup.sold_quantity,
+            rollup.spent, rollup.earned)
+
+
+class TestHistoryRollups:
+    """Test the per-user and per-product rollups follow every history write"""
+
+    def test_insert(self, db_session, owner):
+        """Test inserts add to both rollups in the same transaction"""
+        user, product = owner
+        repo = HistoryRepository(db_session)
+        _add(repo, user, product, 'buy', 10, '2.00')
+        _add(repo, user, product, 'sell', 4, '3.50')
+        db_session.commit()
+
+        expected = (1, 1, 10, 4, Decimal('20.00'), Decimal('14.00'))
+        assert _totals(repo.get_user_rollup(user.id)) == expected
+        assert _totals(repo.get_product_rollup(product.id)) == expected
+        assert repo.get_product_rollup(product.id).price_total == Decimal('5.50')
+
+    def test_update_and_delete(self, db_session, owner):
+        """Test updates move a row's contribution and deletes remove it"""
+        user, product = owner
+        repo = HistoryRepository(db_session)
+        first = _add(repo, user, product, 'buy', 10, '2.00')
+        second = _add(repo, user, product, 'buy', 1, '1.00')
+        db_session.commit()
+
+        repo.update(first.id, action='sell', quantity=3)
+        db_session.commit()
+        assert _totals(repo.get_user_rollup(user.id)) == (1, 1, 1, 3, Decimal('1.00'), Decimal('6.00'))
+
+        repo.delete(second.id)
+        db_session.commit()
+        assert _totals(repo.get_user_rollup(user.id)) == (0, 1, 0, 3, Decimal('0.00'), Decimal('6.00'))
+
+    def test_rollback_discards_changes(self, db_session, owner):
+        """Test a rolled back write leaves the rollups as they were"""
+        user, product = owner
+        repo = HistoryRepository(db_session)
+        _add(repo, user, product, 'buy', 10, '2.00')
+        db_session.commit()
+
+        _add(repo, user, product, 'buy', 5, '2.00')
+        db_session.rollback()
+
+        assert repo.get_user_rollup(user.id).bought_quantity == 10
+
+    def test_product_delete_cascade(self, db_session, owner):
+        """Test deleting a product drops its rollup and its history from the owner's"""
+        user, product = owner
+        repo = HistoryRepository(db_session)
+        _add(repo, user, product, 'buy', 10, '2.00')
+        db_session.commit()
+
+        ProductService(db_session).delete_product(product.id)
+        db_session.commit()
+
+        assert repo.get_product_rollup(product.id) is None
+        assert repo.get_user_rollup(user.id).buy_count == 0
+
+    def test_summary_reads_rollup(self, db_session, owner):
+        """Test the user summary comes from the rollup, not from the rows"""
+        user, product = owner
+        repo = HistoryRepository(db_session)
+        _add(repo, user, product, 'buy', 10, '2.00')
+        _add(repo, user, product, 'sell', 4, '3.00')
+        db_session.commit()
+
+        summary = repo.get_user_transaction_summary(user.id)
+
+        assert summary['total_bought'] == 10
+        assert summary['total_sold'] == 4
+        assert summary['net_quantity'] == 6
+        assert summary['net_amount'] == Decimal('-8.00')
+        assert repo.get_user_transaction_summary(99999)['total_bought'] == 0
+
+    def test_rollup_totals(self, db_session, owner):
+        """Test user, product and overall totals come back as the same dict, zeros without history"""
+        user, product = owner
+        repo = HistoryRepository(db_session)
+        _add(repo, user, product, 'buy', 2, '1.50')
+        db_session.commit()
+
+        for totals in (repo.get_rollup_totals(user_id=user.id), repo.get_rollup_totals(product_id=product.id),
+                       repo.get_rollup_totals()):
+            assert totals['buy_count'] == 1
+            assert totals['spent'] == Decimal('3.00')
+        empty = repo.get_rollup_totals(user_id=99999)
+        assert set(empty) == set(totals)
+        assert empty['buy_count'] == 0
+        assert empty['earned'] == 0
+
+    def test_rebuild(self, db_session, owner):
+        """Test a rebuild restores rollups written around the ORM"""
+        user, product = owner
+        repo = HistoryRepository(db_session)
+        _add(repo, user, product, 'buy', 10, '2.00')
+        _add(repo, user, product, 'sell', 2, '4.00')
+        db_session.commit()
+        expected = _totals(repo.get_user_rollup(user.id))
+        db_session.execute(delete(UserTxRollup))
+        db_session.execute(delete(ProductTxRollup))
+        db_session.execute(delete(UserDailyTx))
+        db_session.commit()
+
+        counts = repo.rebuild_rollups()
+        db_session.commit()
+
+        assert counts == {'user_tx_rollup': 1, 'product_tx_rollup': 1, 'user_daily_tx': 1, 'product_daily_tx': 1}
+        db_session.expire_all()
+        assert _totals(repo.get_user_rollup(user.id)) == expected
+        assert _totals(repo.get_product_rollup(product.id)) == expected
+
+    def test_rebuild_command(self, app, db_session, owner):
+        """Test flask rebuild-rollups reports what it rebuilt"""
+        user, product = owner
+        db_session.add(History(product_id=product.id, product_name=product.name, user_id=user.id,
+                               price=Decimal('1.00'), quantity=1, action='buy'))
+        db_session.commit()
+
+        result = app.test_cli_runner().invoke(args=['rebuild-rollups'])
+
+        assert result.exit_code == 0, result.output
+        assert 'Rebuilt 1 user and 1 product rollups, 1 user and 1 product daily buckets.' in result.output
+        assert db_session.execute(select(UserTxRollup.buy_count)).scalar_one() == 1
+
+    def test_daily_buckets(self, db_session, owner):
+        """Test rows land in their UTC day's bucket and move with their timestamp"""
+        user, product = owner
+        repo = HistoryRepository(db_session)
+        history = _add(repo, user, product, 'buy', 3, '2.00')
+        history.created_at = datetime(2026, 3, 1, 23, 30, tzinfo=timezone(timedelta(hours=-2)))
+        db_session.commit()
+
+        [daily] = repo.find_daily_totals(date(2026, 3, 1), date(2026, 3, 31), user_id=user.id)
+        assert daily.day == date(2026, 3, 2)
+        assert daily.bought_quantity == 3
+
+        history.created_at = datetime(2026, 3, 5, 12, tzinfo=timezone.utc)
+        db_session.commit()
+
+        days = repo.find_daily_totals(date(2026, 3, 1), date(2026, 3, 31), product_id=product.id)
+        assert [(daily.day, daily.buy_count) for daily in days] == [(date(2026, 3, 2), 0), (date(2026, 3, 5), 1)]
+
+
+    def test_incremental_matches_rebuild(self, db_session, owner):
+        """Test many small writes leave the same money totals a rebuild computes"""
+        user, product = owner
+        repo = HistoryRepository(db_session)
+        prices = ['0.10', '19.99', '0.01', '7.35', '0.07']
+        rows = [_add(repo, user, product, 'buy' if i % 3 else 'sell', i % 7 + 1, prices[i % len(prices)])
+                for i in range(300)]
+        db_session.commit()
+        for history in rows[::4]:
+            history.price = Decimal('0.30')
+        for history in rows[1::9]:
+            db_session.delete(history)
+        db_session.commit()
+
+        def snapshot():
+            db_session.expire_all()
+            user_rollup, product_rollup = repo.get_user_rollup(user.id), repo.get_product_rollup(product.id)
+            days = repo.find_daily_totals(date(2000, 1, 1), date(2100, 1, 1), user_id=user.id)
+            return (_totals(user_rollup), user_rollup.price_total, _totals(product_rollup),
+                    [(daily.day, daily.spent, daily.earned, daily.price_total) for daily in days])
+
+        incremental = snapshot()
+        repo.rebuild_rollups()
+        db_session.commit()
+
+        assert snapshot() == incremental
+        assert incremental[0][4] == sum((h.price * h.quantity for h in db_session.scalars(
+            select(History).where(History.action == 'buy'))), Decimal('0'))
+
+    def test_flush_without_history_skips_rollups(self, db_session, owner):
+        """Test flushes that touch no history leave no rollup work behind"""
+        user, product = owner
+        product.stock = 50
+        db_session.flush()
+
+        assert _PENDING_KEY not in db_session.info
+        assert db_session.execute(select(UserTxRollup)).first() is None
@@ -0,0 +1,54 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from shoptrack.repositories.history_repository import HistoryRepository
+from shoptrack.repositories.product_repository import ProductRepository
+from shoptrack.repositories.session_repository import SessionRepository
+from tests.test_utils import (
+    assert_uses_index, create_test_history, create_test_product, create_test_session,
+    create_test_user, explain_query_plan, full_scans,
+)
+
+
+@pytest.fixture
+def seeded_user(db_session):
+    """A few users, each with products, history and sessions"""
+    users = []
+    for i in range(3):
+        user = create_test_user(db_session, f'planuser{i}', f'plan{i}@example.com')
+        for j in range(5):
+            product = create_test_product(db_session, user.id, name=f'Product {j}', stock=j * 3)
+            create_test_history(db_session, user.id, product.id, product.name, quantity=1 + j)
+        create_test_session(db_session, user.id)
+        create_test_session(db_session, user.id, expires_days=-1)
+        users.append(user)
+    return users[0].id
+
+
+class TestQueryPlans:
+    """Test hot repository queries are served by indexes"""
+
+    def test_history_find_by_user(self, db_session, seeded_user):
+        """Test a user's history is looked up through an index"""
+        assert_uses_index(db_session, HistoryRepository(db_session).find_by_user, seeded_user)
+
+    def test_history_find_recent_transactions(self, db_session, seeded_user):
+        """Test recent transactions are read in index order"""
+        assert_uses_index(db_session, HistoryRepository(db_session).find_recent_transactions, 5)
+
+    def test_product_find_all_by_owner(self, db_session, seeded_user):
+        """Test an owner's products are looked up through an index"""
+        assert_uses_index(db_session, ProductRepository(db_session).find_all_by_owner, seeded_user)
+
+    def test_product_find_low_stock(self, db_session, seeded_user):
+        """Test low stock products are found with an index range scan"""
+        assert_uses_index(db_session, ProductRepository(db_session).find_low_stock, 5)
+
+    def test_session_find_user_active_sessions(self, db_session, seeded_user):
+        """Test a user's active sessions are looked up through an index"""
+        assert_uses_index(db_session, SessionRepository(db_session).find_user_active_sessions, seeded_user)
+
+    def test_full_scan_detected(self, db_session, seeded_user):
+        """Test the helper flags an unindexed lookup"""
+        plan = explain_query_plan(db_session, "SELECT * FROM history WHERE product_name = ?", ('Product 1',))
+
+        assert full_scans(plan)
@@ -578,3 +578,39 @@ class TestHistoryService:
         assert updated.price == Decimal('15.0')
         assert updated.quantity == 3
         assert updated.action == 'sell'
+    
+    def test_get_transaction_timeseries_weeks(self, db_session):
+        """Test weekly buckets start on Monday and sum their days"""
+        service = HistoryService(db_session)
+        user = User(username='testuser', password='password', email='test@example.com')
+        product = Product(name='Test Product', price=Decimal('19.99'), stock=10, owner=user)
+        db_session.add_all([user, product])
+        db_session.commit()
+        
+        # 2026-03-02 is a Monday
+        for day in (2, 8, 9):
+            db_session.add(History(
+                product_id=product.id, product_name='Test Product', user_id=user.id, price=Decimal('2.50'),
+                quantity=2, action='sell', created_at=datetime(2026, 3, day, 9, tzinfo=timezone.utc)
+            ))
+        db_session.commit()
+        
+        from datetime import date
+        series = service.get_transaction_timeseries(
+            product_id=product.id, bucket='week', start=date(2026, 3, 4), end=date(2026, 3, 10))
+        
+        assert [bucket['start'] for bucket in series] == ['2026-03-02', '2026-03-09']
+        assert series[0]['sell_count'] == 2
+        assert series[0]['earned'] == Decimal('10.00')
+        assert series[1]['sold_quantity'] == 2
+    
+    def test_get_transaction_timeseries_invalid(self, db_session):
+        """Test unknown buckets and reversed ranges are rejected"""
+        service = HistoryService(db_session)
+        
+        from datetime import date
+        with pytest.raises(ValueError, match="Bucket must be"):
+            service.get_transaction_timeseries(user_id=1, bucket='hour')
+        with pytest.raises(ValueError, match="Start date cannot be after end date"):
+            service.get_transaction_timeseries(user_id=1, start=date(2026, 3, 2), end=date(2026, 3, 1))
+
@@ -0,0 +1,48 @@
+import pytest
+from flask import g
+from shoptrack.services import ServiceContainer, ProductService
+from shoptrack.api.base import BaseController
+
+
+class TestServiceContainer:
+    """Test the lazily populated service container"""
+    
+    def test_services_created_on_first_use(self, db_session):
+        """Test only the services actually used are instantiated"""
+        services = ServiceContainer(db_session)
+        
+        assert 'product' not in services
+        product_service = services['product']
+        
+        assert isinstance(product_service, ProductService)
+        assert services['product'] is product_service
+        assert 'history' not in services
+    
+    def test_repositories_shared_between_services(self, db_session):
+        """Test services of one container share their repositories"""
+        services = ServiceContainer(db_session)
+        
+        product_repository = services['product'].product_repository
+        
+        assert services['history'].product_repository is product_repository
+        assert 'session' not in services.repositories
+    
+    def test_standalone_service_creates_own_repositories(self, db_session):
+        """Test services still work when built directly from a session"""
+        service = ProductService(db_session)
+        
+        assert service.product_repository is service.product_repository
+        assert service.product_repository.session is db_session
+    
+    def test_container_cached_for_request(self, app):
+        """Test the controller reuses one container per request"""
+        controller = BaseController()
+        
+        with app.test_request_context('/'):
+            app.preprocess_request()
+            services = controller.get_services()
+            assert controller.get_services() is services
+            assert g.services is services
+            
+            BaseController.clear_request_state()
+            assert controller.get_services() is not services
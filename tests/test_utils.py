@@ -7,6 +7,7 @@ from shoptrack.models.user import User
 from shoptrack.models.product import Product
 from shoptrack.models.history import History
 from shoptrack.models.session import Session
+from shoptrack.observability.queries import collect_queries
 from decimal import Decimal
 
 
@@ -110,6 +111,44 @@ def create_test_user_with_transactions(db_session, username='testuser', email='t
     return user, transactions
 
 
+def capture_statements(func, *args, **kwargs):
+    """Call func and return the (statement, parameters) pairs it executed"""
+    with collect_queries() as stats:
+        func(*args, **kwargs)
+    return [(statement, parameters) for statement, _, _, parameters in stats.statements]
+
+
+def explain_query_plan(db_session, statement, parameters=()):
+    """Return the database's plan for a statement, one line per plan step"""
+    connection = db_session.connection()
+    if connection.dialect.name == 'postgresql':
+        # Tiny test tables make a sequential scan the cheapest plan; forbid it
+        # so the plan shows whether an index *can* serve the query
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).all()
+        return [row[0] for row in rows]
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return [row[-1] for row in rows]
+
+
+def full_scans(plan):
+    """Plan lines that read a whole table instead of going through an index"""
+    return [
+        line for line in plan
+        if 'Seq Scan' in line or (line.startswith('SCAN ') and 'USING' not in line)
+    ]
+
+
+def assert_uses_index(db_session, func, *args, **kwargs):
+    """Assert every statement func executes is served by an index"""
+    statements = capture_statements(func, *args, **kwargs)
+    assert statements, f"{func.__qualname__} executed no statements"
+    for statement, parameters in statements:
+        plan = explain_query_plan(db_session, statement, parameters)
+        scans = full_scans(plan)
+        assert not scans, f"{func.__qualname__} does a full scan: {scans}\n{statement}\nplan: {plan}"
+
+
 class TestDataFactory:
     """Factory class for creating test data"""
     